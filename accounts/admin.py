@@ -59,6 +59,7 @@ class JobSeekerProfileAdmin(admin.ModelAdmin):
         "is_employed",
     ]
     search_fields = ["user__username", "user__email", "specialization", "field_of_work"]
+    readonly_fields = ["rating", "rating_count"]
     inlines = [JobSeekerServiceInline]
 
     fieldsets = (
@@ -76,7 +77,15 @@ class JobSeekerProfileAdmin(admin.ModelAdmin):
         ),
         (
             "Professional Info",
-            {"fields": ("experience_level", "bio", "rating", "expected_hourly_rate")},
+            {
+                "fields": (
+                    "experience_level",
+                    "bio",
+                    "rating",
+                    "rating_count",
+                    "expected_hourly_rate",
+                )
+            },
         ),
         (
             "Status",
@@ -148,10 +157,10 @@ class SupporterProfileAdmin(admin.ModelAdmin):
     actions = ["update_badge_levels"]
 
     def update_badge_levels(self, request, queryset):
-        for supporter in queryset:
-            supporter.update_badge_level()
+        updated = SupporterProfile.objects.recalculate_badge_levels(queryset)
         self.message_user(
-            request, f"Updated badge levels for {queryset.count()} supporters."
+            request,
+            f"Checked {queryset.count()} supporters, {updated} badge levels changed.",
         )
 
     update_badge_levels.short_description = "Update badge levels"
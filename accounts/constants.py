@@ -3,9 +3,22 @@ from django.db import models
 
 
 class CacheKeys(Enum):
-    JOB_SEEKER_RATING = "job_seeker_{job_seeker_id}_rating"
-    TOTAL_DONATIONS = "total_donations_{supporter_profile_pk}"
-    DONATION_COUNT = "donation_count_{supporter_profile_pk}"
+    DONATION_ROLLUP_DIRTY_DAYS = "donation_rollup_dirty_days"
+    LEADERBOARD = "leaderboard:{board}:{scope}"
+    LEADERBOARD_NAMES = "leaderboard:{board}:names"
+    GEOCODE_RESULT = "geocode_{geohash}"
+    GEOCODE_METRIC = "geocode_metric_{outcome}"
+    GEOCODING_PENDING = "geocoding:pending"
+    GEOCODING_SCHEDULED = "geocoding:scheduled"
+    GEOCODING_RATE_LIMIT = "geocoding:rate_limit"
+    MAP_TILE = "map_tile:{layer}:{zoom}:{x}:{y}:{generation}"
+    MAP_TILE_GENERATION = "map_tile:{layer}:{zoom}:{x}:{y}:generation"
+    OTP_CODE = "otp:{mobile_number_id}:code"
+    OTP_ATTEMPTS = "otp:{mobile_number_id}:attempts"
+    OTP_COOLDOWN = "otp:{mobile_number_id}:cooldown"
+    NOTIFICATION_INBOX = "notifications:{user_id}:inbox"
+    NOTIFICATION_UNREAD = "notifications:{user_id}:unread"
+    NOTIFICATION_VERSION = "notifications:{user_id}:version"
 
     def build_key(self, **kwargs):
         return self.value.format(**kwargs)
@@ -14,12 +27,35 @@ class CacheKeys(Enum):
 class BadgeLevel(models.TextChoices):
     """Badge level choices for supporters, including their donation thresholds."""
 
-    BRONZE = "bronze", "Bronze Supporter", 0
-    SILVER = "silver", "Silver Supporter", 500
-    GOLD = "gold", "Gold Supporter", 2000
-    PLATINUM = "platinum", "Platinum Supporter", 5000
-    DIAMOND = "diamond", "Diamond Supporter", 10000
+    BRONZE = "bronze", "Bronze Supporter"
+    SILVER = "silver", "Silver Supporter"
+    GOLD = "gold", "Gold Supporter"
+    PLATINUM = "platinum", "Platinum Supporter"
+    DIAMOND = "diamond", "Diamond Supporter"
 
     @property
     def threshold(self):
-        return self.value[2]
+        return BADGE_LEVEL_THRESHOLDS[self]
+
+    @classmethod
+    def by_threshold(cls):
+        """Badge levels ordered from the highest threshold to the lowest."""
+        return sorted(cls, key=lambda badge: badge.threshold, reverse=True)
+
+    @classmethod
+    def for_amount(cls, total_donations):
+        """Return the highest badge level reached by a donation total."""
+        for badge in cls.by_threshold():
+            if total_donations >= badge.threshold:
+                return badge
+        return cls.BRONZE
+
+
+# Minimum total donation amount for each badge level
+BADGE_LEVEL_THRESHOLDS = {
+    BadgeLevel.BRONZE: 0,
+    BadgeLevel.SILVER: 500,
+    BadgeLevel.GOLD: 2000,
+    BadgeLevel.PLATINUM: 5000,
+    BadgeLevel.DIAMOND: 10000,
+}
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from accounts.models.location import Location
+from accounts.services.geocoding import enqueue_geocoding
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue every location without a city or country for batched, "
+        "rate-limited reverse geocoding."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Location ids added to the pending set per round trip.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        missing = (
+            Location.objects.filter(
+                Q(city__isnull=True)
+                | Q(city="")
+                | Q(country__isnull=True)
+                | Q(country="")
+            )
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+        queued = 0
+        chunk = []
+        for location_id in missing.iterator(chunk_size=chunk_size):
+            chunk.append(location_id)
+            if len(chunk) >= chunk_size:
+                enqueue_geocoding(chunk)
+                queued += len(chunk)
+                chunk = []
+        if chunk:
+            enqueue_geocoding(chunk)
+            queued += len(chunk)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Queued {queued} locations for geocoding.")
+        )
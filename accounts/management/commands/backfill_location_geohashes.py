@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models.location import GEOHASH_PRECISION, Location
+from core.utils.geo import geohash_encode
+
+
+class Command(BaseCommand):
+    help = "Fill the geohash column of locations saved before it existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Locations updated per query.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute every location, not only those without a geohash.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        locations = Location.objects.only("pk", "latitude", "longitude")
+        if not options["all"]:
+            locations = locations.filter(geohash="")
+
+        updated = 0
+        chunk = []
+        for location in locations.order_by("pk").iterator(chunk_size=chunk_size):
+            location.geohash = geohash_encode(
+                location.latitude, location.longitude, GEOHASH_PRECISION
+            )
+            chunk.append(location)
+            if len(chunk) >= chunk_size:
+                # bulk_update skips Location.save, so no geocoding is queued
+                Location.objects.bulk_update(chunk, ["geohash"])
+                updated += len(chunk)
+                chunk = []
+        if chunk:
+            Location.objects.bulk_update(chunk, ["geohash"])
+            updated += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} location geohashes."))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import MobileNumber
+
+
+class Command(BaseCommand):
+    help = "Store the international and national formats of existing mobile numbers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Mobile numbers updated per query.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        numbers = (
+            MobileNumber.objects.filter(international_number="")
+            .only("pk", "number")
+            .order_by("pk")
+        )
+
+        updated = 0
+        chunk = []
+        for mobile_number in numbers.iterator(chunk_size=chunk_size):
+            mobile_number._store_formats()
+            chunk.append(mobile_number)
+            if len(chunk) >= chunk_size:
+                # bulk_update skips the verification checks of MobileNumber.save
+                MobileNumber.objects.bulk_update(
+                    chunk, ["international_number", "national_number"]
+                )
+                updated += len(chunk)
+                chunk = []
+        if chunk:
+            MobileNumber.objects.bulk_update(
+                chunk, ["international_number", "national_number"]
+            )
+            updated += len(chunk)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Stored formats of {updated} mobile numbers.")
+        )
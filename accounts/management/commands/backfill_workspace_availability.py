@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import WorkSpace
+from accounts.models.work_space import AVAILABILITY_MINUTE_FIELDS
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the minute-of-day availability intervals of every workspace "
+        "from its opening and power times."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Workspaces updated per query.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        workspaces = WorkSpace.objects.only(
+            "pk", "opening_time", "closing_time", "power_start_time", "power_end_time"
+        ).order_by("pk")
+
+        updated = 0
+        chunk = []
+        for workspace in workspaces.iterator(chunk_size=chunk_size):
+            workspace.update_availability_minutes()
+            chunk.append(workspace)
+            if len(chunk) >= chunk_size:
+                WorkSpace.objects.bulk_update(chunk, AVAILABILITY_MINUTE_FIELDS)
+                updated += len(chunk)
+                chunk = []
+        if chunk:
+            WorkSpace.objects.bulk_update(chunk, AVAILABILITY_MINUTE_FIELDS)
+            updated += len(chunk)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated availability of {updated} workspaces.")
+        )
@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.utils.backups import (
+    BackupError,
+    dump_model,
+    finish_backup,
+    generations,
+    plan_backup,
+    verify_generation,
+)
+
+
+def _dump(plan, label):
+    try:
+        return dump_model(plan, label)
+    finally:
+        # Each thread has its own connection
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Back up the database here instead of on the Celery workers, list the "
+        "backups, or verify one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Take a full backup even if an incremental one is due.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Models dumped at the same time (default: 4).",
+        )
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="List the finished backups instead.",
+        )
+        parser.add_argument(
+            "--verify",
+            nargs="?",
+            const="",
+            metavar="NAME",
+            help="Verify a finished backup instead (default: the latest).",
+        )
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for manifest in generations():
+                rows = sum(entry["rows"] for entry in manifest["files"])
+                size = sum(entry["bytes"] for entry in manifest["files"])
+                self.stdout.write(f"{manifest['name']}  {rows} rows  {size} bytes")
+            return
+        if options["verify"] is not None:
+            return self._verify(options["verify"])
+
+        plan = plan_backup(full=options["full"])
+        self.stdout.write(f"Backing up {len(plan['models'])} models to {plan['name']}")
+        with ThreadPoolExecutor(max_workers=max(options["workers"], 1)) as executor:
+            entries = list(
+                executor.map(lambda label: _dump(plan, label), plan["models"])
+            )
+        try:
+            manifest = finish_backup(plan, entries)
+        except BackupError as e:
+            raise CommandError(str(e))
+
+        rows = sum(entry["rows"] for entry in manifest["files"])
+        size = sum(entry["bytes"] for entry in manifest["files"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{manifest['kind'].capitalize()} backup {manifest['name']} "
+                f"completed: {rows} rows, {size} bytes."
+            )
+        )
+
+    def _verify(self, name):
+        manifests = {manifest["name"]: manifest for manifest in generations()}
+        if not manifests:
+            raise CommandError("There is no finished backup.")
+        name = name or max(manifests)
+        if name not in manifests:
+            raise CommandError(f"No finished backup named {name!r}.")
+
+        problems = verify_generation(manifests[name])
+        if problems:
+            raise CommandError(f"Backup {name} is corrupt: {'; '.join(problems)}")
+        self.stdout.write(self.style.SUCCESS(f"Backup {name} is sound."))
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.services.gazetteer import build_gazetteer
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the offline reverse-geocoding gazetteer from GeoNames dumps "
+        "(e.g. cities1000.txt, countryInfo.txt and admin1CodesASCII.txt)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("cities", help="Path to the GeoNames cities file.")
+        parser.add_argument(
+            "--countries", help="Path to countryInfo.txt, for country names."
+        )
+        parser.add_argument(
+            "--admin1", help="Path to admin1CodesASCII.txt, for state names."
+        )
+        parser.add_argument(
+            "--min-population",
+            type=int,
+            default=0,
+            help="Skip places with a smaller population.",
+        )
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Directory to write to; defaults to GEOCODING_GAZETTEER_PATH.",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"] or settings.GEOCODING_GAZETTEER_PATH
+        count = build_gazetteer(
+            options["cities"],
+            output,
+            countries_path=options["countries"],
+            admin1_path=options["admin1"],
+            min_population=options["min_population"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Gazetteer with {count} places written to {output}.")
+        )
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.services.phone_metadata import CompactMetadataProvider
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the compact phone metadata table (country and carrier names) "
+        "for the served regions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--regions",
+            nargs="+",
+            help="ISO region codes to include; defaults to PHONE_METADATA_REGIONS.",
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write; defaults to PHONE_METADATA_TABLE_PATH.",
+        )
+
+    def handle(self, *args, **options):
+        regions = options["regions"] or settings.PHONE_METADATA_REGIONS
+        if not regions:
+            raise CommandError(
+                "No regions given, use --regions or set PHONE_METADATA_REGIONS."
+            )
+        output = options["output"] or settings.PHONE_METADATA_TABLE_PATH
+        try:
+            counts = CompactMetadataProvider.build_table(regions, str(output))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {counts['countries']} countries and {counts['carriers']} "
+                f"carrier prefixes to {output}."
+            )
+        )
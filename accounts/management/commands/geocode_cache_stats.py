@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import GeocodeCacheEntry
+from accounts.services.geocoding import geocode_cache
+
+
+class Command(BaseCommand):
+    help = "Show hit-rate metrics of the reverse-geocoding cache."
+
+    def handle(self, *args, **options):
+        stats = geocode_cache.stats()
+        self.stdout.write(f"Redis hits:    {stats['redis_hit']}")
+        self.stdout.write(f"Database hits: {stats['database_hit']}")
+        self.stdout.write(f"Misses:        {stats['miss']}")
+        self.stdout.write(f"Hit rate:      {stats['hit_rate']:.1%}")
+        self.stdout.write(f"Stored cells:  {GeocodeCacheEntry.objects.count()}")
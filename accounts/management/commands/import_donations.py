@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.services.donation_import import (
+    DEFAULT_CHUNK_SIZE,
+    SUPPORTED_FORMATS,
+    detect_format,
+    import_donations,
+)
+
+
+class Command(BaseCommand):
+    help = "Stream a partner donation file (CSV or JSONL) into the Donation table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the CSV or JSONL file.")
+        parser.add_argument(
+            "--format",
+            choices=SUPPORTED_FORMATS,
+            help="File format; guessed from the extension when omitted.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Rows written per transaction (default: {DEFAULT_CHUNK_SIZE}).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the file without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as stream:
+                report = import_donations(
+                    stream,
+                    file_format=options["format"] or detect_format(path),
+                    chunk_size=options["chunk_size"],
+                    dry_run=options["dry_run"],
+                )
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        for line_number, reason in report.errors:
+            self.stdout.write(self.style.WARNING(f"Line {line_number}: {reason}"))
+        if report.rejected > len(report.errors):
+            self.stdout.write(
+                f"... {report.rejected - len(report.errors)} more rejected rows"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{report.rows_read} rows read, {report.created} donations "
+                f"{'valid' if options['dry_run'] else 'created'}, "
+                f"{report.rejected} rejected, {report.badges_changed} badges changed "
+                f"in {report.elapsed:.2f}s ({report.rows_per_second:.0f} rows/s)."
+            )
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from accounts.services.leaderboards import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = "Recreate the donor and freelancer leaderboards in Redis from the database."
+
+    def handle(self, *args, **options):
+        result = rebuild_leaderboards()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {result['donors']} donor boards and "
+                f"{result['freelancers']} freelancer board."
+            )
+        )
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import SupporterProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every supporter's badge level from the stored donation "
+        "totals using set-based UPDATEs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Primary key window handled by each UPDATE (default: 10000).",
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="run_async",
+            help="Queue the recalculation as a Celery task instead of running it here.",
+        )
+
+    def handle(self, *args, **options):
+        if options["run_async"]:
+            from accounts.tasks import recalculate_badge_levels
+
+            result = recalculate_badge_levels.delay(chunk_size=options["chunk_size"])
+            self.stdout.write(f"Queued badge recalculation task {result.id}.")
+            return
+
+        started = time.perf_counter()
+        updated = SupporterProfile.objects.recalculate_badge_levels(
+            chunk_size=options["chunk_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{updated} supporters changed badge level "
+                f"in {time.perf_counter() - started:.2f}s."
+            )
+        )
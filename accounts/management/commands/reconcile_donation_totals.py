@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import SupporterProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the stored donation totals and counts of every supporter with "
+        "the Donation table, and optionally repair the ones that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Rewrite mismatched totals from the Donation table.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of supporters repaired per UPDATE (default: 1000).",
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=20,
+            help="Maximum number of mismatches to print (default: 20).",
+        )
+
+    def handle(self, *args, **options):
+        mismatches = SupporterProfile.objects.donation_total_mismatches().order_by("pk")
+        rows = mismatches.values_list(
+            "pk", "total_donations", "actual_total", "donation_count", "actual_count"
+        )
+
+        mismatched_ids = []
+        for pk, stored_total, actual_total, stored_count, actual_count in rows.iterator(
+            chunk_size=options["batch_size"]
+        ):
+            if len(mismatched_ids) < options["show"]:
+                self.stdout.write(
+                    f"Supporter {pk}: total {stored_total} != {actual_total}, "
+                    f"count {stored_count} != {actual_count}"
+                )
+            mismatched_ids.append(pk)
+
+        if not mismatched_ids:
+            self.stdout.write(self.style.SUCCESS("All donation totals are consistent."))
+            return
+
+        self.stdout.write(
+            self.style.WARNING(f"{len(mismatched_ids)} supporters have drifted totals.")
+        )
+        if not options["fix"]:
+            return
+
+        updated = 0
+        batch_size = options["batch_size"]
+        for start in range(0, len(mismatched_ids), batch_size):
+            batch = mismatched_ids[start : start + batch_size]
+            updated += SupporterProfile.objects.recalculate_donation_totals(
+                SupporterProfile.objects.filter(pk__in=batch)
+            )
+        self.stdout.write(self.style.SUCCESS(f"Repaired {updated} supporters."))
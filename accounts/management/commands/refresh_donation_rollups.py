@@ -0,0 +1,41 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from accounts.services.donation_rollups import (
+    mark_days_dirty,
+    refresh_donation_rollups,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold new donations into the daily and monthly rollups. With --since, "
+        "also rebuild every day from that date onwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Rebuild all buckets from this date (YYYY-MM-DD) until today.",
+        )
+
+    def handle(self, *args, **options):
+        if options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError("--since must use the YYYY-MM-DD format.")
+            mark_days_dirty(
+                since + datetime.timedelta(days=offset)
+                for offset in range((timezone.localdate() - since).days + 1)
+            )
+
+        result = refresh_donation_rollups()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result['donations']} new donations processed, "
+                f"{result['days']} day buckets rebuilt."
+            )
+        )
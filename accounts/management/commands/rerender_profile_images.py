@@ -0,0 +1,85 @@
+import os
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.services.image_rerender import (
+    DEFAULT_CHUNK_SIZE,
+    rerender_images,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every profile photo and company logo again with a local "
+        "process pool, resuming from a checkpoint file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--checkpoint",
+            default=str(settings.BASE_DIR / "data" / "rerender_profile_images.json"),
+            help="Checkpoint file to resume from and update.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint and start from the first image.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Worker processes (default: CPU count).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=(
+                "Images per cursor fetch, worker pool and checkpoint "
+                f"(default: {DEFAULT_CHUNK_SIZE})."
+            ),
+        )
+        parser.add_argument(
+            "--report-every",
+            type=int,
+            default=1000,
+            help="Report progress every N images (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        checkpoint = options["checkpoint"]
+        checkpoint_dir = os.path.dirname(os.path.abspath(checkpoint))
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        if options["restart"] and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        statuses = Counter()
+        started = time.perf_counter()
+        results = rerender_images(
+            checkpoint_path=checkpoint,
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+        )
+        for model_label, field, pk, status, error in results:
+            statuses[status] += 1
+            done = sum(statuses.values())
+            if done % options["report_every"] == 0:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{done} images, {done / elapsed:.1f} images/s "
+                    f"(at {model_label} {field} {pk})"
+                )
+
+        done = sum(statuses.values())
+        elapsed = time.perf_counter() - started
+        summary = ", ".join(f"{count} {status}" for status, count in statuses.items())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{done} images in {elapsed:.1f}s "
+                f"({done / elapsed if elapsed else 0:.1f} images/s): {summary or 'none'}."
+            )
+        )
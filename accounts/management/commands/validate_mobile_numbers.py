@@ -0,0 +1,83 @@
+import csv
+import sys
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.services.phone_validation import (
+    DEFAULT_CHUNK_SIZE,
+    REPORT_FIELDS,
+    validate_mobile_numbers,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Validate, normalize (E.164) and enrich a CSV of mobile numbers, and "
+        "check them against registered numbers. Writes a per-row CSV report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the CSV file.")
+        parser.add_argument(
+            "--column",
+            default="number",
+            help="Header of the column holding the numbers (default: number).",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the report to this file instead of stdout.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Worker processes (default: CPU count; 1 disables the pool).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Numbers per worker task (default: {DEFAULT_CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        column = options["column"]
+        try:
+            source = open(path, encoding="utf-8-sig", newline="")
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        output = (
+            open(options["output"], "w", encoding="utf-8", newline="")
+            if options["output"]
+            else self.stdout
+        )
+        statuses = Counter()
+        try:
+            reader = csv.DictReader(source)
+            if column not in (reader.fieldnames or []):
+                raise CommandError(f"{path} has no {column!r} column.")
+
+            writer = csv.DictWriter(output, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            results = validate_mobile_numbers(
+                (row[column] for row in reader),
+                workers=options["workers"],
+                chunk_size=options["chunk_size"],
+            )
+            for result in results:
+                writer.writerow(result)
+                statuses[result["status"]] += 1
+        finally:
+            source.close()
+            if output is not self.stdout:
+                output.close()
+
+        summary = ", ".join(f"{count} {status}" for status, count in statuses.items())
+        # Keep stdout clean when it carries the report
+        sys.stderr.write(
+            self.style.SUCCESS(f"{sum(statuses.values())} numbers checked: {summary}.")
+            + "\n"
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from accounts.services.map_clusters import LAYERS, warm_tiles
+
+
+class Command(BaseCommand):
+    help = "Precompute the clustered map tiles of every layer into the cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--layer",
+            choices=list(LAYERS),
+            help="Only warm this layer.",
+        )
+        parser.add_argument(
+            "--max-zoom",
+            type=int,
+            default=None,
+            help="Deepest zoom level to warm; defaults to MAP_TILE_WARM_ZOOM.",
+        )
+
+    def handle(self, *args, **options):
+        layers = [options["layer"]] if options["layer"] else list(LAYERS)
+        for layer in layers:
+            count = warm_tiles(layer, max_zoom=options["max_zoom"])
+            self.stdout.write(self.style.SUCCESS(f"Warmed {count} {layer} tiles."))
@@ -11,6 +11,12 @@ __all__ = [
     "Rating",
     "JobSeekerProfileManager",
     "Donation",
+    "DonationRollup",
+    "DonationRollupDonor",
+    "RollupWatermark",
+    "GeocodeCacheEntry",
+    "MediaBlob",
+    "Notification",
 ]
 
 from .work_space import WorkSpace
@@ -28,3 +34,7 @@ from .mobile_number import MobileNumber
 from .rating import Rating
 from .managers import JobSeekerProfileManager
 from .donation import Donation
+from .donation_rollup import DonationRollup, DonationRollupDonor, RollupWatermark
+from .geocode_cache import GeocodeCacheEntry
+from .media_blob import MediaBlob
+from .notification import Notification
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from .profiles import SupporterProfile
+from ..constants import BadgeLevel
 
 
 class Donation(models.Model):
@@ -21,9 +23,32 @@ class Donation(models.Model):
         help_text="The amount of the donation.",
     )
     timestamp = models.DateTimeField(
-        auto_now_add=True,
+        # Not auto_now_add, so imported partner batches keep their own timestamps
+        default=timezone.now,
+        editable=False,
         help_text="The date and time when the donation was made.",
     )
+    country = models.CharField(
+        max_length=100,
+        blank=True,
+        editable=False,
+        help_text="The supporter's country when the donation was made.",
+    )
+    badge_level = models.CharField(
+        max_length=20,
+        choices=BadgeLevel.choices,
+        default=BadgeLevel.BRONZE,
+        editable=False,
+        help_text="The supporter's badge level when the donation was made.",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Timestamp when the record was created.",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Timestamp when the record was last updated.",
+    )
 
     class Meta:
         verbose_name = "Donation"
@@ -34,5 +59,55 @@ class Donation(models.Model):
             models.Index(fields=["timestamp"]),
         ]
 
+    def __init__(self, *args, **kwargs):
+        """Store the original state so `save` can compute aggregate deltas."""
+        super().__init__(*args, **kwargs)
+        self._store_original_state()
+
+    def save(self, *args, **kwargs):
+        """
+        Save the donation and update the supporter's donation aggregates in the
+        same transaction.
+
+        The aggregates are adjusted before the row is written so that
+        `post_save` receivers (badge updates) already see the new totals; a
+        failed insert rolls both back together. New or reassigned donations
+        snapshot the supporter's country and badge level, which the donation
+        rollups group by.
+        """
+        is_new = self._state.adding
+        if is_new or self.supporter_id != self._original_supporter_id:
+            self.country = self.supporter.country
+            self.badge_level = self.supporter.badge_level
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "country", "badge_level"}
+
+        with transaction.atomic():
+            if is_new:
+                SupporterProfile.objects.apply_donation_delta(
+                    self.supporter_id, self.amount, 1
+                )
+            elif self.supporter_id != self._original_supporter_id:
+                SupporterProfile.objects.apply_donation_delta(
+                    self._original_supporter_id, -self._original_amount, -1
+                )
+                SupporterProfile.objects.apply_donation_delta(
+                    self.supporter_id, self.amount, 1
+                )
+            elif self.amount != self._original_amount:
+                SupporterProfile.objects.apply_donation_delta(
+                    self.supporter_id, self.amount - self._original_amount, 0
+                )
+
+            super().save(*args, **kwargs)
+
+        self._store_original_state()
+
+    def _store_original_state(self):
+        self._original_supporter_id = self.supporter_id
+        self._original_amount = self.amount
+        self._original_timestamp = self.timestamp
+
     def __str__(self):
         return f"Donation of {self.amount} by {self.supporter.user.get_full_name()} on {self.timestamp.strftime('%Y-%m-%d')}"
@@ -0,0 +1,133 @@
+from django.db import models
+
+from .managers import DonationRollupManager
+from .profiles import SupporterProfile
+from ..constants import BadgeLevel
+
+
+class DonationRollup(models.Model):
+    """
+    Pre-aggregated donation statistics for one period, supporter country and
+    badge level. Maintained by the `refresh_donation_rollups` task so dashboard
+    charts never scan the `Donation` table.
+
+    Country and badge level are the supporter's values at the time the bucket
+    was last rebuilt.
+    """
+
+    class Period(models.TextChoices):
+        """Rollup granularity choices"""
+
+        DAY = "day", "Day"
+        MONTH = "month", "Month"
+
+    period = models.CharField(
+        max_length=5,
+        choices=Period.choices,
+        help_text="Granularity of the bucket.",
+    )
+    period_start = models.DateField(
+        help_text="First day covered by the bucket.",
+    )
+    country = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Country of the supporters in this bucket.",
+    )
+    badge_level = models.CharField(
+        max_length=20,
+        choices=BadgeLevel.choices,
+        help_text="Badge level of the supporters in this bucket.",
+    )
+    total_amount = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=0,
+        help_text="Sum of the donations in this bucket.",
+    )
+    donation_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of donations in this bucket.",
+    )
+    donor_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of distinct supporters who donated in this bucket.",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Timestamp when the bucket was last rebuilt.",
+    )
+
+    objects = DonationRollupManager()
+
+    class Meta:
+        verbose_name = "Donation Rollup"
+        verbose_name_plural = "Donation Rollups"
+        unique_together = ("period", "period_start", "country", "badge_level")
+        indexes = [
+            models.Index(fields=["period", "period_start"]),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.get_period_display()} {self.period_start} "
+            f"{self.country or '-'}/{self.badge_level}: {self.total_amount}"
+        )
+
+
+class DonationRollupDonor(models.Model):
+    """
+    Supporters who donated in a given month, per country and badge level
+    their donations were made with. Lets monthly distinct-donor counts be
+    maintained incrementally instead of re-scanning a month of donations.
+    """
+
+    month_start = models.DateField(
+        help_text="First day of the month.",
+    )
+    supporter = models.ForeignKey(
+        SupporterProfile,
+        on_delete=models.CASCADE,
+        related_name="+",
+        help_text="A supporter who donated during the month.",
+    )
+    country = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Country the supporter's donations were made with.",
+    )
+    badge_level = models.CharField(
+        max_length=20,
+        choices=BadgeLevel.choices,
+        help_text="Badge level the supporter's donations were made with.",
+    )
+
+    class Meta:
+        verbose_name = "Donation Rollup Donor"
+        verbose_name_plural = "Donation Rollup Donors"
+        unique_together = ("month_start", "supporter", "country", "badge_level")
+
+
+class RollupWatermark(models.Model):
+    """Highest source row id already folded into a rollup."""
+
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        help_text="Name of the rollup this watermark belongs to.",
+    )
+    last_id = models.BigIntegerField(
+        default=0,
+        help_text="Primary key of the last processed source row.",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Timestamp when the watermark last moved.",
+    )
+
+    class Meta:
+        verbose_name = "Rollup Watermark"
+        verbose_name_plural = "Rollup Watermarks"
+
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
@@ -0,0 +1,38 @@
+from django.db import models
+
+
+class GeocodeCacheEntry(models.Model):
+    """
+    Durable tier of the reverse-geocoding cache.
+
+    Results are keyed by the geohash of the coordinates at
+    `GEOCODE_CACHE_PRECISION`, so every point inside the same cell shares one
+    lookup; only the area components (city, state, country) are kept. Redis
+    holds the hot copies; this table survives cache flushes.
+    """
+
+    geohash = models.CharField(
+        max_length=12,
+        unique=True,
+        help_text="Geohash of the cell this result was resolved for.",
+    )
+    address = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Area components returned by the geocoder (empty if none).",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Timestamp when the result was first stored.",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Timestamp when the result was last refreshed.",
+    )
+
+    class Meta:
+        verbose_name = "Geocode Cache Entry"
+        verbose_name_plural = "Geocode Cache Entries"
+
+    def __str__(self):
+        return f"{self.geohash}: {self.address.get('city') or self.address.get('country') or '-'}"
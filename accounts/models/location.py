@@ -1,4 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+
+from core.utils.geo import geohash_encode
+
+GEOHASH_PRECISION = 12
 
 
 class Location(models.Model):
@@ -20,7 +24,7 @@ class Location(models.Model):
     - Reusable: Can be linked to any other model needing location information.
 
     Dependencies:
-    - Celery: Used for asynchronous background geocoding.
+    - Celery: Used for asynchronous, batched background geocoding.
     - `geopy`: The external library used by the Celery task to perform geocoding.
     """
 
@@ -30,6 +34,13 @@ class Location(models.Model):
     longitude = models.FloatField(
         help_text="Longitude of the location.",
     )
+    geohash = models.CharField(
+        max_length=GEOHASH_PRECISION,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Geohash of the coordinates, kept in sync on save for proximity searches.",
+    )
     address_line1 = models.CharField(
         max_length=255,
         blank=True,
@@ -87,6 +98,15 @@ class Location(models.Model):
         old_instance = None
         if not is_new:
             old_instance = Location.objects.get(pk=self.pk)
+        # Read by the map tile invalidation signal
+        self._previous_coordinates = (
+            (old_instance.latitude, old_instance.longitude) if old_instance else None
+        )
+
+        self.geohash = geohash_encode(self.latitude, self.longitude, GEOHASH_PRECISION)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
 
         # Save the object first to ensure it has an ID for the task
         super().save(*args, **kwargs)
@@ -101,10 +121,11 @@ class Location(models.Model):
         address_info_missing = not self.city or not self.country
 
         if is_new or coordinates_changed or address_info_missing:
-            # Import the task here to avoid circular imports and ensure it's loaded after models
-            from ..tasks import geocode_location
+            # Import here to avoid circular imports and ensure it's loaded after models
+            from ..services.geocoding import enqueue_geocoding
 
-            geocode_location.delay(self.id)
+            # Queue for the batched, rate-limited geocoder once the row is committed
+            transaction.on_commit(lambda: enqueue_geocoding([self.id]))
 
     def __str__(self):
         """
@@ -123,6 +144,12 @@ class Location(models.Model):
         # Add indexes for commonly queried fields to improve performance
         indexes = [
             models.Index(fields=["latitude", "longitude"]),  # For spatial queries
+            # Prefix (LIKE 'abc%') lookups of the proximity search
+            models.Index(
+                fields=["geohash"],
+                name="location_geohash_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
             models.Index(fields=["city"]),
             models.Index(fields=["country"]),
         ]
@@ -1,25 +1,144 @@
-from django.core.cache import cache
+import datetime
+import math
+import zoneinfo
+from decimal import Decimal
+
+from django.conf import settings
 from django.db import models
-from django.db.models import Sum, Avg
+from django.db.models import (
+    Avg,
+    Case,
+    CharField,
+    Count,
+    DecimalField,
+    F,
+    FloatField,
+    Max,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import (
+    ASin,
+    Cast,
+    Coalesce,
+    Cos,
+    Least,
+    Now,
+    Power,
+    Radians,
+    Sin,
+    Sqrt,
+)
+from django.utils import timezone
 
+from core.utils.geo import (
+    EARTH_RADIUS_KM,
+    bounding_box,
+    geohash_cells_covering,
+    geohash_precision_for_radius,
+)
 from ..constants import BadgeLevel
 
 
 class JobSeekerProfileManager(models.Manager):
     def get_rating(self, job_seeker_id):
-        from accounts.constants import CacheKeys
+        """Return the stored average rating of a job seeker."""
+        rating = (
+            self.get_queryset()
+            .filter(id=job_seeker_id)
+            .values_list("rating", flat=True)
+            .first()
+        )
+        return rating or 0.0
 
-        cache_key = CacheKeys.JOB_SEEKER_RATING.build_key(job_seeker_id=job_seeker_id)
-        rating = cache.get(cache_key)
+    def apply_rating_delta(self, job_seeker_id, sum_delta, count_delta):
+        """
+        Atomically adjust the rating aggregates of a job seeker.
 
-        if rating is None:
-            rating = (
-                self.get_queryset()
-                .get(id=job_seeker_id)
-                .ratings.aggregate(Avg("rating"))["rating__avg"]
-                or 0.0
-            )
-            cache.set(cache_key, rating, timeout=None)  # Cache forever
+        The sum, count and average are recomputed by the database in a single
+        UPDATE, so concurrent ratings never overwrite each other. Call this
+        inside the transaction that writes the `Rating` row.
+
+        Args:
+            job_seeker_id (int): The rated job seeker
+            sum_delta (int): Change in the sum of ratings
+            count_delta (int): Change in the number of ratings (-1, 0 or 1)
+        """
+        new_sum = F("rating_sum") + sum_delta
+        new_count = F("rating_count") + count_delta
+        self.get_queryset().filter(id=job_seeker_id).update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=Case(
+                # Conditions see the pre-update row, so this means "no ratings left"
+                When(rating_count__lte=-count_delta, then=Value(0.0)),
+                default=Cast(new_sum, FloatField()) / Cast(new_count, FloatField()),
+                output_field=FloatField(),
+            ),
+            updated_at=Now(),
+        )
+
+    def recalculate_ratings(self, queryset=None):
+        """
+        Rebuild the rating aggregates from the `Rating` table.
+
+        Used to backfill existing rows or repair drift; returns the number of
+        profiles updated.
+        """
+        from .rating import Rating
+
+        ratings = (
+            Rating.objects.filter(job_seeker=OuterRef("pk"))
+            .order_by()
+            .values("job_seeker")
+        )
+        queryset = queryset if queryset is not None else self.get_queryset()
+        return queryset.update(
+            rating_sum=Coalesce(
+                Subquery(ratings.annotate(total=Sum("rating")).values("total")), 0
+            ),
+            rating_count=Coalesce(
+                Subquery(ratings.annotate(count=Count("id")).values("count")), 0
+            ),
+            rating=Coalesce(
+                Subquery(
+                    ratings.annotate(
+                        average=Avg("rating", output_field=FloatField())
+                    ).values("average")
+                ),
+                0.0,
+            ),
+            updated_at=Now(),
+        )
+
+    def top_matches(self, k=20, **criteria):
+        """
+        Return the best `k` job seekers for a job description.
+
+        Scoring runs against the in-memory matching index; see
+        `JobSeekerMatchingIndex.top_k` for the accepted criteria.
+
+        Returns:
+            list[tuple[JobSeekerProfile, float]]: Profiles with their score, best first
+        """
+        from ..services.matching import get_matching_index
+
+        ranked = get_matching_index().top_k(k=k, **criteria)
+        profiles = (
+            self.get_queryset()
+            .select_related("user")
+            .in_bulk([profile_id for profile_id, _ in ranked])
+        )
+        return [
+            (profiles[profile_id], score)
+            for profile_id, score in ranked
+            if profile_id in profiles
+        ]
 
 
 class SupporterProfileManager(models.Manager):
@@ -27,51 +146,307 @@ class SupporterProfileManager(models.Manager):
 
     @staticmethod
     def get_total_donations(supporter_profile):
-        """Calculates and caches the total donation amount for a supporter."""
-        from ..constants import CacheKeys
+        """Returns the stored total donation amount for a supporter."""
+        return supporter_profile.total_donations
+
+    @staticmethod
+    def get_donation_count(supporter_profile):
+        """Returns the stored number of donations for a supporter."""
+        return supporter_profile.donation_count
+
+    def apply_donation_delta(self, supporter_id, amount_delta, count_delta):
+        """
+        Atomically adjust the donation aggregates of a supporter.
 
-        cache_key = CacheKeys.TOTAL_DONATIONS.build_key(
-            supporter_profile_pk=supporter_profile.pk
+        Call this inside the transaction that writes the `Donation` row.
+
+        Args:
+            supporter_id (int): The supporter who made the donation
+            amount_delta (Decimal): Change in the total donated amount
+            count_delta (int): Change in the number of donations
+        """
+        self.get_queryset().filter(id=supporter_id).update(
+            total_donations=F("total_donations") + amount_delta,
+            donation_count=F("donation_count") + count_delta,
+            updated_at=Now(),
         )
-        total_donations = cache.get(cache_key)
-        if total_donations is None:
-            total_donations = (
-                supporter_profile.donations.aggregate(total=Sum("amount"))["total"]
-                or 0.00
-            )
-            cache.set(cache_key, total_donations, 60 * 60)  # Cache for 1 hour
-        return total_donations
 
     @staticmethod
-    def get_donation_count(supporter_profile):
-        """Calculates and caches the total number of donations for a supporter."""
-        from ..constants import CacheKeys
+    def _actual_donation_totals():
+        """Correlated subqueries aggregating a supporter's `Donation` rows."""
+        from .donation import Donation
 
-        cache_key = CacheKeys.DONATION_COUNT.build_key(
-            supporter_profile_pk=supporter_profile.pk
+        donations = (
+            Donation.objects.filter(supporter=OuterRef("pk"))
+            .order_by()
+            .values("supporter")
         )
-        donation_count = cache.get(cache_key)
-        if donation_count is None:
-            donation_count = supporter_profile.donations.count()
-            cache.set(cache_key, donation_count, 60 * 60)  # Cache for 1 hour
-        return donation_count
+        return {
+            "total_donations": Coalesce(
+                Subquery(donations.annotate(total=Sum("amount")).values("total")),
+                Value(Decimal("0")),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+            "donation_count": Coalesce(
+                Subquery(donations.annotate(count=Count("id")).values("count")),
+                Value(0),
+            ),
+        }
+
+    def donation_total_mismatches(self, queryset=None):
+        """
+        Supporters whose stored totals disagree with their donations, annotated
+        with `actual_total` and `actual_count`.
+        """
+        actual = self._actual_donation_totals()
+        queryset = queryset if queryset is not None else self.get_queryset()
+        return queryset.annotate(
+            actual_total=actual["total_donations"],
+            actual_count=actual["donation_count"],
+        ).exclude(total_donations=F("actual_total"), donation_count=F("actual_count"))
+
+    def recalculate_donation_totals(self, queryset=None):
+        """
+        Rebuild the donation aggregates from the `Donation` table in one UPDATE.
+        Returns the number of supporters updated.
+        """
+        queryset = queryset if queryset is not None else self.get_queryset()
+        return queryset.update(**self._actual_donation_totals(), updated_at=Now())
 
     def update_badge_level(self, supporter_profile):
         """Update badge level based on donation history and configurable thresholds."""
-        total_donations = self.get_total_donations(supporter_profile)
+        # The in-memory instance may predate the latest aggregate update
+        supporter_profile.refresh_from_db(fields=["total_donations", "donation_count"])
+        new_badge_level = BadgeLevel.for_amount(
+            self.get_total_donations(supporter_profile)
+        )
+
+        if supporter_profile.badge_level != new_badge_level:
+            supporter_profile.badge_level = new_badge_level
+            # A plain UPDATE rather than save() so the post_save badge signal
+            # does not fire again for the same change
+            self.get_queryset().filter(pk=supporter_profile.pk).update(
+                badge_level=new_badge_level, updated_at=Now()
+            )
 
-        # Sort badge levels by their threshold in descending order
-        sorted_badge_levels = sorted(
-            BadgeLevel, key=lambda badge: badge.threshold, reverse=True
+    @staticmethod
+    def badge_level_expression():
+        """SQL CASE mapping `total_donations` to the badge level it reaches."""
+        return Case(
+            *[
+                When(total_donations__gte=badge.threshold, then=Value(badge.value))
+                for badge in BadgeLevel.by_threshold()
+            ],
+            default=Value(BadgeLevel.BRONZE.value),
+            output_field=CharField(),
         )
 
-        new_badge_level = BadgeLevel.BRONZE  # Default to bronze
+    def recalculate_badge_levels(self, queryset=None, chunk_size=None):
+        """
+        Re-tier supporters from their stored donation totals with set-based UPDATEs.
 
-        for badge in sorted_badge_levels:
-            if total_donations >= badge.threshold:
-                new_badge_level = badge
-                break
+        Only rows whose badge actually changes are written. With `chunk_size`,
+        the primary key range is walked in windows of that size so each UPDATE
+        (and its row locks) stays short on very large tables.
 
-        if supporter_profile.badge_level != new_badge_level:
-            supporter_profile.badge_level = new_badge_level
-            supporter_profile.save()
+        Returns:
+            int: Number of supporters whose badge level changed
+        """
+        queryset = queryset if queryset is not None else self.get_queryset()
+        badge_level = self.badge_level_expression()
+        stale = queryset.exclude(badge_level=badge_level)
+
+        if not chunk_size:
+            return stale.update(badge_level=badge_level, updated_at=Now())
+
+        bounds = queryset.aggregate(first=Min("pk"), last=Max("pk"))
+        if bounds["first"] is None:
+            return 0
+
+        updated = 0
+        for start in range(bounds["first"], bounds["last"] + 1, chunk_size):
+            updated += stale.filter(pk__gte=start, pk__lt=start + chunk_size).update(
+                badge_level=badge_level, updated_at=Now()
+            )
+        return updated
+
+
+class DonationRollupManager(models.Manager):
+    """Read API for the pre-aggregated donation statistics."""
+
+    def series(self, period, start=None, end=None, country=None, badge_level=None):
+        """
+        Return one point per bucket in `[start, end]`, summed over the
+        country/badge groups that match the filters.
+
+        Every donor belongs to exactly one group of a bucket, so adding up
+        `donor_count` across groups stays a distinct count.
+
+        Returns:
+            list[dict]: `period_start`, `total_amount`, `donation_count`,
+            `donor_count` for each bucket, oldest first
+        """
+        queryset = self.get_queryset().filter(period=period)
+        if start is not None:
+            queryset = queryset.filter(period_start__gte=start)
+        if end is not None:
+            queryset = queryset.filter(period_start__lte=end)
+        if country is not None:
+            queryset = queryset.filter(country=country)
+        if badge_level is not None:
+            queryset = queryset.filter(badge_level=badge_level)
+
+        return list(
+            queryset.values("period_start")
+            .annotate(
+                total_amount=Sum("total_amount"),
+                donation_count=Sum("donation_count"),
+                donor_count=Sum("donor_count"),
+            )
+            .order_by("period_start")
+        )
+
+
+def haversine_expression(latitude, longitude, lat_field, lng_field):
+    """Great-circle distance in km from a point to a pair of fields, in SQL."""
+    lat1 = math.radians(latitude)
+    d_phi = Radians(lat_field) - Value(lat1)
+    d_lambda = Radians(lng_field) - Value(math.radians(longitude))
+    a = Power(Sin(d_phi / Value(2.0)), 2) + Value(math.cos(lat1)) * Cos(
+        Radians(lat_field)
+    ) * Power(Sin(d_lambda / Value(2.0)), 2)
+    return Value(2 * EARTH_RADIUS_KM) * ASin(
+        Least(Sqrt(a), Value(1.0), output_field=FloatField())
+    )
+
+
+def _minute_of_day(moment):
+    """Minute of day of a wall-clock datetime or time."""
+    return moment.hour * 60 + moment.minute
+
+
+def _is_instant(moment):
+    """Whether `moment` is a point in time (None for now, or an aware datetime)."""
+    return moment is None or (
+        isinstance(moment, datetime.datetime) and timezone.is_aware(moment)
+    )
+
+
+class WorkSpaceQuerySet(models.QuerySet):
+    # Above this many geohash cells, a coarser precision is used instead
+    MAX_PREFIX_CELLS = 16
+
+    def _available(self, prefix, moment, for_minutes):
+        """
+        Rows whose `[{prefix}_start_minute, {prefix}_end_minute)` interval
+        covers `for_minutes` from `moment`, either in today's occurrence or in
+        yesterday's one running past midnight. Pure range comparisons, so the
+        database can use the (start, end) index.
+
+        The stored minutes are each workspace's wall-clock time. A point in
+        time (now, or an aware datetime) is converted to the local minute of
+        every time zone in the queryset; a time or naive datetime is taken as
+        wall-clock time in each workspace's own zone.
+        """
+        if not _is_instant(moment):
+            return self.filter(
+                self._covering(prefix, _minute_of_day(moment), for_minutes)
+            )
+
+        moment = moment or timezone.now()
+        condition = Q()
+        zones = self.order_by().values_list("time_zone", flat=True).distinct()
+        for zone in zones:
+            local = moment.astimezone(zoneinfo.ZoneInfo(zone))
+            condition |= Q(time_zone=zone) & self._covering(
+                prefix, _minute_of_day(local), for_minutes
+            )
+        return self.filter(condition) if condition else self.none()
+
+    @staticmethod
+    def _covering(prefix, minute, for_minutes):
+        condition = Q()
+        for day_offset in (0, 24 * 60):
+            start = minute + day_offset
+            condition |= Q(
+                **{
+                    f"{prefix}_start_minute__lte": start,
+                    f"{prefix}_end_minute__gte": start + max(for_minutes, 1),
+                }
+            )
+        return condition
+
+    def open_at(self, moment=None, for_minutes=0):
+        """
+        Workspaces open at `moment` (a datetime or time, now by default) and,
+        if `for_minutes` is given, staying open for that long.
+        """
+        return self._available("open", moment, for_minutes)
+
+    def powered_at(self, moment=None, for_minutes=0):
+        """Workspaces with power at `moment` and for the next `for_minutes`."""
+        return self._available("power", moment, for_minutes)
+
+    def available_at(self, moment=None, for_minutes=0):
+        """Workspaces both open and powered at `moment` for `for_minutes`."""
+        return self.open_at(moment, for_minutes).powered_at(moment, for_minutes)
+
+    def within_radius(self, latitude, longitude, radius_km):
+        """
+        Workspaces whose location is within `radius_km` of a point, closest
+        first and annotated with `distance_km`.
+
+        Candidates are narrowed with indexed geohash prefixes and a bounding
+        box, and only those are ranked by exact haversine distance, so the
+        cost depends on the density around the point rather than on the total
+        number of workspaces.
+        """
+        min_lat, min_lng, max_lat, max_lng = bounding_box(
+            latitude, longitude, radius_km
+        )
+        precision = geohash_precision_for_radius(radius_km)
+        cells = geohash_cells_covering(min_lat, min_lng, max_lat, max_lng, precision)
+        while len(cells) > self.MAX_PREFIX_CELLS and precision > 1:
+            precision -= 1
+            cells = geohash_cells_covering(
+                min_lat, min_lng, max_lat, max_lng, precision
+            )
+
+        prefixes = Q()
+        for cell in cells:
+            prefixes |= Q(location__geohash__startswith=cell)
+        queryset = self.filter(prefixes, location__latitude__range=(min_lat, max_lat))
+        if -180.0 <= min_lng and max_lng <= 180.0:  # Box does not wrap around
+            queryset = queryset.filter(location__longitude__range=(min_lng, max_lng))
+
+        return (
+            queryset.annotate(
+                distance_km=haversine_expression(
+                    latitude,
+                    longitude,
+                    F("location__latitude"),
+                    F("location__longitude"),
+                )
+            )
+            .filter(distance_km__lte=radius_km)
+            .order_by("distance_km")
+        )
+
+    def nearest(self, latitude, longitude, k=10, max_radius_km=None):
+        """
+        Return the `k` closest workspaces, annotated with `distance_km`.
+
+        The search radius starts small and grows until `k` workspaces are
+        found or `max_radius_km` is reached; any workspace closer than the
+        k-th result is necessarily inside the radius, so the ranking is exact.
+
+        Returns:
+            list[WorkSpace]: Closest first, possibly fewer than `k`
+        """
+        max_radius_km = max_radius_km or settings.WORKSPACE_SEARCH_MAX_RADIUS_KM
+        radius_km = min(settings.WORKSPACE_SEARCH_INITIAL_RADIUS_KM, max_radius_km)
+        while True:
+            results = list(self.within_radius(latitude, longitude, radius_km)[:k])
+            if len(results) >= k or radius_km >= max_radius_km:
+                return results
+            radius_km = min(radius_km * 4, max_radius_km)
@@ -0,0 +1,58 @@
+from django.db import models
+
+
+class MediaBlob(models.Model):
+    """
+    A file of the content-addressed media storage, shared by every image
+    field holding the same content.
+
+    `ref_count` is the number of fields pointing at the blob; blobs nobody
+    references any more are deleted by `collect_unused_media_blobs`.
+    `renditions` is filled once the image has been rendered, so a new upload
+    of the same content reuses them without rendering again.
+    """
+
+    sha256 = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="SHA-256 of the blob's content.",
+    )
+    name = models.CharField(
+        max_length=255,
+        help_text="Name of the blob in the media storage.",
+    )
+    size = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Size of the blob in bytes.",
+    )
+    ref_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of image fields referencing this blob.",
+    )
+    renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Rendition metadata of the image, shared by every reference.",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Timestamp when the blob was first stored.",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Timestamp when the blob was last referenced or released.",
+    )
+
+    class Meta:
+        verbose_name = "Media Blob"
+        verbose_name_plural = "Media Blobs"
+        indexes = [
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(ref_count=0),
+                name="media_blob_unused_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
@@ -1,11 +1,15 @@
-from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from ..validators import validate_mobile_number, normalize_mobile_number
+from ..validators import (
+    format_phone_number,
+    normalize_mobile_number,
+    parse_phone_number,
+    validate_mobile_number,
+)
 
 User = get_user_model()
 
@@ -16,7 +20,8 @@ class MobileNumber(models.Model):
 
     This model handles:
     - Phone number validation with country information
-    - Verification status tracking
+    - Verification status tracking (pending codes live in Redis, see
+      `accounts.services.otp`; only the verified state is written here)
     - One mobile number per user (replaces when updated)
     - Country and carrier information extraction
     """
@@ -42,6 +47,18 @@ class MobileNumber(models.Model):
         help_text="Enter phone number with country code, e.g., +1 555 123 4567, +966 50 123 4567",
         unique=True,  # Ensure globally unique phone numbers
     )
+    international_number = models.CharField(
+        max_length=32,
+        blank=True,
+        editable=False,
+        help_text="Number in international format, stored on save, e.g., '+966 50 123 4567'",
+    )
+    national_number = models.CharField(
+        max_length=32,
+        blank=True,
+        editable=False,
+        help_text="Number in national format, stored on save, e.g., '050 123 4567'",
+    )
     country_code = models.CharField(
         max_length=5,
         blank=True,
@@ -80,12 +97,12 @@ class MobileNumber(models.Model):
     verification_code = models.CharField(
         max_length=6,
         blank=True,
-        help_text="Verification code sent to the user",
+        help_text="Unused: pending codes are kept in Redis",
     )
     verification_code_expires = models.DateTimeField(
         null=True,
         blank=True,
-        help_text="Expiration time for the verification code",
+        help_text="Unused: code expiry is the Redis key TTL",
     )
     verified_at = models.DateTimeField(
         null=True,
@@ -103,7 +120,7 @@ class MobileNumber(models.Model):
     last_code_generated_at = models.DateTimeField(
         null=True,
         blank=True,
-        help_text="Timestamp when the last verification code was generated",
+        help_text="Unused: the cooldown is a Redis lock",
     )
 
     class Meta:
@@ -178,6 +195,21 @@ class MobileNumber(models.Model):
                         )
                     )
 
+        # Store the display formats so listing numbers never re-parses them
+        if (
+            is_new
+            or self._original_number != self.number
+            or not self.international_number
+        ):
+            self._store_formats()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "international_number",
+                    "national_number",
+                }
+
         super().save(*args, **kwargs)
 
         # After saving, update the "original" state in memory to match the new state.
@@ -194,39 +226,31 @@ class MobileNumber(models.Model):
         return self
 
     def generate_verification_code(self):
-        """Generate a 6-digit verification code"""
-        import random
+        """
+        Generate a 6-digit verification code.
 
-        # Check for cooldown
-        if (
-            self.last_code_generated_at
-            and (timezone.now() - self.last_code_generated_at).total_seconds()
-            < settings.MOBILE_NUMBER_VERIFICATION_CODE_COOLDOWN_SECONDS
-        ):
+        The code, its expiry, the attempt counter and the cooldown live in
+        Redis (see `accounts.services.otp`), so no row is written here.
+        """
+        from ..services.otp import CooldownActive, otp_store
+
+        try:
+            return otp_store.issue(self.pk)
+        except CooldownActive as e:
             raise ValidationError(
-                _(
-                    f"Please wait {settings.MOBILE_NUMBER_VERIFICATION_CODE_COOLDOWN_SECONDS} seconds before generating a new code."
-                )
+                _(f"Please wait {e.retry_after} seconds before generating a new code.")
             )
 
-        self.verification_code = f"{random.randint(100000, 999999)}"
-        self.verification_code_expires = timezone.now() + timezone.timedelta(minutes=10)
-        self.verification_status = self.VerificationStatus.PENDING
-        self.last_code_generated_at = timezone.now()  # Update the timestamp
-        self.save()
-        return self.verification_code
-
     def verify_code(self, code):
-        """Verify the provided code"""
-        if not self.verification_code:
-            return False, "No verification code generated"
-
-        if self.is_verification_expired:
-            self.verification_status = self.VerificationStatus.EXPIRED
-            self.save()  # Saving the "expired" status is fine
-            return False, "Verification code has expired"
-
-        if self.verification_code != code:
+        """Verify the provided code; only a successful verification is saved."""
+        from ..services import otp
+
+        result = otp.otp_store.verify(self.pk, code)
+        if result == otp.MISSING:
+            return False, "No valid verification code, it may have expired"
+        if result == otp.LOCKED:
+            return False, "Too many attempts, please request a new code"
+        if result == otp.INVALID:
             return False, "Invalid verification code"
 
         # Set the "verifying" flag before saving.
@@ -237,11 +261,20 @@ class MobileNumber(models.Model):
             self.is_verified = True
             self.verification_status = self.VerificationStatus.VERIFIED
             self.verified_at = timezone.now()
-            self.verification_code = ""  # Clear code after successful verification
+            self.verification_code = ""
             self.verification_code_expires = None
 
             # Call save, which will now see the _verifying flag
-            self.save()
+            self.save(
+                update_fields=[
+                    "is_verified",
+                    "verification_status",
+                    "verified_at",
+                    "verification_code",
+                    "verification_code_expires",
+                    "updated_at",
+                ]
+            )
         finally:
             # Ensure the flag is removed after the save attempt
             if hasattr(self, "_verifying"):
@@ -265,33 +298,51 @@ class MobileNumber(models.Model):
 
     def _reset_verification(self):
         """Reset all verification fields when phone number changes"""
+        from ..services.otp import otp_store
+
+        # A code sent to the previous number must not verify the new one
+        if self.pk:
+            otp_store.discard(self.pk)
         self.is_verified = False
         self.verification_status = self.VerificationStatus.PENDING
         self.verification_code = ""
         self.verification_code_expires = None
         self.verified_at = None
 
+    def _store_formats(self):
+        """Store the international and national formats of the number"""
+        import phonenumbers
+
+        self.international_number = format_phone_number(
+            self.number, phonenumbers.PhoneNumberFormat.INTERNATIONAL
+        )
+        self.national_number = format_phone_number(
+            self.number, phonenumbers.PhoneNumberFormat.NATIONAL
+        )
+
     def _extract_phone_info(self):
         """Extract country and carrier information from phone number"""
         import phonenumbers
-        from phonenumbers import geocoder, carrier
+
+        from ..services.phone_metadata import get_phone_metadata
 
         try:
-            parsed_number = phonenumbers.parse(self.number, None)
+            parsed_number = parse_phone_number(self.number)
+            metadata = get_phone_metadata()
 
             # Extract country information
             self.country_code = f"+{parsed_number.country_code}"
             self.country_iso = phonenumbers.region_code_for_country_code(
                 parsed_number.country_code
             )
-            self.country_name = geocoder.country_name_for_number(parsed_number, "en")
+            self.country_name = metadata.country_name(parsed_number)
 
             # Extract carrier information
-            self.carrier_name = carrier.name_for_number(parsed_number, "en")
+            self.carrier_name = metadata.carrier_name(parsed_number)
 
             # Extract number type
             number_type = phonenumbers.number_type(parsed_number)
-            self.number_type = number_type.name if number_type else "UNKNOWN"
+            self.number_type = phonenumbers.PhoneNumberType.to_string(number_type)
 
         except (phonenumbers.NumberParseException, AttributeError, ImportError):
             # If extraction fails, keep the fields empty but log the specific error
@@ -300,40 +351,32 @@ class MobileNumber(models.Model):
     # Properties
     @property
     def is_verification_expired(self):
-        """Check if verification code has expired"""
-        if not self.verification_code_expires:
-            return False
-        return timezone.now() > self.verification_code_expires
+        """Check if there is no pending verification code (expired, used or never sent)"""
+        from ..services.otp import otp_store
+
+        return otp_store.remaining_seconds(self.pk) is None
 
     @property
     def formatted_number(self):
         """Return phone number in international format"""
         import phonenumbers
 
-        try:
-            parsed_number = phonenumbers.parse(self.number, None)
-            return phonenumbers.format_number(
-                parsed_number, phonenumbers.PhoneNumberFormat.INTERNATIONAL
-            )
-        except (phonenumbers.NumberParseException, ImportError):
-            return self.number
+        if self.international_number and self._original_number == self.number:
+            return self.international_number
+        return format_phone_number(
+            self.number, phonenumbers.PhoneNumberFormat.INTERNATIONAL
+        )
 
     @property
     def national_format(self):
         """Return phone number in national format"""
         import phonenumbers
 
-        try:
-            parsed_number = phonenumbers.parse(self.number, None)
-            return phonenumbers.format_number(
-                parsed_number, phonenumbers.PhoneNumberFormat.NATIONAL
-            )
-        except (phonenumbers.NumberParseException, ImportError):
-            return self.number
+        if self.national_number and self._original_number == self.number:
+            return self.national_number
+        return format_phone_number(self.number, phonenumbers.PhoneNumberFormat.NATIONAL)
 
     def __str__(self):
         status = "✓" if self.is_verified else "⏳"
         country = f" ({self.country_iso})" if self.country_iso else ""
         return f"{self.user.username} - {self.formatted_number}{country} {status}"
-
-
@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class Notification(models.Model):
+    """
+    In-app notification for a user.
+
+    This table is the durable store. The latest notifications and the unread
+    count of each user are also kept in Redis by
+    `accounts.services.notifications`, which is what the API reads.
+    """
+
+    class NotificationType(models.TextChoices):
+        """Notification type choices"""
+
+        INFO = "info", "Info"
+        SUCCESS = "success", "Success"
+        WARNING = "warning", "Warning"
+        ERROR = "error", "Error"
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="notifications",
+        help_text="The user this notification is for.",
+    )
+    notification_type = models.CharField(
+        max_length=20,
+        choices=NotificationType.choices,
+        default=NotificationType.INFO,
+        help_text="The type of the notification.",
+    )
+    message = models.TextField(
+        help_text="The notification text shown to the user.",
+    )
+    data = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Extra data for the client, e.g. the object to link to.",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Timestamp when the notification was created.",
+    )
+    read_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Timestamp when the user read the notification.",
+    )
+
+    class Meta:
+        verbose_name = "Notification"
+        verbose_name_plural = "Notifications"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at"]),
+            models.Index(
+                fields=["user"],
+                condition=models.Q(read_at__isnull=True),
+                name="notification_unread_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.message[:50]}"
@@ -1,5 +1,9 @@
-from core.tasks import process_image_task
+from django.db import models, transaction
+
+from core.tasks import render_image_renditions
 from core.utils.file_handling import unique_filename
+from core.utils.images import RENDITIONS_VERSION
+from core.utils.storage import media_blob_storage
 
 
 class BaseProfile(models.Model):
@@ -10,10 +14,17 @@ class BaseProfile(models.Model):
 
     photo = models.ImageField(
         upload_to=unique_filename,
+        storage=media_blob_storage,
         blank=True,
         null=True,
         help_text="Profile photo of the user.",
     )
+    photo_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Content hash and WebP/JPEG renditions of the photo.",
+    )
     location = models.CharField(
         max_length=200,
         blank=True,
@@ -48,13 +59,95 @@ class BaseProfile(models.Model):
         help_text="Timestamp when the profile was last updated.",
     )
 
+    # Image fields rendered into renditions, each with a `<name>_renditions` field
+    RENDITION_FIELDS = ("photo",)
+
+    # Aggregates kept up to date by atomic UPDATEs, which `save()` never
+    # writes: a profile loaded before the last update would overwrite it
+    AGGREGATE_FIELDS = ()
+
     class Meta:
         abstract = True
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._remember_image_names()
+
+    def _remember_image_names(self):
+        # Deferred fields are left out, so loading them is not forced here
+        deferred = self.get_deferred_fields()
+        self._original_image_names = {
+            field: getattr(self, field).name
+            for field in self.RENDITION_FIELDS
+            if field not in deferred
+        }
+
+    def _fields_without_aggregates(self, update_fields):
+        """The fields an update of this profile writes, aggregates left out."""
+        if update_fields is None:
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+            ]
+        return [name for name in update_fields if name not in self.AGGREGATE_FIELDS]
+
     def save(self, *args, **kwargs):
+        if (
+            self.AGGREGATE_FIELDS
+            and not self._state.adding
+            and not kwargs.get("force_insert")
+        ):
+            kwargs["update_fields"] = self._fields_without_aggregates(
+                kwargs.get("update_fields")
+            )
+
+        deferred = self.get_deferred_fields()
+        fields = [field for field in self.RENDITION_FIELDS if field not in deferred]
+        unknown = [f for f in fields if f not in self._original_image_names]
+        if unknown and self.pk is not None:
+            # Loaded after a deferred fetch: compare against the stored names
+            stored = type(self).objects.filter(pk=self.pk).values(*unknown).first()
+            self._original_image_names.update(stored or {})
+
         super().save(*args, **kwargs)
-        if self.photo:
-            process_image_task.delay(self.photo.path, (300, 300))
+        for field in fields:
+            name = getattr(self, field).name or ""
+            original = self._original_image_names.get(field) or ""
+            if name != original:
+                self._image_changed(field, original, name)
+        self._remember_image_names()
+
+    def _image_changed(self, field, original, name):
+        """
+        Move the blob reference of an image field, and get its renditions:
+        copied from the blob when that content was rendered before, rendered
+        once the upload is committed otherwise.
+        """
+        from accounts.services import media_blobs
+        from accounts.tasks import store_media_blob_renditions
+
+        if original:
+            media_blobs.release(original)
+        if not name:
+            return
+
+        blob = media_blobs.acquire(name)
+        if blob is not None and blob.renditions.get("version") == RENDITIONS_VERSION:
+            renditions = {**blob.renditions, "source": name}
+            setattr(self, f"{field}_renditions", renditions)
+            type(self).objects.filter(pk=self.pk).update(
+                **{f"{field}_renditions": renditions}
+            )
+            return
+
+        transaction.on_commit(
+            lambda: render_image_renditions.apply_async(
+                (self._meta.label, self.pk, field),
+                link=store_media_blob_renditions.s(),
+            )
+        )
 
     def __str__(self):
         return f"{self.user.get_full_name()} Profile"
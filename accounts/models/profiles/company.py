@@ -2,9 +2,9 @@ from django.contrib.auth import get_user_model
 from django.db import models
 
 from core.utils.file_handling import unique_filename
+from core.utils.storage import media_blob_storage
 from .base import BaseProfile
 from accounts.models.location import Location
-from core.tasks import process_image_task
 
 User = get_user_model()
 
@@ -36,10 +36,17 @@ class CompanyProfile(BaseProfile):
     )
     company_logo = models.ImageField(
         upload_to=unique_filename,
+        storage=media_blob_storage,
         blank=True,
         null=True,
         help_text="Logo of the company.",
     )
+    company_logo_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Content hash and WebP/JPEG renditions of the logo.",
+    )
     company_type = models.CharField(
         max_length=100,
         help_text="Type of company (e.g., marketing, programming).",
@@ -68,15 +75,11 @@ class CompanyProfile(BaseProfile):
         help_text="Official website URL of the company.",
     )
 
+    RENDITION_FIELDS = ("photo", "company_logo")
+
     class Meta:
         verbose_name = "Company Profile"
         verbose_name_plural = "Company Profiles"
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Handle company logo resizing separately if needed
-        if self.company_logo:
-            process_image_task.delay(self.company_logo.path, (400, 400))
-
     def __str__(self):
         return self.company_name
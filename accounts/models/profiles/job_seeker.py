@@ -68,11 +68,35 @@ class JobSeekerProfile(BaseProfile):
         help_text="The date when the weekly application count was last reset.",
     )
 
+    # Rating aggregates, maintained by `Rating.save` and the rating delete signal
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Sum of all ratings received by the job seeker.",
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of ratings received by the job seeker.",
+    )
+    rating = models.FloatField(
+        default=0.0,
+        editable=False,
+        help_text="Average rating of the job seeker, derived from the aggregates.",
+    )
+
+    AGGREGATE_FIELDS = ("rating_sum", "rating_count", "rating")
+
     objects = JobSeekerProfileManager()
 
     class Meta:
         verbose_name = "Job Seeker Profile"
         verbose_name_plural = "Job Seeker Profiles"
+        indexes = [
+            # Used by the matching index to pick up changed profiles
+            models.Index(fields=["updated_at"]),
+            models.Index(fields=["rating"]),
+        ]
 
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.specialization}"
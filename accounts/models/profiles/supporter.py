@@ -31,6 +31,22 @@ class SupporterProfile(BaseProfile):
         help_text="The badge level achieved by the supporter based on donations.",
     )
 
+    # Donation aggregates, maintained by `Donation.save` and the donation delete signal
+    total_donations = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Total amount donated by the supporter.",
+    )
+    donation_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of donations made by the supporter.",
+    )
+
+    AGGREGATE_FIELDS = ("total_donations", "donation_count")
+
     objects = SupporterProfileManager()  # Custom manager
 
     def __str__(self):
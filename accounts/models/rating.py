@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, transaction
 
 from .profiles import JobSeekerProfile
 
@@ -49,5 +49,43 @@ class Rating(models.Model):
             models.Index(fields=["job_seeker"]),
         ]
 
+    def __init__(self, *args, **kwargs):
+        """Store the original state so `save` can compute aggregate deltas."""
+        super().__init__(*args, **kwargs)
+        self._store_original_state()
+
+    def save(self, *args, **kwargs):
+        """
+        Save the rating and update the job seeker's rating aggregates in the
+        same transaction. Edits apply the difference to the previous value;
+        moving a rating to another job seeker transfers it between both.
+        """
+        is_new = self._state.adding
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            if is_new:
+                JobSeekerProfile.objects.apply_rating_delta(
+                    self.job_seeker_id, self.rating, 1
+                )
+            elif self.job_seeker_id != self._original_job_seeker_id:
+                JobSeekerProfile.objects.apply_rating_delta(
+                    self._original_job_seeker_id, -self._original_rating, -1
+                )
+                JobSeekerProfile.objects.apply_rating_delta(
+                    self.job_seeker_id, self.rating, 1
+                )
+            elif self.rating != self._original_rating:
+                JobSeekerProfile.objects.apply_rating_delta(
+                    self.job_seeker_id, self.rating - self._original_rating, 0
+                )
+
+        self._store_original_state()
+
+    def _store_original_state(self):
+        self._original_job_seeker_id = self.job_seeker_id
+        self._original_rating = self.rating
+
     def __str__(self):
         return f"Rating for {self.job_seeker.user.get_full_name()} by {self.rater.get_full_name()}"
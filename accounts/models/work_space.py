@@ -1,7 +1,54 @@
+from django.conf import settings
 from django.db import models
 
 from accounts.models.location import Location
-from accounts.validators import validate_mobile_number, normalize_mobile_number
+from accounts.models.managers import WorkSpaceQuerySet
+from accounts.validators import (
+    normalize_mobile_number,
+    validate_mobile_number,
+    validate_time_zone,
+)
+
+MINUTES_PER_DAY = 24 * 60
+
+AVAILABILITY_TIME_FIELDS = {
+    "opening_time",
+    "closing_time",
+    "power_start_time",
+    "power_end_time",
+}
+AVAILABILITY_MINUTE_FIELDS = [
+    "open_start_minute",
+    "open_end_minute",
+    "power_start_minute",
+    "power_end_minute",
+]
+
+
+def minute_interval(start, end):
+    """
+    Convert a daily `[start, end)` TimeField pair to minutes from midnight.
+
+    Intervals crossing midnight end past 1440 (22:00-02:00 is 1320-1560), and
+    an interval starting and ending at the same time means all day, stored as
+    two full days so that any window of up to 24h starting today fits in it.
+
+    Returns:
+        tuple: `(start_minute, end_minute)`, or `(None, None)` if a bound is unset
+    """
+    if start is None or end is None:
+        return None, None
+    start_minute = start.hour * 60 + start.minute
+    end_minute = end.hour * 60 + end.minute
+    if start_minute == end_minute:
+        return 0, 2 * MINUTES_PER_DAY
+    if end_minute < start_minute:
+        end_minute += MINUTES_PER_DAY
+    return start_minute, end_minute
+
+
+def default_time_zone():
+    return settings.WORKSPACE_DEFAULT_TIME_ZONE
 
 
 class WorkSpace(models.Model):
@@ -54,6 +101,13 @@ class WorkSpace(models.Model):
         help_text="Daily closing time of the coworking space.",
     )
 
+    time_zone = models.CharField(
+        max_length=64,
+        default=default_time_zone,
+        validators=[validate_time_zone],
+        help_text="Time zone of the opening and power times, e.g. 'Asia/Damascus'.",
+    )
+
     # New fields for power availability hours as requested by the user
     power_start_time = models.TimeField(
         blank=True,
@@ -66,6 +120,30 @@ class WorkSpace(models.Model):
         help_text="Specific time when power is no longer consistently available.",
     )
 
+    # Minute-of-day intervals derived from the TimeFields above on save, see
+    # `minute_interval`. They let "open/powered at T for N hours" be answered
+    # with plain indexed range comparisons, including across midnight.
+    open_start_minute = models.PositiveSmallIntegerField(
+        null=True,
+        editable=False,
+        help_text="Opening time in minutes from midnight.",
+    )
+    open_end_minute = models.PositiveSmallIntegerField(
+        null=True,
+        editable=False,
+        help_text="Closing time in minutes from the opening day's midnight.",
+    )
+    power_start_minute = models.PositiveSmallIntegerField(
+        null=True,
+        editable=False,
+        help_text="Power start time in minutes from midnight.",
+    )
+    power_end_minute = models.PositiveSmallIntegerField(
+        null=True,
+        editable=False,
+        help_text="Power end time in minutes from the start day's midnight.",
+    )
+
     created_at = models.DateTimeField(
         auto_now_add=True,
         help_text="Timestamp when the coworking space record was created.",
@@ -75,6 +153,8 @@ class WorkSpace(models.Model):
         help_text="Timestamp when the coworking space record was last updated.",
     )
 
+    objects = WorkSpaceQuerySet.as_manager()
+
     def __str__(self):
         """
         Returns a human-readable string representation of the coworking space.
@@ -91,6 +171,22 @@ class WorkSpace(models.Model):
         if self.contact_number:
             self.contact_number = normalize_mobile_number(self.contact_number)
 
+    def update_availability_minutes(self):
+        """Derive the minute intervals from the opening and power times."""
+        self.open_start_minute, self.open_end_minute = minute_interval(
+            self.opening_time, self.closing_time
+        )
+        self.power_start_minute, self.power_end_minute = minute_interval(
+            self.power_start_time, self.power_end_time
+        )
+
+    def save(self, *args, **kwargs):
+        self.update_availability_minutes()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and AVAILABILITY_TIME_FIELDS & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, *AVAILABILITY_MINUTE_FIELDS}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name_plural = "Coworking Spaces"
         indexes = [
@@ -98,4 +194,6 @@ class WorkSpace(models.Model):
             models.Index(fields=["has_fast_internet"]),
             models.Index(fields=["opening_time", "closing_time"]),
             models.Index(fields=["power_start_time", "power_end_time"]),
+            models.Index(fields=["open_start_minute", "open_end_minute"]),
+            models.Index(fields=["power_start_minute", "power_end_minute"]),
         ]
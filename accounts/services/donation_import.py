@@ -0,0 +1,260 @@
+"""
+Streaming import of donation batches received from payment partners.
+
+Files are read row by row and written in chunks with `bulk_create`, so memory
+stays bounded regardless of file size and no per-row signals fire. Each chunk
+is committed in its own transaction together with the matching supporter
+total increments, then added to the leaderboards; badge levels are
+recalculated once for all affected supporters when the file is done.
+
+Expected columns (CSV header or JSONL keys):
+    supporter_id  Primary key of the `SupporterProfile`
+    amount        Donation amount, e.g. "25.00"
+    timestamp     Optional ISO 8601 date/time; defaults to the import time
+"""
+
+import csv
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ..models import Donation, SupporterProfile
+from .donation_rollups import mark_days_dirty
+from .leaderboards import record_donations
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("csv", "jsonl")
+DEFAULT_CHUNK_SIZE = 5000
+
+# Keep the report small even when a whole file is rejected
+MAX_REPORTED_ERRORS = 1000
+
+MIN_AMOUNT = Decimal("0.01")
+# Donation.amount has max_digits=12 and decimal_places=2
+MAX_AMOUNT = Decimal("9999999999.99")
+CENT = Decimal("0.01")
+
+
+class DonationImportReport:
+    """Outcome and throughput of a donation import."""
+
+    def __init__(self):
+        self.rows_read = 0
+        self.created = 0
+        self.rejected = 0
+        self.errors = []  # (line number, reason) pairs, capped
+        self.affected_supporters = set()
+        self.badges_changed = 0
+        self._started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def reject(self, line_number, reason):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, reason))
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self._started
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            "rows_read": self.rows_read,
+            "created": self.created,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "affected_supporters": len(self.affected_supporters),
+            "badges_changed": self.badges_changed,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def detect_format(filename):
+    """Guess the file format from its extension."""
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    return "jsonl" if extension in ("jsonl", "ndjson") else "csv"
+
+
+def read_rows(stream, file_format):
+    """
+    Yield `(line_number, row, error)` for each record of a text stream.
+    `row` is a dict, or None when the line itself could not be decoded.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+    elif file_format == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(row, dict):
+                yield line_number, None, "Each line must be a JSON object"
+                continue
+            yield line_number, row, None
+    else:
+        raise ValueError(
+            f"Unsupported format '{file_format}', expected one of {SUPPORTED_FORMATS}"
+        )
+
+
+def parse_row(row, default_timestamp):
+    """
+    Validate a raw row and return `(supporter_id, amount, timestamp)`.
+
+    Raises:
+        ValueError: With a human-readable reason if the row is invalid
+    """
+    try:
+        supporter_id = int(str(row.get("supporter_id", "")).strip())
+    except ValueError:
+        raise ValueError("Missing or non-numeric supporter_id")
+
+    try:
+        amount = Decimal(str(row.get("amount", "")).strip())
+    except InvalidOperation:
+        raise ValueError("Missing or non-numeric amount")
+    if not amount.is_finite() or amount < MIN_AMOUNT or amount > MAX_AMOUNT:
+        raise ValueError(f"Amount must be between {MIN_AMOUNT} and {MAX_AMOUNT}")
+    if amount != amount.quantize(CENT):
+        raise ValueError("Amount has more than two decimal places")
+
+    raw_timestamp = str(row.get("timestamp") or "").strip()
+    if not raw_timestamp:
+        return supporter_id, amount, default_timestamp
+    try:
+        timestamp = parse_datetime(raw_timestamp)
+    except ValueError:
+        timestamp = None
+    if timestamp is None:
+        raise ValueError(f"Invalid timestamp '{raw_timestamp}'")
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return supporter_id, amount, timestamp
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _import_chunk(chunk, report, default_timestamp, dry_run):
+    parsed = []
+    for line_number, row, error in chunk:
+        if error:
+            report.reject(line_number, error)
+            continue
+        try:
+            parsed.append((line_number, *parse_row(row, default_timestamp)))
+        except ValueError as e:
+            report.reject(line_number, str(e))
+
+    # One query per chunk to validate every referenced supporter
+    known_supporters = SupporterProfile.objects.select_related("user").in_bulk(
+        {supporter_id for _, supporter_id, _, _ in parsed}
+    )
+
+    donations = []
+    totals = defaultdict(lambda: [Decimal("0"), 0])
+    for line_number, supporter_id, amount, timestamp in parsed:
+        if supporter_id not in known_supporters:
+            report.reject(line_number, f"Supporter {supporter_id} does not exist")
+            continue
+        supporter = known_supporters[supporter_id]
+        donations.append(
+            Donation(
+                supporter_id=supporter_id,
+                amount=amount,
+                timestamp=timestamp,
+                country=supporter.country,
+                badge_level=supporter.badge_level,
+            )
+        )
+        totals[supporter_id][0] += amount
+        totals[supporter_id][1] += 1
+
+    if donations and not dry_run:
+        with transaction.atomic():
+            Donation.objects.bulk_create(donations, batch_size=len(donations))
+            for supporter_id, (amount, count) in totals.items():
+                SupporterProfile.objects.apply_donation_delta(
+                    supporter_id, amount, count
+                )
+            # A chunk can commit after the rollups read past its ids
+            days = {timezone.localdate(donation.timestamp) for donation in donations}
+            transaction.on_commit(lambda: mark_days_dirty(days))
+        try:
+            record_donations(
+                (
+                    known_supporters[donation.supporter_id],
+                    donation.amount,
+                    donation.timestamp,
+                )
+                for donation in donations
+            )
+        except Exception:
+            logger.exception("Failed to update leaderboards for imported donations")
+
+    report.created += len(donations)
+    report.affected_supporters.update(totals)
+
+
+def import_donations(
+    stream, file_format="csv", chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False
+):
+    """
+    Import donations from a text stream.
+
+    Args:
+        stream: Text file object positioned at the start of the data
+        file_format (str): "csv" or "jsonl"
+        chunk_size (int): Rows validated and written per transaction
+        dry_run (bool): Validate only, without writing anything
+
+    Returns:
+        DonationImportReport: Counts, rejected rows and throughput
+    """
+    report = DonationImportReport()
+    default_timestamp = timezone.now()
+
+    for chunk in _chunks(read_rows(stream, file_format), chunk_size):
+        report.rows_read += len(chunk)
+        _import_chunk(chunk, report, default_timestamp, dry_run)
+        logger.info(
+            f"Donation import progress: {report.rows_read} rows read, "
+            f"{report.created} accepted, {report.rejected} rejected"
+        )
+
+    if report.affected_supporters and not dry_run:
+        supporter_ids = sorted(report.affected_supporters)
+        for batch in _chunks(supporter_ids, chunk_size):
+            report.badges_changed += SupporterProfile.objects.recalculate_badge_levels(
+                SupporterProfile.objects.filter(pk__in=batch)
+            )
+
+    report.finish()
+    logger.info(
+        f"Donation import finished: {report.created} created, "
+        f"{report.rejected} rejected in {report.elapsed:.2f}s "
+        f"({report.rows_per_second:.0f} rows/s)"
+    )
+    return report
@@ -0,0 +1,268 @@
+"""
+Incremental maintenance of the daily and monthly donation rollups.
+
+New donations are picked up by primary key from a `RollupWatermark`, so each
+run only reads rows it has not seen yet. Every calendar day touched by those
+rows is rebuilt from its (small) slice of the `Donation` table; monthly
+buckets are then summed from their day buckets, with distinct donors counted
+from `DonationRollupDonor`.
+
+Buckets are grouped by the country and badge level each donation was made
+with, snapshotted on the `Donation` row, never by the supporter's current
+ones: day amounts and monthly donor counts then agree after a supporter
+moves country or badge, and rebuilding a bucket never moves its history.
+
+Edits and deletes of already processed donations cannot be seen through the
+id watermark, so the donation signals mark their day dirty in Redis and the
+next run rebuilds it.
+
+Ids are handed out when a row is inserted but only become visible when its
+transaction commits, so a run can read past an id whose row is committed
+later. Each refresh therefore also re-scans the last `RESCAN_IDS` ids below
+the watermark; bulk imports, whose chunks can be larger than that, mark
+their days dirty as well.
+"""
+
+import datetime
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, DateField, F, Max, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from ..constants import CacheKeys
+from ..models import Donation, DonationRollup, DonationRollupDonor, RollupWatermark
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "donations"
+DEFAULT_BATCH_SIZE = 50000
+RESCAN_IDS = 1000
+
+
+def mark_days_dirty(days):
+    """Schedule the rollups of `days` (dates) for a rebuild on the next refresh."""
+    members = {day.isoformat() for day in days}
+    if members:
+        get_redis_connection("default").sadd(
+            CacheKeys.DONATION_ROLLUP_DIRTY_DAYS.value, *members
+        )
+
+
+def _pop_dirty_days():
+    connection = get_redis_connection("default")
+    days = set()
+    while members := connection.spop(CacheKeys.DONATION_ROLLUP_DIRTY_DAYS.value, 1000):
+        days.update(datetime.date.fromisoformat(member.decode()) for member in members)
+    return days
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return start, start + datetime.timedelta(days=1)
+
+
+def _next_month(month_start):
+    return (month_start.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def _month_bounds(month_start):
+    start = timezone.make_aware(
+        datetime.datetime.combine(month_start, datetime.time.min)
+    )
+    end = timezone.make_aware(
+        datetime.datetime.combine(_next_month(month_start), datetime.time.min)
+    )
+    return start, end
+
+
+def _by_group(queryset):
+    """Group donations by the country and badge level they were made with."""
+    return queryset.order_by().values(
+        group_country=F("country"), group_badge=F("badge_level")
+    )
+
+
+def _rebuild_day(day):
+    start, end = _day_bounds(day)
+    groups = _by_group(
+        Donation.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    ).annotate(
+        total=Sum("amount"),
+        count=Count("id"),
+        donors=Count("supporter", distinct=True),
+    )
+
+    DonationRollup.objects.filter(
+        period=DonationRollup.Period.DAY, period_start=day
+    ).delete()
+    DonationRollup.objects.bulk_create(
+        DonationRollup(
+            period=DonationRollup.Period.DAY,
+            period_start=day,
+            country=group["group_country"],
+            badge_level=group["group_badge"],
+            total_amount=group["total"],
+            donation_count=group["count"],
+            donor_count=group["donors"],
+        )
+        for group in groups
+    )
+
+
+def _add_month_donors(donations):
+    pairs = (
+        donations.order_by()
+        .annotate(month=TruncMonth("timestamp", output_field=DateField()))
+        .values_list("month", "supporter_id", "country", "badge_level")
+        .distinct()
+    )
+    DonationRollupDonor.objects.bulk_create(
+        (
+            DonationRollupDonor(
+                month_start=month,
+                supporter_id=supporter_id,
+                country=country,
+                badge_level=badge_level,
+            )
+            for month, supporter_id, country, badge_level in pairs.iterator(
+                chunk_size=5000
+            )
+        ),
+        batch_size=5000,
+        ignore_conflicts=True,
+    )
+
+
+def _rebuild_month_donors(month_start):
+    """Recompute the donor set of a month after edits or deletes."""
+    start, end = _month_bounds(month_start)
+    DonationRollupDonor.objects.filter(month_start=month_start).delete()
+    _add_month_donors(Donation.objects.filter(timestamp__gte=start, timestamp__lt=end))
+
+
+def _rebuild_month(month_start):
+    totals = (
+        DonationRollup.objects.filter(
+            period=DonationRollup.Period.DAY,
+            period_start__gte=month_start,
+            period_start__lt=_next_month(month_start),
+        )
+        .values("country", "badge_level")
+        .annotate(total=Sum("total_amount"), count=Sum("donation_count"))
+    )
+    donors = (
+        DonationRollupDonor.objects.filter(month_start=month_start)
+        .values("country", "badge_level")
+        .annotate(donors=Count("supporter"))
+    )
+
+    groups = defaultdict(lambda: {"total": 0, "count": 0, "donors": 0})
+    for row in totals:
+        group = groups[(row["country"], row["badge_level"])]
+        group["total"], group["count"] = row["total"], row["count"]
+    for row in donors:
+        groups[(row["country"], row["badge_level"])]["donors"] = row["donors"]
+
+    DonationRollup.objects.filter(
+        period=DonationRollup.Period.MONTH, period_start=month_start
+    ).delete()
+    DonationRollup.objects.bulk_create(
+        DonationRollup(
+            period=DonationRollup.Period.MONTH,
+            period_start=month_start,
+            country=country,
+            badge_level=badge_level,
+            total_amount=values["total"],
+            donation_count=values["count"],
+            donor_count=values["donors"],
+        )
+        for (country, badge_level), values in groups.items()
+    )
+
+
+def _days(donations):
+    return (
+        donations.order_by()
+        .annotate(day=TruncDate("timestamp"))
+        .values_list("day", flat=True)
+        .distinct()
+    )
+
+
+def _refresh_batch(batch_size, dirty_days, rescan=False):
+    """
+    Fold the next batch of new donations into the rollups, and with `rescan`
+    the donations committed late just below the watermark.
+    """
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+            name=WATERMARK_NAME
+        )
+        pending = Donation.objects.filter(id__gt=watermark.last_id)
+        boundary = list(
+            pending.order_by("id").values_list("id", flat=True)[
+                batch_size - 1 : batch_size
+            ]
+        )
+        upper = boundary[0] if boundary else pending.aggregate(last=Max("id"))["last"]
+
+        days = set(dirty_days)
+        new_donations = 0
+        if rescan:
+            late = Donation.objects.filter(
+                id__gt=watermark.last_id - RESCAN_IDS, id__lte=watermark.last_id
+            )
+            days.update(_days(late))
+            _add_month_donors(late)
+        if upper is not None:
+            batch = pending.filter(id__lte=upper)
+            new_donations = batch.count()
+            days.update(_days(batch))
+            _add_month_donors(batch)
+
+        for month_start in {day.replace(day=1) for day in dirty_days}:
+            _rebuild_month_donors(month_start)
+        for day in sorted(days):
+            _rebuild_day(day)
+        for month_start in sorted({day.replace(day=1) for day in days}):
+            _rebuild_month(month_start)
+
+        if upper is not None:
+            watermark.last_id = upper
+            watermark.save(update_fields=["last_id", "updated_at"])
+
+    return new_donations, len(days), upper is not None and bool(boundary)
+
+
+def refresh_donation_rollups(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Process every donation newer than the watermark, plus dirty days.
+
+    Returns:
+        dict: Number of new donations folded in and day buckets rebuilt
+    """
+    processed = rebuilt_days = 0
+    dirty_days = _pop_dirty_days()
+
+    try:
+        more = rescan = True
+        while more:
+            new_donations, days, more = _refresh_batch(batch_size, dirty_days, rescan)
+            processed += new_donations
+            rebuilt_days += days
+            dirty_days = set()
+            rescan = False
+    except Exception:
+        # Put the dirty days back so the next run does not lose them
+        mark_days_dirty(dirty_days)
+        raise
+
+    logger.info(
+        f"Donation rollups refreshed: {processed} new donations, "
+        f"{rebuilt_days} day buckets rebuilt"
+    )
+    return {"donations": processed, "days": rebuilt_days}
@@ -0,0 +1,214 @@
+"""
+Offline reverse geocoding from a local gazetteer.
+
+`build_gazetteer` turns a GeoNames-style dump (``cities1000.txt`` and, for
+readable names, ``countryInfo.txt`` and ``admin1CodesASCII.txt``) into a
+directory of plain ``.npy`` arrays. `Gazetteer` memory-maps them read-only, so
+every worker process shares the same pages, and indexes the city coordinates
+as points on the unit sphere in a KD-tree. A lookup is one tree query: no
+network, no database and no rate limit.
+
+Results are coarse (nearest populated place, its first-level division and
+country), which is what the address fields of most workspaces need.
+"""
+
+import csv
+import logging
+import math
+import threading
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from scipy.spatial import cKDTree
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Array name -> file inside the gazetteer directory
+FILES = {
+    "coordinates": "coordinates.npy",  # float64 (n, 2): latitude, longitude
+    "names": "names.npy",  # str (n,): place name
+    "country_index": "country_index.npy",  # int32 (n,): row in countries
+    "state_index": "state_index.npy",  # int32 (n,): row in states, -1 if unknown
+    "country_codes": "country_codes.npy",  # str (c,): ISO 3166-1 alpha-2
+    "countries": "countries.npy",  # str (c,): country name
+    "states": "states.npy",  # str (s,): first-level division name
+}
+
+# Column positions of the GeoNames dumps
+_CITY_NAME, _CITY_LAT, _CITY_LNG, _CITY_FEATURE_CLASS = 1, 4, 5, 6
+_CITY_COUNTRY, _CITY_ADMIN1, _CITY_POPULATION = 8, 10, 14
+
+
+def _unit_vectors(latitudes, longitudes):
+    latitudes = np.radians(np.asarray(latitudes, dtype=np.float64))
+    longitudes = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(latitudes)
+    return np.column_stack(
+        (cos_lat * np.cos(longitudes), cos_lat * np.sin(longitudes), np.sin(latitudes))
+    )
+
+
+def _chord_for_km(distance_km):
+    return 2 * math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def _km_for_chord(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+
+
+def _read_tsv(path):
+    """Yield the rows of a GeoNames file, skipping comments."""
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if row and not row[0].startswith("#"):
+                yield row
+
+
+# ──────────────────────────────── Build ──────────────────────────────────
+def build_gazetteer(
+    cities_path, output_dir, countries_path=None, admin1_path=None, min_population=0
+):
+    """
+    Convert GeoNames dumps into the array directory read by `Gazetteer`.
+
+    Args:
+        cities_path: ``citiesNNNN.txt`` (or any dump with the same columns)
+        output_dir: Directory to write the arrays to (created if needed)
+        countries_path: Optional ``countryInfo.txt`` for country names;
+            ISO codes are used without it
+        admin1_path: Optional ``admin1CodesASCII.txt`` for state names
+        min_population (int): Skip smaller places
+
+    Returns:
+        int: Number of places written
+    """
+    country_names = {}
+    if countries_path:
+        country_names = {row[0]: row[4] for row in _read_tsv(countries_path)}
+    admin1_names = {}
+    if admin1_path:
+        admin1_names = {row[0]: row[1] for row in _read_tsv(admin1_path)}
+
+    coordinates, names, country_index, state_index = [], [], [], []
+    countries, states = {}, {}
+    for row in _read_tsv(cities_path):
+        if row[_CITY_FEATURE_CLASS] != "P":  # Populated places only
+            continue
+        if int(row[_CITY_POPULATION] or 0) < min_population:
+            continue
+
+        code = row[_CITY_COUNTRY]
+        admin1 = admin1_names.get(f"{code}.{row[_CITY_ADMIN1]}")
+        coordinates.append((float(row[_CITY_LAT]), float(row[_CITY_LNG])))
+        names.append(row[_CITY_NAME])
+        country_index.append(countries.setdefault(code, len(countries)))
+        state_index.append(states.setdefault(admin1, len(states)) if admin1 else -1)
+
+    arrays = {
+        "coordinates": np.array(coordinates, dtype=np.float64).reshape(-1, 2),
+        "names": np.array(names, dtype=str),
+        "country_index": np.array(country_index, dtype=np.int32),
+        "state_index": np.array(state_index, dtype=np.int32),
+        "country_codes": np.array(list(countries), dtype=str),
+        "countries": np.array(
+            [country_names.get(code, code) for code in countries], dtype=str
+        ),
+        "states": np.array(list(states), dtype=str),
+    }
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(output_dir / FILES[name], array, allow_pickle=False)
+
+    logger.info(f"Gazetteer built in {output_dir}: {len(names)} places")
+    return len(names)
+
+
+# ──────────────────────────────── Lookups ────────────────────────────────
+class Gazetteer:
+    """Nearest-place lookups over a directory written by `build_gazetteer`."""
+
+    def __init__(self, path):
+        path = Path(path)
+        missing = [f for f in FILES.values() if not (path / f).exists()]
+        if missing:
+            raise FileNotFoundError(
+                f"Gazetteer at {path} is incomplete, missing: {', '.join(missing)}"
+            )
+
+        for name, file_name in FILES.items():
+            setattr(self, name, np.load(path / file_name, mmap_mode="r"))
+
+        coordinates = self.coordinates
+        self._tree = cKDTree(_unit_vectors(coordinates[:, 0], coordinates[:, 1]))
+        logger.info(f"Gazetteer loaded from {path}: {len(self.names)} places")
+
+    def __len__(self):
+        return len(self.names)
+
+    def nearest(self, latitude, longitude, max_distance_km=None):
+        """
+        Return the place closest to a coordinate.
+
+        Returns:
+            dict | None: ``name``, ``state``, ``country``, ``country_code`` and
+            ``distance_km``, or None if nothing is within `max_distance_km`
+        """
+        if not len(self):
+            return None
+
+        upper_bound = (
+            _chord_for_km(max_distance_km) if max_distance_km is not None else np.inf
+        )
+        chord, index = self._tree.query(
+            _unit_vectors([latitude], [longitude])[0], distance_upper_bound=upper_bound
+        )
+        if index >= len(self):  # cKDTree's "no neighbour" marker
+            return None
+
+        state = int(self.state_index[index])
+        country = int(self.country_index[index])
+        return {
+            "name": str(self.names[index]),
+            "state": str(self.states[state]) if state >= 0 else None,
+            "country": str(self.countries[country]),
+            "country_code": str(self.country_codes[country]),
+            "distance_km": _km_for_chord(chord),
+        }
+
+    def reverse(self, latitude, longitude, max_distance_km=None):
+        """
+        Reverse-geocode a coordinate into Nominatim-style address components.
+
+        Returns:
+            dict: ``city``, ``state``, ``country`` and ``country_code``, or an
+            empty dict if no place is within `max_distance_km`
+        """
+        place = self.nearest(latitude, longitude, max_distance_km)
+        if place is None:
+            return {}
+        address = {
+            "city": place["name"],
+            "country": place["country"],
+            "country_code": place["country_code"].lower(),
+        }
+        if place["state"]:
+            address["state"] = place["state"]
+        return address
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """Return the process-wide gazetteer, loading it on first use."""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            _gazetteer = Gazetteer(settings.GEOCODING_GAZETTEER_PATH)
+    return _gazetteer
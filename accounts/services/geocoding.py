@@ -0,0 +1,406 @@
+"""
+Reverse-geocoding helpers shared by the geocoding tasks.
+
+`GeocodeCache` keys results on the geohash of the coordinates, so nearby
+points (most workspaces and headquarters cluster in a few cities) reuse one
+provider lookup. Lookups go Redis first, then the `GeocodeCacheEntry` table,
+and only then to the network; every outcome is counted for hit-rate metrics.
+A cell spans whole streets, so only its area components (city, state,
+country) are cached: the street, house number and postcode are only applied
+to the exact coordinate the provider was asked about.
+
+Locations are not geocoded one task each. Their ids are coalesced in a Redis
+set and drained in batches by `process_geocoding_queue`. Each batch resolves
+every geohash cell once, and calls to the provider share one token bucket
+across all workers.
+
+The providers themselves are pluggable: `GEOCODING_BACKENDS` lists them in
+order of preference, e.g. ``["gazetteer", "nominatim"]`` to answer from the
+offline gazetteer and only go to Nominatim for places it does not cover.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from django_redis import get_redis_connection
+from geopy.geocoders import Nominatim
+
+from core.utils.geo import geohash_encode
+from core.utils.rate_limit import TokenBucket
+from ..constants import CacheKeys
+from ..models import GeocodeCacheEntry
+from ..models.location import Location
+from .map_clusters import invalidate_points
+
+logger = logging.getLogger(__name__)
+
+LOCATION_ADDRESS_FIELDS = [
+    "address_line1",
+    "city",
+    "state_province",
+    "postal_code",
+    "country",
+]
+
+
+# Address components shared by every point of a geohash cell
+AREA_COMPONENTS = ("city", "town", "village", "state", "country")
+
+
+def area_of(address):
+    """The area components of an address, without street-level details."""
+    return {key: address[key] for key in AREA_COMPONENTS if key in address}
+
+
+def apply_address(location, address):
+    """Copy geocoder address components onto a `Location` (without saving)."""
+    # Use .get() with a default of None to prevent KeyError if a key is missing.
+    location.address_line1 = address.get("road", "") + (
+        f" {address.get('house_number')}" if address.get("house_number") else ""
+    )
+    location.city = address.get("city") or address.get("town") or address.get("village")
+    location.state_province = address.get("state")
+    location.postal_code = address.get("postcode")
+    location.country = address.get("country")
+
+
+class GeocodeCache:
+    """Two-level (Redis, then Postgres) cache of reverse-geocoding results."""
+
+    OUTCOMES = ("redis_hit", "database_hit", "miss")
+
+    def __init__(self, precision=None, timeout=None):
+        self.precision = precision or settings.GEOCODE_CACHE_PRECISION
+        self.timeout = timeout or settings.GEOCODE_CACHE_TTL_SECONDS
+
+    def cell(self, latitude, longitude):
+        return geohash_encode(latitude, longitude, self.precision)
+
+    def _redis_key(self, geohash):
+        return CacheKeys.GEOCODE_RESULT.build_key(geohash=geohash)
+
+    def _record(self, outcome):
+        key = CacheKeys.GEOCODE_METRIC.build_key(outcome=outcome)
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+    def get(self, latitude, longitude):
+        """
+        Return the cached address for a coordinate.
+
+        Returns:
+            dict | None: The address components (an empty dict when the
+            provider is known to have nothing there), or None on a miss
+        """
+        geohash = self.cell(latitude, longitude)
+
+        address = cache.get(self._redis_key(geohash))
+        if address is not None:
+            self._record("redis_hit")
+            return area_of(address)
+
+        entry = GeocodeCacheEntry.objects.filter(geohash=geohash).first()
+        if entry is not None:
+            address = area_of(entry.address)
+            cache.set(self._redis_key(geohash), address, self.timeout)
+            self._record("database_hit")
+            return address
+
+        self._record("miss")
+        return None
+
+    def set(self, latitude, longitude, address):
+        """Store the area components of a provider result in both tiers."""
+        geohash = self.cell(latitude, longitude)
+        address = area_of(address or {})
+        GeocodeCacheEntry.objects.update_or_create(
+            geohash=geohash, defaults={"address": address}
+        )
+        cache.set(self._redis_key(geohash), address, self.timeout)
+
+    def stats(self):
+        """Return the outcome counters and the overall hit rate."""
+        counts = cache.get_many(
+            [CacheKeys.GEOCODE_METRIC.build_key(outcome=o) for o in self.OUTCOMES]
+        )
+        stats = {
+            outcome: counts.get(CacheKeys.GEOCODE_METRIC.build_key(outcome=outcome), 0)
+            for outcome in self.OUTCOMES
+        }
+        lookups = sum(stats.values())
+        stats["hit_rate"] = (
+            (stats["redis_hit"] + stats["database_hit"]) / lookups if lookups else 0.0
+        )
+        return stats
+
+
+geocode_cache = GeocodeCache()
+
+
+class GeocodingRateLimited(Exception):
+    """The shared provider rate limit has no token available right now."""
+
+    def __init__(self, wait):
+        super().__init__(f"Geocoding rate limit reached, retry in {wait:.1f}s")
+        self.wait = wait
+
+
+_geolocator = None
+_geolocator_lock = threading.Lock()
+_rate_limit = None
+
+
+def get_geolocator():
+    """Return the process-wide Nominatim client."""
+    global _geolocator
+    with _geolocator_lock:
+        if _geolocator is None:
+            _geolocator = Nominatim(user_agent=settings.GEOCODING_USER_AGENT)
+    return _geolocator
+
+
+def get_rate_limit():
+    global _rate_limit
+    if _rate_limit is None:
+        _rate_limit = TokenBucket(
+            CacheKeys.GEOCODING_RATE_LIMIT.value,
+            rate=settings.GEOCODING_RATE_PER_SECOND,
+            capacity=settings.GEOCODING_BURST,
+        )
+    return _rate_limit
+
+
+class NominatimBackend:
+    """OpenStreetMap's Nominatim, throttled by the shared token bucket."""
+
+    name = "nominatim"
+    cacheable = True
+
+    def reverse(self, latitude, longitude, max_wait=0):
+        wait = get_rate_limit().acquire()
+        while wait:
+            if wait > max_wait:
+                raise GeocodingRateLimited(wait)
+            time.sleep(wait)
+            max_wait -= wait
+            wait = get_rate_limit().acquire()
+
+        # Set a timeout for the geocoding request to prevent hanging
+        location_data = get_geolocator().reverse(
+            (latitude, longitude),
+            language="en",
+            exactly_one=True,  # Get the most relevant single result
+            timeout=10,
+        )
+        return location_data.raw.get("address", {}) if location_data else {}
+
+
+class GazetteerBackend:
+    """Nearest place from the local gazetteer, without any network call."""
+
+    name = "gazetteer"
+    # A local lookup is cheaper than a cache round trip, and its coarse
+    # results must not shadow detailed ones from another backend
+    cacheable = False
+
+    def reverse(self, latitude, longitude, max_wait=0):
+        from .gazetteer import get_gazetteer
+
+        return get_gazetteer().reverse(
+            latitude, longitude, settings.GEOCODING_GAZETTEER_MAX_DISTANCE_KM
+        )
+
+
+GEOCODING_BACKENDS = {
+    backend.name: backend for backend in (NominatimBackend, GazetteerBackend)
+}
+
+_backends = None
+
+
+def get_backends():
+    """Instantiate the backends listed in `GEOCODING_BACKENDS`, in order."""
+    global _backends
+    if _backends is None:
+        try:
+            _backends = [
+                GEOCODING_BACKENDS[name]() for name in settings.GEOCODING_BACKENDS
+            ]
+        except KeyError as e:
+            raise ImproperlyConfigured(
+                f"Unknown geocoding backend {e}, "
+                f"choose from: {', '.join(GEOCODING_BACKENDS)}"
+            )
+    return _backends
+
+
+def resolve_address(latitude, longitude, max_wait=0):
+    """
+    Return the address of a coordinate from the configured backends.
+
+    Backends are tried in order until one knows the place. Results of
+    network backends go through the geocode cache, so a cache hit only has
+    the area components of the address. A backend error falls
+    through to the next backend; it is only raised if no later backend has
+    an answer. Hitting the rate limit is not an error: it is raised right
+    away, so callers wait for a token rather than settle for a coarser backend.
+
+    Args:
+        latitude (float): Latitude to resolve
+        longitude (float): Longitude to resolve
+        max_wait (float): Seconds this call may sleep for a rate-limit token
+
+    Returns:
+        dict: Address components, empty if no backend knows the place
+
+    Raises:
+        GeocodingRateLimited: If no token is available within `max_wait`
+        Exception: The last backend error (network issues, API limits,
+            missing gazetteer) when no backend could answer
+    """
+    error = None
+    for backend in get_backends():
+        try:
+            if not backend.cacheable:
+                address = backend.reverse(latitude, longitude, max_wait=max_wait)
+            else:
+                address = geocode_cache.get(latitude, longitude)
+                if address is None:
+                    address = backend.reverse(latitude, longitude, max_wait=max_wait)
+                    # Empty results are cached too, so the cell is not queried again
+                    geocode_cache.set(latitude, longitude, address)
+        except GeocodingRateLimited:
+            raise
+        except Exception as e:
+            logger.warning(f"Geocoding backend {backend.name} failed: {e}")
+            error = e
+            continue
+
+        if address:
+            return address
+
+    if error is not None:
+        raise error
+    return {}
+
+
+# ──────────────────────────────── Batch queue ────────────────────────────────
+def enqueue_geocoding(location_ids):
+    """
+    Add locations to the pending set and make sure a batch run is scheduled.
+    Ids already pending are coalesced by the set.
+    """
+    location_ids = list(location_ids)
+    if not location_ids:
+        return
+
+    connection = get_redis_connection("default")
+    connection.sadd(CacheKeys.GEOCODING_PENDING.value, *location_ids)
+    _schedule_batch(connection, settings.GEOCODING_BATCH_DELAY_SECONDS)
+
+
+def _schedule_batch(connection, countdown):
+    from ..tasks import process_geocoding_queue
+
+    # Only one run is scheduled at a time; the flag outlives the countdown a bit
+    if connection.set(
+        CacheKeys.GEOCODING_SCHEDULED.value, 1, nx=True, ex=int(countdown) + 60
+    ):
+        process_geocoding_queue.apply_async(countdown=countdown)
+
+
+def _requeue(connection, location_ids, countdown):
+    if location_ids:
+        connection.sadd(CacheKeys.GEOCODING_PENDING.value, *location_ids)
+    _schedule_batch(connection, countdown)
+
+
+def process_geocoding_batch(batch_size=None, max_wait=5):
+    """
+    Geocode up to `batch_size` pending locations.
+
+    Locations are grouped by geohash cell, so duplicated and nearby
+    coordinates cost a single cache lookup or provider call. Nearby points
+    only get the area components of the cell's address. When the rate
+    limit or a provider error stops the batch, the unprocessed ids go back
+    to the pending set and a retry is scheduled.
+
+    Returns:
+        dict: Number of locations updated and requeued
+    """
+    connection = get_redis_connection("default")
+    connection.delete(CacheKeys.GEOCODING_SCHEDULED.value)
+
+    popped = connection.spop(
+        CacheKeys.GEOCODING_PENDING.value, batch_size or settings.GEOCODING_BATCH_SIZE
+    )
+    location_ids = [int(location_id) for location_id in popped or []]
+    locations = Location.objects.in_bulk(location_ids)
+
+    cells = defaultdict(list)
+    for location in locations.values():
+        if location.latitude is not None and location.longitude is not None:
+            cells[geocode_cache.cell(location.latitude, location.longitude)].append(
+                location
+            )
+
+    updated = []
+    requeued = []
+    retry_in = 0
+    pending_cells = list(cells.values())
+    for index, group in enumerate(pending_cells):
+        try:
+            address = resolve_address(
+                group[0].latitude, group[0].longitude, max_wait=max_wait
+            )
+        except GeocodingRateLimited as e:
+            retry_in = e.wait
+        except Exception:
+            logger.exception(
+                f"Geocoding service error for Locations {[loc.id for loc in group]}"
+            )
+            retry_in = 300  # Give the provider some rest before the next attempt
+        else:
+            if address:
+                now = timezone.now()
+                resolved = (group[0].latitude, group[0].longitude)
+                for location in group:
+                    exact = (location.latitude, location.longitude) == resolved
+                    apply_address(location, address if exact else area_of(address))
+                    location.updated_at = now
+                updated.extend(group)
+            continue
+
+        requeued = [
+            location.id for remaining in pending_cells[index:] for location in remaining
+        ]
+        break
+
+    if updated:
+        with transaction.atomic():
+            # bulk_update bypasses Location.save, so this does not re-enqueue them
+            Location.objects.bulk_update(
+                updated, LOCATION_ADDRESS_FIELDS + ["updated_at"], batch_size=500
+            )
+        # Nor does it send the signals, so refresh the map tiles showing them
+        invalidate_points(
+            (location.latitude, location.longitude) for location in updated
+        )
+
+    if requeued:
+        _requeue(connection, requeued, retry_in)
+    elif connection.scard(CacheKeys.GEOCODING_PENDING.value):
+        _schedule_batch(connection, 0)
+
+    logger.info(
+        f"Geocoding batch: {len(location_ids)} locations in {len(cells)} cells, "
+        f"{len(updated)} updated, {len(requeued)} requeued"
+    )
+    return {"updated": len(updated), "requeued": len(requeued)}
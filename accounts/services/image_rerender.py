@@ -0,0 +1,199 @@
+"""
+Bulk re-rendering of every profile image, e.g. after the rendition sizes in
+`core.utils.images` changed.
+
+Image fields are read with server-side cursors, in primary key order, and
+rendered by a process pool instead of the `media` Celery queue, which keeps
+serving new uploads. Workers only decode and encode; this process writes the
+results, one transaction per chunk, and then records the last primary key
+done per field in a JSON checkpoint, so an interrupted run resumes where it
+stopped. Images that failed to render are kept in the checkpoint too, and
+tried again by the next run until they render. Each chunk gets a fresh pool, so whatever memory decoding leaves
+behind in a worker is returned with it instead of growing over a long run.
+
+Images already rendered at the current `RENDITIONS_VERSION` only cost a
+hashing pass, so resuming without a checkpoint is slower but still correct.
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from PIL import Image
+
+from core.utils.images import RENDITIONS_VERSION, render_renditions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 200
+
+RENDERED = "rendered"
+MISSING = "missing"  # The file is gone or is not an image
+FAILED = "failed"
+
+
+def image_fields():
+    """`(model label, field name)` of every profile image field."""
+    from ..models import BaseProfile
+
+    return [
+        (model._meta.label, field)
+        for model in apps.get_app_config("accounts").get_models()
+        if issubclass(model, BaseProfile)
+        for field in model.RENDITION_FIELDS
+    ]
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _render(model_label, field, name, previous):
+    """Worker: render one image, returning `(status, metadata or error)`."""
+    storage = apps.get_model(model_label)._meta.get_field(field).storage
+    try:
+        metadata = render_renditions(
+            storage, name, previous=previous, target=default_storage
+        )
+    except (FileNotFoundError, Image.UnidentifiedImageError) as e:
+        return MISSING, str(e)
+    except Exception as e:
+        return FAILED, f"{type(e).__name__}: {e}"
+    return RENDERED, metadata
+
+
+class Checkpoint:
+    """
+    Last primary key done per image field, and the primary keys up to it
+    that failed to render, in a JSON file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.positions = {}
+        self.failures = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            # Sizes changed since: every image needs rendering again
+            if state.get("version") == RENDITIONS_VERSION:
+                self.positions = state["positions"]
+                self.failures = state.get("failures", {})
+
+    def position(self, model_label, field):
+        return self.positions.get(f"{model_label}.{field}", 0)
+
+    def failed(self, model_label, field):
+        return self.failures.get(f"{model_label}.{field}", [])
+
+    def advance(self, model_label, field, pk, failed=()):
+        """Record that every row up to `pk` is done but the `failed` ones."""
+        key = f"{model_label}.{field}"
+        self.positions[key] = max(self.positions.get(key, 0), pk)
+        self.failures[key] = sorted(failed)
+        if not self.path:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": RENDITIONS_VERSION,
+                    "positions": self.positions,
+                    "failures": self.failures,
+                },
+                f,
+            )
+        os.replace(temp_path, self.path)
+
+
+def _store(model, field, results):
+    """Record the renditions of a chunk, unless the image was replaced since."""
+    from .media_blobs import store_renditions
+
+    with transaction.atomic():
+        for pk, name, status, metadata in results:
+            if status != RENDERED:
+                continue
+            model.objects.filter(pk=pk, **{field: name}).update(
+                **{f"{field}_renditions": metadata}
+            )
+            store_renditions(metadata)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def rerender_images(checkpoint_path=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Render every profile image again.
+
+    Args:
+        checkpoint_path (str, optional): JSON file to resume from and update
+        workers (int, optional): Worker processes; defaults to the CPU count
+        chunk_size (int): Rows fetched per cursor round trip, rendered by one
+            pool and stored per transaction
+
+    Yields:
+        tuple: `(model label, field, pk, status, error)` per image, in
+        primary key order for each field
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    workers = workers or os.cpu_count() or 1
+
+    for model_label, field in image_fields():
+        model = apps.get_model(model_label)
+        # Failures since deleted or cleared are dropped with the next advance
+        failed = set(
+            model.objects.filter(
+                pk__in=checkpoint.failed(model_label, field),
+                **{f"{field}__isnull": False},
+            )
+            .exclude(**{field: ""})
+            .values_list("pk", flat=True)
+        )
+        rows = (
+            model.objects.filter(
+                Q(pk__gt=checkpoint.position(model_label, field)) | Q(pk__in=failed),
+                **{f"{field}__isnull": False},
+            )
+            .exclude(**{field: ""})
+            .order_by("pk")
+            .values_list("pk", field, f"{field}_renditions")
+            .iterator(chunk_size=chunk_size)
+        )
+        for chunk in _chunks(rows, chunk_size):
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(chunk)), initializer=_init_worker
+            ) as pool:
+                futures = [
+                    (pk, name, pool.submit(_render, model_label, field, name, previous))
+                    for pk, name, previous in chunk
+                ]
+                results = []
+                for pk, name, future in futures:
+                    status, outcome = future.result()
+                    results.append((pk, name, status, outcome))
+                    if status == FAILED:
+                        failed.add(pk)
+                    else:
+                        failed.discard(pk)
+                    error = "" if status == RENDERED else outcome
+                    if error:
+                        logger.warning(
+                            f"Cannot render {model_label} {pk} {field}: {error}"
+                        )
+                    yield model_label, field, pk, status, error
+
+            _store(model, field, results)
+            checkpoint.advance(model_label, field, chunk[-1][0], failed)
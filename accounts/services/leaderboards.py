@@ -0,0 +1,354 @@
+"""
+Leaderboards backed by Redis sorted sets.
+
+Two boards are maintained:
+
+- "donors": supporters ranked by donated amount, globally, per country and
+  per day/week/month window (window boards expire on their own).
+- "freelancers": job seekers ranked by average rating, once they have at
+  least `LEADERBOARD_MIN_RATINGS` ratings.
+
+Donation and rating writes update the sorted sets incrementally after their
+transaction commits: an edited donation is taken off the boards of its
+previous supporter and time, and put on those of its current ones, and a
+supporter changing country carries their total to the new country board.
+Display names are kept in a Redis hash, refreshed when a user is renamed.
+Reads therefore cost one ZREVRANGE plus one HMGET and never touch Postgres.
+`rebuild_leaderboards` recreates everything from the database, nightly and on
+demand.
+"""
+
+import datetime
+import logging
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from ..constants import CacheKeys
+from ..models import Donation, JobSeekerProfile, SupporterProfile
+
+logger = logging.getLogger(__name__)
+
+DONORS = "donors"
+FREELANCERS = "freelancers"
+
+# Window name -> (key format, lifetime of a window board)
+WINDOWS = {
+    "day": ("%Y-%m-%d", datetime.timedelta(days=8)),
+    "week": ("%G-W%V", datetime.timedelta(weeks=5)),
+    "month": ("%Y-%m", datetime.timedelta(days=400)),
+}
+
+
+def _redis():
+    return get_redis_connection("default")
+
+
+def _key(board, scope):
+    return CacheKeys.LEADERBOARD.build_key(board=board, scope=scope)
+
+
+def _names_key(board):
+    return CacheKeys.LEADERBOARD_NAMES.build_key(board=board)
+
+
+def _window_scope(window, moment):
+    key_format, _ = WINDOWS[window]
+    return f"{window}:{timezone.localtime(moment).strftime(key_format)}"
+
+
+def _donor_scopes(country, timestamp):
+    """Every donor board a donation contributes to, with its expiry."""
+    scopes = [("global", None)]
+    if country:
+        scopes.append((f"country:{country}", None))
+    for window, (_, lifetime) in WINDOWS.items():
+        scopes.append((_window_scope(window, timestamp), lifetime))
+    return scopes
+
+
+def _display_name(user):
+    return _name_from_parts(user.first_name, user.last_name, user.username)
+
+
+def _name_from_parts(first_name, last_name, username):
+    return f"{first_name} {last_name}".strip() or username
+
+
+# ──────────────────────────────── Writes ─────────────────────────────────
+def record_donations(entries):
+    """
+    Apply donation amount changes to the donor boards.
+
+    Args:
+        entries: Iterable of `(supporter, amount_delta, timestamp)`; `supporter`
+            is a `SupporterProfile` whose user is loaded or loadable
+    """
+    pipeline = _redis().pipeline(transaction=False)
+    names = {}
+    for supporter, amount_delta, timestamp in entries:
+        names[supporter.pk] = supporter
+        for scope, lifetime in _donor_scopes(supporter.country, timestamp):
+            key = _key(DONORS, scope)
+            pipeline.zincrby(key, float(amount_delta), supporter.pk)
+            if amount_delta < 0:
+                # Nobody is ranked without donations
+                pipeline.zremrangebyscore(key, "-inf", 0)
+            if lifetime:
+                pipeline.expire(key, lifetime)
+    pipeline.execute()
+    _store_missing_names(DONORS, names)
+
+
+def move_donor(supporter_id, old_country, new_country, total):
+    """Carry a supporter's donated `total` from one country board to another."""
+    pipeline = _redis().pipeline(transaction=False)
+    if old_country:
+        old_key = _key(DONORS, f"country:{old_country}")
+        pipeline.zincrby(old_key, -float(total), supporter_id)
+        # Nobody is ranked without donations
+        pipeline.zremrangebyscore(old_key, "-inf", 0)
+    if new_country:
+        pipeline.zincrby(
+            _key(DONORS, f"country:{new_country}"), float(total), supporter_id
+        )
+    pipeline.execute()
+
+
+def refresh_names(user):
+    """Update the display name of a renamed user on the boards listing them."""
+    profiles = [
+        (board, model.objects.filter(user=user).values_list("pk", flat=True).first())
+        for board, model in (
+            (DONORS, SupporterProfile),
+            (FREELANCERS, JobSeekerProfile),
+        )
+    ]
+    connection = _redis()
+    for board, profile_id in profiles:
+        if profile_id is not None and connection.hexists(_names_key(board), profile_id):
+            connection.hset(_names_key(board), profile_id, _display_name(user))
+
+
+def remove_donor(supporter_id, country, timestamps):
+    """
+    Take a deleted supporter off the donor boards of their country and of the
+    windows holding `timestamps`, the times of their donations.
+    """
+    scopes = {
+        scope
+        for timestamp in timestamps
+        for scope, _ in _donor_scopes(country, timestamp)
+    }
+    pipeline = _redis().pipeline(transaction=False)
+    for scope in scopes:
+        pipeline.zrem(_key(DONORS, scope), supporter_id)
+    pipeline.hdel(_names_key(DONORS), supporter_id)
+    pipeline.execute()
+
+
+def record_rating(job_seeker_id):
+    """Sync a job seeker's position on the freelancer board with the database."""
+    profile = (
+        JobSeekerProfile.objects.select_related("user").filter(pk=job_seeker_id).first()
+    )
+    connection = _redis()
+    key = _key(FREELANCERS, "global")
+    if profile is None or profile.rating_count < settings.LEADERBOARD_MIN_RATINGS:
+        connection.zrem(key, job_seeker_id)
+        return
+
+    connection.zadd(key, {profile.pk: profile.rating})
+    connection.hset(_names_key(FREELANCERS), profile.pk, _display_name(profile.user))
+
+
+def _store_missing_names(board, profiles):
+    """Store display names for profiles that have none yet."""
+    if not profiles:
+        return
+    connection = _redis()
+    ids = list(profiles)
+    known = connection.hmget(_names_key(board), ids)
+    missing = {
+        profile_id: _display_name(profiles[profile_id].user)
+        for profile_id, name in zip(ids, known)
+        if name is None
+    }
+    if missing:
+        connection.hset(_names_key(board), mapping=missing)
+
+
+# ──────────────────────────────── Reads ──────────────────────────────────
+def _read_board(board, scope, limit, offset=0):
+    connection = _redis()
+    entries = connection.zrevrange(
+        _key(board, scope), offset, offset + limit - 1, withscores=True
+    )
+    if not entries:
+        return []
+    names = connection.hmget(_names_key(board), [member for member, _ in entries])
+    return [
+        {
+            "rank": offset + position + 1,
+            "id": int(member),
+            "name": name.decode() if name else "",
+            "score": score,
+        }
+        for position, ((member, score), name) in enumerate(zip(entries, names))
+    ]
+
+
+def top_donors(limit=10, offset=0, country=None, window=None, at=None):
+    """
+    Return the top donors of a board.
+
+    Args:
+        limit (int): Number of entries to return
+        offset (int): Rank to start from (0-based), for pagination
+        country (str, optional): Restrict to a country board
+        window (str, optional): "day", "week" or "month"; takes precedence
+            over `country`
+        at (datetime, optional): Moment selecting the window; defaults to now
+    """
+    if window:
+        scope = _window_scope(window, at or timezone.now())
+    elif country:
+        scope = f"country:{country}"
+    else:
+        scope = "global"
+    return _read_board(DONORS, scope, limit, offset)
+
+
+def top_freelancers(limit=10, offset=0):
+    """Return the best rated job seekers."""
+    return _read_board(FREELANCERS, "global", limit, offset)
+
+
+def donor_rank(supporter_id, country=None):
+    """1-based rank of a supporter on the global or country board, or None."""
+    scope = f"country:{country}" if country else "global"
+    rank = _redis().zrevrank(_key(DONORS, scope), supporter_id)
+    return None if rank is None else rank + 1
+
+
+# ──────────────────────────────── Rebuild ────────────────────────────────
+def _swap(connection, boards, names_key, names):
+    """Atomically replace boards with their freshly built temporary keys."""
+    pipeline = connection.pipeline(transaction=True)
+    for key, (members, lifetime) in boards.items():
+        if members:
+            pipeline.rename(f"{key}:rebuild", key)
+            if lifetime:
+                pipeline.expire(key, lifetime)
+        else:
+            pipeline.delete(key)
+    pipeline.delete(names_key)
+    items = list(names.items())
+    for start in range(0, len(items), 10000):
+        pipeline.hset(names_key, mapping=dict(items[start : start + 10000]))
+    pipeline.execute()
+
+
+def _fill(connection, boards):
+    for key, (members, _) in boards.items():
+        temporary = f"{key}:rebuild"
+        connection.delete(temporary)
+        items = list(members.items())
+        for start in range(0, len(items), 10000):
+            connection.zadd(temporary, dict(items[start : start + 10000]))
+
+
+def rebuild_leaderboards(chunk_size=5000):
+    """
+    Recreate every board from Postgres.
+
+    Global and country donor boards come from the stored supporter totals; the
+    current day/week/month boards are aggregated from donations in their range.
+
+    Returns:
+        dict: Number of boards rebuilt per leaderboard
+    """
+    connection = _redis()
+    now = timezone.now()
+
+    # Donors: global and per country
+    donor_boards = {_key(DONORS, "global"): ({}, None)}
+    donor_names = {}
+    supporters = (
+        SupporterProfile.objects.filter(total_donations__gt=0)
+        .values_list(
+            "pk",
+            "country",
+            "total_donations",
+            "user__first_name",
+            "user__last_name",
+            "user__username",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for pk, country, total, first_name, last_name, username in supporters:
+        donor_boards[_key(DONORS, "global")][0][pk] = float(total)
+        if country:
+            donor_boards.setdefault(_key(DONORS, f"country:{country}"), ({}, None))[0][
+                pk
+            ] = float(total)
+        donor_names[pk] = _name_from_parts(first_name, last_name, username)
+
+    # Forget countries that no longer have donors
+    for key in connection.scan_iter(match=_key(DONORS, "country:*")):
+        key = key.decode()
+        if not key.endswith(":rebuild"):
+            donor_boards.setdefault(key, ({}, None))
+
+    # Donors: current windows
+    for window, (_, lifetime) in WINDOWS.items():
+        local_now = timezone.localtime(now)
+        if window == "day":
+            start = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+        elif window == "week":
+            start = (local_now - datetime.timedelta(days=local_now.weekday())).replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+        else:
+            start = local_now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+        totals = (
+            Donation.objects.filter(timestamp__gte=start)
+            .order_by()
+            .values_list("supporter_id")
+            .annotate(total=Sum("amount"))
+        )
+        donor_boards[_key(DONORS, _window_scope(window, now))] = (
+            {supporter_id: float(total) for supporter_id, total in totals},
+            lifetime,
+        )
+
+    # Freelancers
+    freelancers = {}
+    freelancer_names = {}
+    profiles = (
+        JobSeekerProfile.objects.filter(
+            rating_count__gte=settings.LEADERBOARD_MIN_RATINGS
+        )
+        .values_list(
+            "pk", "rating", "user__first_name", "user__last_name", "user__username"
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for pk, rating, first_name, last_name, username in profiles:
+        freelancers[pk] = rating
+        freelancer_names[pk] = _name_from_parts(first_name, last_name, username)
+    freelancer_boards = {_key(FREELANCERS, "global"): (freelancers, None)}
+
+    _fill(connection, donor_boards)
+    _fill(connection, freelancer_boards)
+    _swap(connection, donor_boards, _names_key(DONORS), donor_names)
+    _swap(connection, freelancer_boards, _names_key(FREELANCERS), freelancer_names)
+
+    logger.info(
+        f"Leaderboards rebuilt: {len(donor_boards)} donor boards, "
+        f"{len(freelancers)} ranked freelancers"
+    )
+    return {DONORS: len(donor_boards), FREELANCERS: len(freelancer_boards)}
@@ -0,0 +1,229 @@
+"""
+Server-side clustering of map points, served per Web Mercator tile.
+
+Each tile is divided into a `MAP_CLUSTER_GRID` x `MAP_CLUSTER_GRID` grid and
+the points of a layer are grouped by grid cell in SQL, so a tile costs one
+aggregate query however many points it holds, and the client receives at
+most grid² clusters. Cells holding a single point carry its details so the
+client can render a marker instead of a bubble.
+
+Tiles are cached in Redis. A changed point only invalidates the tiles
+containing its old and new coordinates, one per zoom level and layer. Rather
+than deleting them, invalidation gives each of those tiles a new generation
+token, part of the cache key: a tile built from rows read before a change is
+stored under the token read before the build, which nobody looks up anymore.
+"""
+
+import logging
+import math
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, FloatField, Min, Value
+from django.db.models.functions import Floor, Ln, Radians, Tan
+
+from core.utils.geo import (
+    MAX_MERCATOR_LATITUDE,
+    mercator_y,
+    tile_bounds,
+    tile_for_point,
+)
+from ..constants import CacheKeys
+
+logger = logging.getLogger(__name__)
+
+# Layer -> (model, location field, display name field)
+LAYERS = {
+    "workspaces": ("accounts.WorkSpace", "location", "name"),
+    "companies": ("accounts.CompanyProfile", "headquarters", "company_name"),
+}
+
+
+class InvalidTile(ValueError):
+    pass
+
+
+def layer_for_model(model):
+    """Return `(layer, location_field)` of the layer showing `model`."""
+    for layer, (model_label, location_field, _) in LAYERS.items():
+        if model._meta.label == model_label:
+            return layer, location_field
+    raise LookupError(f"{model._meta.label} is not shown on the map")
+
+
+def _generation_key(layer, zoom, x, y):
+    return CacheKeys.MAP_TILE_GENERATION.build_key(layer=layer, zoom=zoom, x=x, y=y)
+
+
+def _tile_key(layer, zoom, x, y):
+    """Cache key of the current generation of a tile."""
+    generation = cache.get(_generation_key(layer, zoom, x, y), 0)
+    return CacheKeys.MAP_TILE.build_key(
+        layer=layer, zoom=zoom, x=x, y=y, generation=generation
+    )
+
+
+def _validate(layer, zoom, x, y):
+    if layer not in LAYERS:
+        raise InvalidTile(f"Unknown layer {layer!r}, choose from {', '.join(LAYERS)}")
+    if not 0 <= zoom <= settings.MAP_TILE_MAX_ZOOM:
+        raise InvalidTile(f"Zoom must be between 0 and {settings.MAP_TILE_MAX_ZOOM}")
+    if not (0 <= x < 2**zoom and 0 <= y < 2**zoom):
+        raise InvalidTile(f"Tile {x}/{y} does not exist at zoom {zoom}")
+
+
+def build_tile(layer, zoom, x, y):
+    """
+    Cluster the points of a layer inside a tile.
+
+    Returns:
+        list[dict]: One entry per non-empty grid cell, with the centroid
+        `latitude`/`longitude` and `count`; single points also have `id`,
+        `name` and `city`
+    """
+    model_label, location_field, name_field = LAYERS[layer]
+    model = apps.get_model(model_label)
+    grid = settings.MAP_CLUSTER_GRID
+    min_lat, min_lng, max_lat, max_lng = tile_bounds(zoom, x, y)
+
+    latitude = F(f"{location_field}__latitude")
+    longitude = F(f"{location_field}__longitude")
+    cell_width = (max_lng - min_lng) / grid
+    cell_height = (mercator_y(max_lat) - mercator_y(min_lat)) / grid
+
+    # Points on the max latitude/longitude edges belong to the next tile
+    points = model.objects.filter(
+        **{
+            f"{location_field}__latitude__gte": max(min_lat, -MAX_MERCATOR_LATITUDE),
+            f"{location_field}__latitude__lt": min(max_lat, MAX_MERCATOR_LATITUDE),
+            f"{location_field}__longitude__gte": min_lng,
+            f"{location_field}__longitude__lt": max_lng,
+        }
+    )
+    cells = (
+        points.annotate(
+            cell_x=Floor((longitude - Value(min_lng)) / Value(cell_width)),
+            cell_y=Floor(
+                (
+                    Value(mercator_y(max_lat))
+                    - Ln(Tan(Radians(latitude) / Value(2.0) + Value(math.pi / 4)))
+                )
+                / Value(cell_height),
+                output_field=FloatField(),
+            ),
+        )
+        .order_by()
+        .values("cell_x", "cell_y")
+        .annotate(
+            count=Count("pk"),
+            latitude=Avg(latitude),
+            longitude=Avg(longitude),
+            point_id=Min("pk"),  # The point itself when the cell holds one
+        )
+    )
+
+    clusters = []
+    single_ids = []
+    for cell in cells:
+        cluster = {
+            "latitude": cell["latitude"],
+            "longitude": cell["longitude"],
+            "count": cell["count"],
+        }
+        if cell["count"] == 1:
+            cluster["id"] = cell["point_id"]
+            single_ids.append(cell["point_id"])
+        clusters.append(cluster)
+
+    if single_ids:
+        details = {
+            pk: (name, city)
+            for pk, name, city in model.objects.filter(pk__in=single_ids).values_list(
+                "pk", name_field, f"{location_field}__city"
+            )
+        }
+        for cluster in clusters:
+            if "id" in cluster and cluster["id"] in details:
+                cluster["name"], cluster["city"] = details[cluster["id"]]
+        # Points deleted between the two queries
+        clusters = [
+            cluster
+            for cluster in clusters
+            if "id" not in cluster or cluster["id"] in details
+        ]
+
+    return clusters
+
+
+def get_tile(layer, zoom, x, y):
+    """
+    Return the clusters of a tile, from the Redis cache when possible.
+
+    Raises:
+        InvalidTile: If the layer or tile coordinates are invalid
+    """
+    _validate(layer, zoom, x, y)
+    key = _tile_key(layer, zoom, x, y)
+    clusters = cache.get(key)
+    if clusters is None:
+        clusters = build_tile(layer, zoom, x, y)
+        cache.set(key, clusters, settings.MAP_TILE_CACHE_TTL_SECONDS)
+    return clusters
+
+
+def invalidate_points(points, layers=None):
+    """
+    Drop the cached tiles containing any of `points`, at every zoom level.
+
+    Args:
+        points: Iterable of `(latitude, longitude)`; None entries are ignored
+        layers: Layers to invalidate; all of them by default
+    """
+    keys = set()
+    for point in points:
+        if point is None or None in point:
+            continue
+        for zoom in range(settings.MAP_TILE_MAX_ZOOM + 1):
+            x, y = tile_for_point(*point, zoom)
+            for layer in layers or LAYERS:
+                keys.add(_generation_key(layer, zoom, x, y))
+    if keys:
+        # Tokens outlive the tiles cached before them: when one expires, no
+        # stale tile of the default generation is left to be found again
+        generation = uuid.uuid4().hex
+        cache.set_many(
+            {key: generation for key in keys},
+            2 * settings.MAP_TILE_CACHE_TTL_SECONDS,
+        )
+
+
+def warm_tiles(layer, max_zoom=None, chunk_size=5000):
+    """
+    Precompute and cache every non-empty tile of a layer up to `max_zoom`.
+
+    Returns:
+        int: Number of tiles built
+    """
+    max_zoom = settings.MAP_TILE_WARM_ZOOM if max_zoom is None else max_zoom
+    model_label, location_field, _ = LAYERS[layer]
+    coordinates = (
+        apps.get_model(model_label)
+        .objects.filter(**{f"{location_field}__isnull": False})
+        .values_list(f"{location_field}__latitude", f"{location_field}__longitude")
+        .iterator(chunk_size=chunk_size)
+    )
+
+    tiles = set()
+    for latitude, longitude in coordinates:
+        for zoom in range(max_zoom + 1):
+            tiles.add((zoom, *tile_for_point(latitude, longitude, zoom)))
+
+    for zoom, x, y in tiles:
+        key = _tile_key(layer, zoom, x, y)
+        cache.set(
+            key, build_tile(layer, zoom, x, y), settings.MAP_TILE_CACHE_TTL_SECONDS
+        )
+    logger.info(f"Map tiles warmed for {layer}: {len(tiles)} tiles")
+    return len(tiles)
@@ -0,0 +1,323 @@
+"""
+In-memory matching index for job seekers.
+
+The index keeps a column-oriented NumPy snapshot of every `JobSeekerProfile`
+so a job description can be scored against all seekers with a handful of
+vectorized operations instead of one ORM filter chain per request.
+
+The snapshot is rebuilt from scratch every `MATCHING_SNAPSHOT_MAX_AGE_SECONDS`
+and refreshed incrementally in between, by re-reading only the profiles whose
+`updated_at` is newer than the last row seen. Deleted profiles are dropped
+from the local snapshot through the `post_delete` signal; other processes
+drop them on their next full rebuild, and callers resolving ids through
+`in_bulk` never see them.
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from ..models import JobSeekerProfile
+
+logger = logging.getLogger(__name__)
+
+# Relative importance of each criterion in the final score.
+DEFAULT_WEIGHTS = {
+    "specialization": 3.0,
+    "field_of_work": 2.0,
+    "experience_level": 1.5,
+    "hourly_rate": 1.0,
+    "rating": 1.0,
+}
+
+EXPERIENCE_LEVELS = {
+    level: position
+    for position, level in enumerate(JobSeekerProfile.ExperienceLevel.values)
+}
+
+# Score given to seekers who did not set an expected hourly rate.
+UNKNOWN_RATE_SCORE = 0.5
+
+SNAPSHOT_FIELDS = (
+    "id",
+    "specialization",
+    "field_of_work",
+    "experience_level",
+    "expected_hourly_rate",
+    "is_available",
+    "is_employed",
+    "rating",
+    "updated_at",
+)
+
+
+def _normalize(value):
+    return (value or "").strip().lower()
+
+
+class JobSeekerMatchingIndex:
+    """Array-backed snapshot of the job seeker table with top-K scoring."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.specialization = np.empty(0, dtype=np.int32)
+        self.field_of_work = np.empty(0, dtype=np.int32)
+        self.experience_level = np.empty(0, dtype=np.int8)
+        self.hourly_rate = np.empty(0, dtype=np.float64)
+        self.is_available = np.empty(0, dtype=bool)
+        self.is_employed = np.empty(0, dtype=bool)
+        self.rating = np.empty(0, dtype=np.float32)
+        self.active = np.empty(0, dtype=bool)
+
+        self._positions = {}  # profile id -> row in the arrays
+        self._specializations = {}  # normalized text -> integer code
+        self._fields_of_work = {}
+        self._watermark = None
+        self.built_at = None
+        self.refreshed_at = None
+
+    # ──────────────────────────────── Loading ─────────────────────────────────
+    @staticmethod
+    def _queryset():
+        return JobSeekerProfile.objects.all()
+
+    def _encode(self, vocabulary, value):
+        return vocabulary.setdefault(_normalize(value), len(vocabulary))
+
+    def _columns(self, rows):
+        """Convert `SNAPSHOT_FIELDS` tuples into per-column arrays."""
+        columns = {
+            "ids": np.fromiter((row[0] for row in rows), np.int64, len(rows)),
+            "specialization": np.fromiter(
+                (self._encode(self._specializations, row[1]) for row in rows),
+                np.int32,
+                len(rows),
+            ),
+            "field_of_work": np.fromiter(
+                (self._encode(self._fields_of_work, row[2]) for row in rows),
+                np.int32,
+                len(rows),
+            ),
+            "experience_level": np.fromiter(
+                (EXPERIENCE_LEVELS.get(row[3], 0) for row in rows), np.int8, len(rows)
+            ),
+            "hourly_rate": np.fromiter(
+                (np.nan if row[4] is None else float(row[4]) for row in rows),
+                np.float64,
+                len(rows),
+            ),
+            "is_available": np.fromiter((row[5] for row in rows), bool, len(rows)),
+            "is_employed": np.fromiter((row[6] for row in rows), bool, len(rows)),
+            "rating": np.fromiter(
+                (row[7] or 0.0 for row in rows), np.float32, len(rows)
+            ),
+        }
+        return columns
+
+    def build(self):
+        """Load every profile into a fresh snapshot."""
+        started = time.perf_counter()
+        rows = list(
+            self._queryset().values_list(*SNAPSHOT_FIELDS).iterator(chunk_size=5000)
+        )
+
+        with self._lock:
+            self._reset()
+            for name, column in self._columns(rows).items():
+                setattr(self, name, column)
+            self.active = np.ones(len(rows), dtype=bool)
+            self._positions = {row[0]: position for position, row in enumerate(rows)}
+            self._watermark = max((row[8] for row in rows), default=None)
+            self.built_at = self.refreshed_at = time.monotonic()
+
+        logger.info(
+            f"Matching index built with {len(rows)} job seekers "
+            f"in {time.perf_counter() - started:.3f}s"
+        )
+
+    def refresh(self):
+        """Apply profiles created or updated since the last load."""
+        queryset = self._queryset()
+        if self._watermark is not None:
+            # `gte` rather than `gt`: rows sharing the watermark timestamp may
+            # have been committed after the previous read. Re-applying is harmless.
+            queryset = queryset.filter(updated_at__gte=self._watermark)
+        rows = list(queryset.values_list(*SNAPSHOT_FIELDS))
+
+        with self._lock:
+            self.refreshed_at = time.monotonic()
+            if not rows:
+                return 0
+
+            columns = self._columns(rows)
+            existing = [
+                (self._positions[row[0]], offset)
+                for offset, row in enumerate(rows)
+                if row[0] in self._positions
+            ]
+            if existing:
+                positions, offsets = map(np.array, zip(*existing))
+                for name, column in columns.items():
+                    getattr(self, name)[positions] = column[offsets]
+                self.active[positions] = True
+
+            appended = [
+                offset
+                for offset, row in enumerate(rows)
+                if row[0] not in self._positions
+            ]
+            if appended:
+                start = len(self.ids)
+                for name, column in columns.items():
+                    setattr(
+                        self,
+                        name,
+                        np.concatenate([getattr(self, name), column[appended]]),
+                    )
+                self.active = np.concatenate(
+                    [self.active, np.ones(len(appended), dtype=bool)]
+                )
+                for position, offset in enumerate(appended, start=start):
+                    self._positions[rows[offset][0]] = position
+
+            latest = max(row[8] for row in rows)
+            if self._watermark is None or latest > self._watermark:
+                self._watermark = latest
+        return len(rows)
+
+    def discard(self, profile_id):
+        """Exclude a profile from future results without rebuilding."""
+        with self._lock:
+            position = self._positions.get(profile_id)
+            if position is not None:
+                self.active[position] = False
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    # ──────────────────────────────── Scoring ─────────────────────────────────
+    def top_k(
+        self,
+        k=20,
+        specialization=None,
+        field_of_work=None,
+        experience_level=None,
+        max_hourly_rate=None,
+        min_rating=None,
+        include_employed=True,
+        weights=None,
+    ):
+        """
+        Rank available job seekers against a job description.
+
+        Args:
+            k (int): Number of results to return
+            specialization (str, optional): Required specialization
+            field_of_work (str, optional): Required field of work
+            experience_level (str, optional): Target `ExperienceLevel` value
+            max_hourly_rate (float, optional): Budget per hour
+            min_rating (float, optional): Hard lower bound on the average rating
+            include_employed (bool): Whether currently employed seekers qualify
+            weights (dict, optional): Overrides for `DEFAULT_WEIGHTS`
+
+        Returns:
+            list[tuple[int, float]]: `(profile_id, score)` pairs, best first
+        """
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+        with self._lock:
+            mask = self.active & self.is_available
+            if not include_employed:
+                mask &= ~self.is_employed
+            if min_rating is not None:
+                mask &= self.rating >= min_rating
+
+            candidates = np.flatnonzero(mask)
+            if not len(candidates) or k <= 0:
+                return []
+
+            score = np.zeros(len(candidates), dtype=np.float64)
+
+            if specialization:
+                code = self._specializations.get(_normalize(specialization))
+                if code is not None:
+                    score += weights["specialization"] * (
+                        self.specialization[candidates] == code
+                    )
+
+            if field_of_work:
+                code = self._fields_of_work.get(_normalize(field_of_work))
+                if code is not None:
+                    score += weights["field_of_work"] * (
+                        self.field_of_work[candidates] == code
+                    )
+
+            if experience_level in EXPERIENCE_LEVELS:
+                distance = np.abs(
+                    self.experience_level[candidates].astype(np.float64)
+                    - EXPERIENCE_LEVELS[experience_level]
+                )
+                score += weights["experience_level"] * (
+                    1.0 - distance / (len(EXPERIENCE_LEVELS) - 1)
+                )
+
+            if max_hourly_rate:
+                budget = float(max_hourly_rate)
+                rates = self.hourly_rate[candidates]
+                # Full marks within budget, decaying linearly to zero at twice the budget.
+                fit = np.clip(1.0 - (rates - budget) / budget, 0.0, 1.0)
+                score += weights["hourly_rate"] * np.where(
+                    np.isnan(rates), UNKNOWN_RATE_SCORE, fit
+                )
+
+            score += weights["rating"] * (self.rating[candidates] / 5.0)
+
+            if k < len(candidates):
+                best = np.argpartition(-score, k - 1)[:k]
+            else:
+                best = np.arange(len(candidates))
+            best = best[np.argsort(-score[best], kind="stable")]
+
+            return [
+                (int(profile_id), float(value))
+                for profile_id, value in zip(self.ids[candidates[best]], score[best])
+            ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_matching_index():
+    """
+    Return the process-wide matching index, building or refreshing it as needed.
+    """
+    global _index
+
+    with _index_lock:
+        now = time.monotonic()
+        if _index is None:
+            _index = JobSeekerMatchingIndex()
+
+        if (
+            _index.built_at is None
+            or now - _index.built_at > settings.MATCHING_SNAPSHOT_MAX_AGE_SECONDS
+        ):
+            _index.build()
+        elif now - _index.refreshed_at > settings.MATCHING_REFRESH_INTERVAL_SECONDS:
+            _index.refresh()
+
+    return _index
+
+
+def discard_from_matching_index(profile_id):
+    """Drop a deleted profile from this process's snapshot, if one is loaded."""
+    if _index is not None:
+        _index.discard(profile_id)
@@ -0,0 +1,139 @@
+"""
+Reference counting of content-addressed media blobs.
+
+Profile photos and company logos are stored by `media_blob_storage` under
+the hash of their content, so one blob can back many fields. Each field that
+starts pointing at a blob acquires it, and releases it when it is replaced
+or its row deleted. Blobs are not deleted when their count drops to zero:
+an upload of the same content may be on its way, having found the file
+already present. `collect_unused` deletes blobs that stayed unreferenced for
+`MEDIA_BLOB_RETENTION_HOURS`.
+
+Rendition metadata is kept on the blob, so a field acquiring an already
+rendered blob copies it instead of rendering the image again. Renditions are
+named after the content hash too, so they may also back legacy uploads that
+are not stored as blobs: they are only deleted with their blob when no
+`*_renditions` field records that hash anymore.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.utils.storage import blob_sha256, media_blob_storage
+from ..models import MediaBlob
+
+logger = logging.getLogger(__name__)
+
+
+def acquire(name):
+    """
+    Count a new reference to the blob stored as `name`.
+
+    Returns:
+        MediaBlob: The blob, None if `name` is not a content-addressed name
+    """
+    sha256 = blob_sha256(name)
+    if sha256 is None:
+        return None
+    blob, _ = MediaBlob.objects.get_or_create(
+        sha256=sha256,
+        defaults={"name": name, "size": media_blob_storage().size(name)},
+    )
+    MediaBlob.objects.filter(pk=blob.pk).update(
+        ref_count=F("ref_count") + 1, updated_at=timezone.now()
+    )
+    return blob
+
+
+def release(name):
+    """Drop one reference to the blob stored as `name`, if it is one."""
+    sha256 = blob_sha256(name)
+    if sha256 is None:
+        return
+    MediaBlob.objects.filter(sha256=sha256, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1, updated_at=timezone.now()
+    )
+
+
+def store_renditions(metadata):
+    """Keep the rendition metadata of an image on its blob."""
+    MediaBlob.objects.filter(sha256=metadata["sha256"]).update(renditions=metadata)
+
+
+def _rendition_fields():
+    """`(model, field name)` of every field recording image renditions."""
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if field.name.endswith("_renditions") and isinstance(field, models.JSONField)
+    ]
+
+
+def _still_rendered(sha256s):
+    """The hashes among `sha256s` whose renditions a field still records."""
+    rendered = set()
+    for model, field in _rendition_fields():
+        rendered.update(
+            model._base_manager.filter(**{f"{field}__sha256__in": sha256s})
+            .values_list(f"{field}__sha256", flat=True)
+            .distinct()
+        )
+    return rendered
+
+
+def _delete_files(blob, keep_renditions=False):
+    storage = media_blob_storage()
+    # Concurrent first uploads with different extensions store a file each
+    for name in {blob.name, *storage.blob_names(blob.sha256)}:
+        storage.delete(name)
+    if keep_renditions:
+        return
+    for formats in blob.renditions.get("renditions", {}).values():
+        for rendition in formats.values():
+            default_storage.delete(rendition["name"])
+
+
+def collect_unused(retention_hours=None, chunk_size=500):
+    """
+    Delete the blobs, and their renditions, unreferenced for longer than the
+    retention period.
+
+    Returns:
+        int: Number of blobs deleted
+    """
+    if retention_hours is None:
+        retention_hours = settings.MEDIA_BLOB_RETENTION_HOURS
+    cutoff = timezone.now() - timedelta(hours=retention_hours)
+    candidates = dict(
+        MediaBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).values_list(
+            "pk", "sha256"
+        )[:chunk_size]
+    )
+    # Renditions shared with uploads stored under other names
+    rendered = _still_rendered(list(candidates.values())) if candidates else set()
+
+    deleted = 0
+    for pk, sha256 in candidates.items():
+        with transaction.atomic():
+            # Re-checked under the row lock: it may have been acquired since
+            blob = (
+                MediaBlob.objects.select_for_update()
+                .filter(pk=pk, ref_count=0, updated_at__lt=cutoff)
+                .first()
+            )
+            if blob is None:
+                continue
+            _delete_files(blob, keep_renditions=sha256 in rendered)
+            blob.delete()
+            deleted += 1
+
+    logger.info(f"Deleted {deleted} unused media blobs")
+    return deleted
@@ -0,0 +1,281 @@
+"""
+In-app notifications: Postgres for durability, Redis for reads.
+
+Every notification is a `Notification` row. Each user also has two Redis
+keys, both filled from the table on first read and then kept up to date by
+the writes:
+
+- an inbox list with their latest `NOTIFICATION_INBOX_SIZE` notifications,
+  as JSON, newest first;
+- an unread counter, so the badge count is a single GET.
+
+Reads create the keys with a `NOTIFICATION_CACHE_TTL_SECONDS` lifetime, and
+writes only update keys that exist: an inbox still to be built would
+otherwise look complete. Marking notifications read drops both keys, to be
+rebuilt on the next read.
+
+Every write also bumps a per-user version key. A read notes the version
+before querying the table and only stores what it rebuilt if the version is
+unchanged, so a notification committed while the query ran is never lost
+behind a stale inbox or counter.
+
+Fan-out to many users is chunked: one `bulk_create` and one Redis script
+call per `NOTIFICATION_FANOUT_CHUNK_SIZE` users, so notifying tens of
+thousands of users costs a few dozen round trips. New notifications are also
+published to the users' event streams (`core.streaming`). Redis trouble is
+logged and never fails a write; reads fall back to the database.
+"""
+
+import json
+import logging
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from core.utils.events import publish, publish_many
+from ..constants import CacheKeys
+from ..models import Notification
+
+logger = logging.getLogger(__name__)
+
+# KEYS: inbox, unread and version keys, per user.
+# ARGV: inbox size, version TTL, then payloads.
+_PUSH_SCRIPT = """
+local size = tonumber(ARGV[1])
+for i = 1, #KEYS, 3 do
+    if redis.call("LPUSHX", KEYS[i], ARGV[(i + 2) / 3 + 2]) > 0 then
+        redis.call("LTRIM", KEYS[i], 0, size - 1)
+    end
+    if redis.call("EXISTS", KEYS[i + 1]) == 1 then
+        redis.call("INCR", KEYS[i + 1])
+    end
+    redis.call("INCR", KEYS[i + 2])
+    redis.call("EXPIRE", KEYS[i + 2], ARGV[2])
+end
+return #KEYS / 3
+"""
+
+# KEYS: the key to rebuild, the version key. ARGV: the version read before
+# the query, TTL, "list" or "value", then the values.
+_REBUILD_SCRIPT = """
+if (redis.call("GET", KEYS[2]) or "0") ~= ARGV[1] then
+    return 0
+end
+redis.call("DEL", KEYS[1])
+if ARGV[3] == "list" then
+    redis.call("RPUSH", KEYS[1], unpack(ARGV, 4))
+else
+    redis.call("SET", KEYS[1], ARGV[4])
+end
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+return 1
+"""
+
+_push_script = None
+_rebuild_script = None
+
+
+def _redis():
+    return get_redis_connection("default")
+
+
+def _inbox_key(user_id):
+    return CacheKeys.NOTIFICATION_INBOX.build_key(user_id=user_id)
+
+
+def _unread_key(user_id):
+    return CacheKeys.NOTIFICATION_UNREAD.build_key(user_id=user_id)
+
+
+def _version_key(user_id):
+    return CacheKeys.NOTIFICATION_VERSION.build_key(user_id=user_id)
+
+
+def _version(value):
+    return value.decode() if value is not None else "0"
+
+
+def _rebuild(key, user_id, version, kind, values):
+    """Store a rebuilt key unless a write bumped the version meanwhile."""
+    global _rebuild_script
+    connection = _redis()
+    if _rebuild_script is None:
+        _rebuild_script = connection.register_script(_REBUILD_SCRIPT)
+    return _rebuild_script(
+        keys=[key, _version_key(user_id)],
+        args=[version, settings.NOTIFICATION_CACHE_TTL_SECONDS, kind, *values],
+        client=connection,
+    )
+
+
+def serialize(notification):
+    return {
+        "id": notification.pk,
+        "type": notification.notification_type,
+        "message": notification.message,
+        "data": notification.data,
+        "created_at": notification.created_at.isoformat(),
+        "read": notification.read_at is not None,
+    }
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _push(notifications):
+    """Add new notifications to the existing inboxes and unread counters."""
+    global _push_script
+    keys = []
+    payloads = []
+    for notification in notifications:
+        keys += [
+            _inbox_key(notification.user_id),
+            _unread_key(notification.user_id),
+            _version_key(notification.user_id),
+        ]
+        payloads.append(json.dumps(serialize(notification)))
+    try:
+        connection = _redis()
+        if _push_script is None:
+            _push_script = connection.register_script(_PUSH_SCRIPT)
+        _push_script(
+            keys=keys,
+            args=[
+                settings.NOTIFICATION_INBOX_SIZE,
+                settings.NOTIFICATION_CACHE_TTL_SECONDS,
+                *payloads,
+            ],
+            client=connection,
+        )
+    except Exception as e:
+        # The keys may now be behind: drop them, reads rebuild them
+        logger.error(f"Notification push to Redis failed: {e}", exc_info=True)
+        try:
+            _drop(notification.user_id for notification in notifications)
+        except Exception:
+            pass
+    publish_many(
+        (notification.user_id, "notification", serialize(notification))
+        for notification in notifications
+    )
+
+
+def notify(user_ids, message, notification_type=None, data=None, chunk_size=None):
+    """
+    Notify many users with the same message.
+
+    Args:
+        user_ids: Iterable of user ids, possibly a lazy stream
+        message (str): The notification text
+        notification_type (str, optional): A `Notification.NotificationType`,
+            INFO by default
+        data (dict, optional): Extra data for the client
+        chunk_size (int, optional): Users per insert and Redis call; defaults
+            to `NOTIFICATION_FANOUT_CHUNK_SIZE`
+
+    Returns:
+        int: Number of notifications created
+    """
+    chunk_size = chunk_size or settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+    notification_type = notification_type or Notification.NotificationType.INFO
+    created = 0
+    for chunk in _chunks(user_ids, chunk_size):
+        with transaction.atomic():
+            notifications = Notification.objects.bulk_create(
+                [
+                    Notification(
+                        user_id=user_id,
+                        notification_type=notification_type,
+                        message=message,
+                        data=data or {},
+                    )
+                    for user_id in chunk
+                ]
+            )
+            transaction.on_commit(lambda n=notifications: _push(n))
+        created += len(notifications)
+    logger.info(f"{created} notifications created: {message[:50]}")
+    return created
+
+
+def _drop(user_ids):
+    """Drop the cached keys of some users and bump their versions."""
+    pipeline = _redis().pipeline()
+    for user_id in set(user_ids):
+        pipeline.delete(_inbox_key(user_id), _unread_key(user_id))
+        pipeline.incr(_version_key(user_id))
+        pipeline.expire(_version_key(user_id), settings.NOTIFICATION_CACHE_TTL_SECONDS)
+    pipeline.execute()
+
+
+def unread_count(user_id):
+    """Number of unread notifications of a user, from Redis when possible."""
+    key = _unread_key(user_id)
+    version = None
+    try:
+        value, version = _redis().mget(key, _version_key(user_id))
+        if value is not None:
+            return int(value)
+    except Exception as e:
+        logger.warning(f"Unread count read from Redis failed: {e}")
+
+    count = Notification.objects.filter(user_id=user_id, read_at__isnull=True).count()
+    try:
+        _rebuild(key, user_id, _version(version), "value", [count])
+    except Exception as e:
+        logger.warning(f"Unread count write to Redis failed: {e}")
+    return count
+
+
+def recent(user_id, limit=None):
+    """A user's latest notifications, newest first, from their Redis inbox."""
+    size = settings.NOTIFICATION_INBOX_SIZE
+    limit = min(limit or size, size)
+    key = _inbox_key(user_id)
+    version = None
+    try:
+        pipeline = _redis().pipeline()
+        pipeline.lrange(key, 0, limit - 1)
+        pipeline.get(_version_key(user_id))
+        items, version = pipeline.execute()
+        if items:
+            return [json.loads(item) for item in items]
+    except Exception as e:
+        logger.warning(f"Notification inbox read from Redis failed: {e}")
+
+    inbox = [
+        serialize(notification)
+        for notification in Notification.objects.filter(user_id=user_id)[:size]
+    ]
+    if inbox:
+        try:
+            _rebuild(key, user_id, _version(version), "list", map(json.dumps, inbox))
+        except Exception as e:
+            logger.warning(f"Notification inbox write to Redis failed: {e}")
+    return inbox[:limit]
+
+
+def mark_read(user_id, notification_ids=None):
+    """
+    Mark some, or all, of a user's unread notifications as read.
+
+    Returns:
+        int: Number of notifications marked
+    """
+    unread = Notification.objects.filter(user_id=user_id, read_at__isnull=True)
+    if notification_ids is not None:
+        unread = unread.filter(pk__in=notification_ids)
+    marked = unread.update(read_at=timezone.now())
+    if marked:
+        try:
+            _drop([user_id])
+        except Exception as e:
+            logger.error(f"Notification cache drop failed: {e}", exc_info=True)
+        publish(user_id, "notifications.read", {"marked": marked})
+    return marked
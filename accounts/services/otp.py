@@ -0,0 +1,140 @@
+"""
+Redis store for mobile number verification codes (OTPs).
+
+Codes only live in Redis: generating one, letting it expire and failing an
+attempt cost no database write, and the row is only saved once the number is
+verified. Every step is a single atomic Redis operation, so the cooldown and
+the attempt limit hold across all workers:
+
+- the cooldown is a `SET NX EX` lock taken before a code is issued;
+- a code is stored as a salted hash with the code lifetime as its TTL;
+- checking a code counts the attempt and compares it in one Lua script.
+"""
+
+import secrets
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+from django_redis import get_redis_connection
+
+from ..constants import CacheKeys
+
+VERIFIED = "verified"
+INVALID = "invalid"
+MISSING = "missing"  # Never sent, expired or already used
+LOCKED = "locked"  # Too many failed attempts for this code
+
+# KEYS: code, attempts. ARGV: hashed candidate, max attempts.
+_VERIFY_SCRIPT = """
+local expected = redis.call("GET", KEYS[1])
+if not expected then
+    return "missing"
+end
+
+local attempts = redis.call("INCR", KEYS[2])
+if attempts == 1 then
+    redis.call("PEXPIRE", KEYS[2], math.max(redis.call("PTTL", KEYS[1]), 1))
+end
+if attempts > tonumber(ARGV[2]) then
+    redis.call("DEL", KEYS[1], KEYS[2])
+    return "locked"
+end
+
+if expected == ARGV[1] then
+    redis.call("DEL", KEYS[1], KEYS[2])
+    return "verified"
+end
+return "invalid"
+"""
+
+
+class CooldownActive(Exception):
+    """A code was sent too recently to send another one."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Verification code cooldown, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class OTPStore:
+    def __init__(self, alias="default"):
+        self.alias = alias
+        self._verify = None
+
+    def _redis(self):
+        return get_redis_connection(self.alias)
+
+    @staticmethod
+    def _keys(mobile_number_id):
+        return {
+            name: getattr(CacheKeys, f"OTP_{name.upper()}").build_key(
+                mobile_number_id=mobile_number_id
+            )
+            for name in ("code", "attempts", "cooldown")
+        }
+
+    @staticmethod
+    def _hash(mobile_number_id, code):
+        return salted_hmac(
+            "accounts.otp", f"{mobile_number_id}:{code}", algorithm="sha256"
+        ).hexdigest()
+
+    def issue(self, mobile_number_id):
+        """
+        Generate a new 6-digit code, replacing any pending one.
+
+        Returns:
+            str: The code to send to the user
+
+        Raises:
+            CooldownActive: If a code was issued less than the cooldown ago
+        """
+        keys = self._keys(mobile_number_id)
+        connection = self._redis()
+        cooldown = settings.MOBILE_NUMBER_VERIFICATION_CODE_COOLDOWN_SECONDS
+        if not connection.set(keys["cooldown"], 1, nx=True, ex=cooldown):
+            raise CooldownActive(max(connection.ttl(keys["cooldown"]), 1))
+
+        code = f"{secrets.randbelow(900000) + 100000}"
+        pipeline = connection.pipeline(transaction=True)
+        pipeline.set(
+            keys["code"],
+            self._hash(mobile_number_id, code),
+            ex=settings.MOBILE_NUMBER_VERIFICATION_CODE_TTL_SECONDS,
+        )
+        pipeline.delete(keys["attempts"])
+        pipeline.execute()
+        return code
+
+    def verify(self, mobile_number_id, code):
+        """
+        Check a code, counting the attempt.
+
+        Returns:
+            str: `VERIFIED` (the code is consumed), `INVALID`, `MISSING` or
+            `LOCKED` (the code is discarded after too many attempts)
+        """
+        if self._verify is None:
+            self._verify = self._redis().register_script(_VERIFY_SCRIPT)
+        keys = self._keys(mobile_number_id)
+        result = self._verify(
+            keys=[keys["code"], keys["attempts"]],
+            args=[
+                self._hash(mobile_number_id, code),
+                settings.MOBILE_NUMBER_VERIFICATION_MAX_ATTEMPTS,
+            ],
+        )
+        return result.decode() if isinstance(result, bytes) else result
+
+    def remaining_seconds(self, mobile_number_id):
+        """Seconds left on the pending code, or None if there is none."""
+        ttl = self._redis().ttl(self._keys(mobile_number_id)["code"])
+        return ttl if ttl >= 0 else None
+
+    def discard(self, mobile_number_id):
+        """Drop the pending code, e.g. when the number changes."""
+        keys = self._keys(mobile_number_id)
+        self._redis().delete(keys["code"], keys["attempts"])
+
+
+otp_store = OTPStore()
@@ -0,0 +1,219 @@
+"""
+Country and carrier names of phone numbers, from a pluggable provider.
+
+`phonenumbers.geocoder` and `phonenumbers.carrier` load the metadata of every
+region in the world on import: over half a second and ~100 MB of RSS per
+worker. `PHONE_METADATA_PROVIDER` selects how these names are looked up:
+
+- "phonenumbers": the library modules, imported on first use only.
+- "compact": a small JSON table built by the `build_phone_metadata` command
+  for the regions in `PHONE_METADATA_REGIONS`. Numbers of other regions get
+  empty names.
+
+Each provider logs what loading it cost, and `stats()` reports it.
+"""
+
+import json
+import logging
+import os
+import resource
+import threading
+import time
+
+import phonenumbers
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+# Number types that carriers are looked up for, as in phonenumbers.carrier
+CARRIER_NUMBER_TYPES = (
+    phonenumbers.PhoneNumberType.MOBILE,
+    phonenumbers.PhoneNumberType.FIXED_LINE_OR_MOBILE,
+    phonenumbers.PhoneNumberType.PAGER,
+)
+
+
+def _rss_kb():
+    """Current resident set size of this process in KB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        # Peak rather than current RSS, still shows a large load
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class PhoneMetadataProvider:
+    """Base class: loads its data once, on first use, and records the cost."""
+
+    name = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.load_seconds = None
+        self.load_rss_kb = None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            rss_before = _rss_kb()
+            started = time.perf_counter()
+            self.load()
+            self.load_seconds = time.perf_counter() - started
+            self.load_rss_kb = max(_rss_kb() - rss_before, 0)
+            self._loaded = True
+        logger.info(
+            f"Phone metadata provider {self.name} loaded in "
+            f"{self.load_seconds:.3f}s, +{self.load_rss_kb} KB RSS"
+        )
+
+    def load(self):
+        raise NotImplementedError
+
+    def country_name(self, parsed_number):
+        """English name of the number's country, or an empty string."""
+        self._ensure_loaded()
+        return self._country_name(parsed_number)
+
+    def carrier_name(self, parsed_number):
+        """Name of the carrier the number was allocated to, or an empty string."""
+        self._ensure_loaded()
+        return self._carrier_name(parsed_number)
+
+    def stats(self):
+        return {
+            "provider": self.name,
+            "loaded": self._loaded,
+            "load_seconds": self.load_seconds,
+            "load_rss_kb": self.load_rss_kb,
+        }
+
+
+class PhonenumbersMetadataProvider(PhoneMetadataProvider):
+    """Every region, from the phonenumbers geocoder and carrier modules."""
+
+    name = "phonenumbers"
+
+    def load(self):
+        from phonenumbers import carrier, geocoder
+
+        self._carrier = carrier
+        self._geocoder = geocoder
+
+    def _country_name(self, parsed_number):
+        return self._geocoder.country_name_for_number(parsed_number, "en")
+
+    def _carrier_name(self, parsed_number):
+        return self._carrier.name_for_number(parsed_number, "en")
+
+
+class CompactMetadataProvider(PhoneMetadataProvider):
+    """The served regions only, from the table written by `build_table`."""
+
+    name = "compact"
+
+    def __init__(self, path=None):
+        super().__init__()
+        self.path = path or settings.PHONE_METADATA_TABLE_PATH
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                table = json.load(f)
+        except FileNotFoundError:
+            raise ImproperlyConfigured(
+                f"Phone metadata table {self.path} not found, "
+                "run the build_phone_metadata command"
+            )
+        self._countries = table["countries"]
+        self._carriers = table["carriers"]
+        self._longest_prefix = table["longest_prefix"]
+
+    def _country_name(self, parsed_number):
+        region = phonenumbers.region_code_for_number(parsed_number)
+        return self._countries.get(region, "")
+
+    def _carrier_name(self, parsed_number):
+        if phonenumbers.number_type(parsed_number) not in CARRIER_NUMBER_TYPES:
+            return ""
+        digits = f"{parsed_number.country_code}" + (
+            phonenumbers.national_significant_number(parsed_number)
+        )
+        for length in range(min(len(digits), self._longest_prefix), 0, -1):
+            carrier = self._carriers.get(digits[:length])
+            if carrier is not None:
+                return carrier
+        return ""
+
+    @staticmethod
+    def build_table(regions, path):
+        """
+        Extract the English country and carrier names of `regions` from
+        phonenumbers into a JSON table. Only this build loads the full data.
+
+        Returns:
+            dict: Number of countries and carrier prefixes written
+        """
+        from phonenumbers import geocoder
+        from phonenumbers.carrierdata import CARRIER_DATA
+
+        countries = {}
+        calling_codes = set()
+        for region in regions:
+            region = region.upper()
+            calling_code = phonenumbers.country_code_for_region(region)
+            if not calling_code:
+                raise ValueError(f"Unknown region {region!r}")
+            calling_codes.add(str(calling_code))
+            example = phonenumbers.example_number(region)
+            countries[region] = (
+                geocoder.country_name_for_number(example, "en") if example else ""
+            )
+
+        carriers = {
+            prefix: names["en"]
+            for prefix, names in CARRIER_DATA.items()
+            if "en" in names and any(prefix.startswith(cc) for cc in calling_codes)
+        }
+        table = {
+            "countries": countries,
+            "carriers": carriers,
+            "longest_prefix": max(map(len, carriers), default=0),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(table, f, ensure_ascii=False, separators=(",", ":"))
+        return {"countries": len(countries), "carriers": len(carriers)}
+
+
+PHONE_METADATA_PROVIDERS = {
+    provider.name: provider
+    for provider in (PhonenumbersMetadataProvider, CompactMetadataProvider)
+}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_phone_metadata():
+    """Return the process-wide provider selected by `PHONE_METADATA_PROVIDER`."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            try:
+                provider_class = PHONE_METADATA_PROVIDERS[
+                    settings.PHONE_METADATA_PROVIDER
+                ]
+            except KeyError:
+                raise ImproperlyConfigured(
+                    f"Unknown phone metadata provider "
+                    f"{settings.PHONE_METADATA_PROVIDER!r}, choose from: "
+                    f"{', '.join(PHONE_METADATA_PROVIDERS)}"
+                )
+            _provider = provider_class()
+    return _provider
@@ -0,0 +1,155 @@
+"""
+Batch validation and normalization of mobile numbers for partner onboarding.
+
+Numbers are checked in chunks by a process pool (parsing and the carrier and
+country lookups are CPU bound), and results are yielded in input order as
+soon as their chunk is done, so a report can be streamed for any file size.
+Uniqueness is then checked with one `number__in` query per chunk against the
+registered `MobileNumber` values, plus a running set for duplicates inside
+the batch itself.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import phonenumbers
+
+from ..models import MobileNumber
+from ..validators import mobile_number_error, parse_phone_number
+from .phone_metadata import get_phone_metadata
+
+DEFAULT_CHUNK_SIZE = 1000
+
+VALID = "valid"
+INVALID = "invalid"
+REGISTERED = "registered"  # Valid, but already used by a MobileNumber
+DUPLICATE = "duplicate"  # Valid, but appeared earlier in the same batch
+
+REPORT_FIELDS = [
+    "row",
+    "input",
+    "status",
+    "e164",
+    "country_code",
+    "country_iso",
+    "country_name",
+    "carrier",
+    "number_type",
+    "error",
+]
+
+
+def check_mobile_number(raw):
+    """
+    Validate, normalize and enrich one number.
+
+    Returns:
+        dict: The `REPORT_FIELDS` (without `row`); `status` is `VALID` or
+        `INVALID` at this stage
+    """
+    raw = (raw or "").strip()
+    result = {field: "" for field in REPORT_FIELDS if field != "row"}
+    result["input"] = raw
+
+    error = mobile_number_error(raw) if raw else "Missing phone number."
+    if error is not None:
+        result.update(status=INVALID, error=str(error))
+        return result
+
+    parsed_number = parse_phone_number(raw)
+    result.update(
+        status=VALID,
+        e164=phonenumbers.format_number(
+            parsed_number, phonenumbers.PhoneNumberFormat.E164
+        ),
+        country_code=f"+{parsed_number.country_code}",
+        country_iso=phonenumbers.region_code_for_country_code(
+            parsed_number.country_code
+        ),
+        country_name=get_phone_metadata().country_name(parsed_number),
+        carrier=get_phone_metadata().carrier_name(parsed_number),
+        number_type=phonenumbers.PhoneNumberType.to_string(
+            phonenumbers.number_type(parsed_number)
+        ),
+    )
+    return result
+
+
+def _check_chunk(raw_numbers):
+    return [check_mobile_number(raw) for raw in raw_numbers]
+
+
+def _init_worker():
+    # Error messages are lazy translations, which need configured settings
+    import django
+
+    django.setup()
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _mark_taken(results, seen):
+    """Flag numbers already registered or repeated, with one query per chunk."""
+    numbers = {result["e164"] for result in results if result["status"] == VALID}
+    registered = set(
+        MobileNumber.objects.filter(number__in=numbers).values_list("number", flat=True)
+    )
+    for result in results:
+        if result["status"] != VALID:
+            continue
+        if result["e164"] in registered:
+            result.update(status=REGISTERED, error="Number is already registered.")
+        elif result["e164"] in seen:
+            result.update(
+                status=DUPLICATE, error="Number appears earlier in the batch."
+            )
+        else:
+            seen.add(result["e164"])
+
+
+def validate_mobile_numbers(numbers, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Check an iterable of raw numbers, yielding one result per input in order.
+
+    Args:
+        numbers: Iterable of raw phone number strings (may be a lazy stream)
+        workers (int, optional): Worker processes; defaults to the CPU count,
+            and 1 checks in this process
+        chunk_size (int): Numbers sent to a worker and checked for uniqueness
+            at once
+
+    Yields:
+        dict: The `REPORT_FIELDS`, `row` being the 1-based input position
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(numbers, chunk_size)
+    seen = set()
+    row = 0
+
+    def emit(results):
+        nonlocal row
+        _mark_taken(results, seen)
+        for result in results:
+            row += 1
+            yield {"row": row, **result}
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from emit(_check_chunk(chunk))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        # Bounded read-ahead: keep every worker busy without loading the
+        # whole input, and yield chunks in submission order
+        pending = []
+        for chunk in chunks:
+            pending.append(pool.submit(_check_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from emit(pending.pop(0).result())
+        for future in pending:
+            yield from emit(future.result())
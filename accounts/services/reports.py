@@ -0,0 +1,341 @@
+"""
+Streaming reports over donations, ratings, users and support tickets.
+
+A report reads its rows with a server-side cursor (`iterator(chunk_size=...)`),
+writes each one straight into a gzip-compressed CSV or JSONL temporary file
+and folds it into a running summary (row count, sums and per-value counts),
+so memory stays flat however many rows there are. The finished file is saved
+under `REPORTS_DIR`, which is not media: it is only downloaded through the
+authenticated `report_download` view, by its owner. The donations and users
+reports are for staff only; other users get the tickets and ratings they
+are involved in.
+
+While it runs, the requester's event stream gets `report.progress` events
+(every `REPORT_PROGRESS_STEP` percent); at the end they get a notification
+linking to the file, or telling them it failed.
+"""
+
+import csv
+import datetime
+import decimal
+import gzip
+import json
+import logging
+import tempfile
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from core.utils.events import publish
+from ..models import Donation, Notification, Rating, SupportTicket, User
+from . import notifications
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "jsonl")
+
+
+class ReportError(ValueError):
+    pass
+
+
+class Report:
+    """
+    A report definition.
+
+    Attributes:
+        model: The model reported on
+        columns: Output column -> field lookup
+        filters: Accepted filter -> field lookup
+        sum_columns: Numeric columns summed (and averaged) in the summary
+        group_columns: Columns whose values are counted in the summary
+        staff_only: Whether only staff users may request the report
+        owner_lookups: User id lookups of the rows a user is involved in; other
+            users get only those rows, staff get every row
+    """
+
+    name = None
+    model = None
+    columns = {}
+    filters = {}
+    sum_columns = ()
+    group_columns = ()
+    staff_only = False
+    owner_lookups = ()
+
+    def queryset(self, filters, owner_id=None):
+        """The rows of the report, only those of `owner_id` if given."""
+        unknown = set(filters) - set(self.filters)
+        if unknown:
+            raise ReportError(
+                f"Unknown {self.name} report filters: {', '.join(sorted(unknown))}; "
+                f"choose from {', '.join(self.filters)}"
+            )
+        queryset = self.model.objects.filter(
+            **{self.filters[name]: value for name, value in filters.items()}
+        )
+        if owner_id is not None:
+            owned = Q()
+            for lookup in self.owner_lookups:
+                owned |= Q(**{lookup: owner_id})
+            queryset = queryset.filter(owned) if owned else queryset.none()
+        return queryset.order_by("pk")
+
+
+class DonationReport(Report):
+    name = "donations"
+    model = Donation
+    columns = {
+        "id": "pk",
+        "timestamp": "timestamp",
+        "amount": "amount",
+        "supporter_id": "supporter_id",
+        "country": "supporter__country",
+        "badge_level": "supporter__badge_level",
+    }
+    filters = {
+        "date_from": "timestamp__date__gte",
+        "date_to": "timestamp__date__lte",
+        "country": "supporter__country",
+        "badge_level": "supporter__badge_level",
+    }
+    sum_columns = ("amount",)
+    group_columns = ("country", "badge_level")
+    staff_only = True
+
+
+class RatingReport(Report):
+    name = "ratings"
+    model = Rating
+    columns = {
+        "id": "pk",
+        "created_at": "created_at",
+        "job_seeker_id": "job_seeker_id",
+        "rater_id": "rater_id",
+        "rating": "rating",
+    }
+    filters = {
+        "date_from": "created_at__date__gte",
+        "date_to": "created_at__date__lte",
+        "job_seeker": "job_seeker_id",
+    }
+    sum_columns = ("rating",)
+    group_columns = ("rating",)
+    owner_lookups = ("rater_id", "job_seeker__user_id")
+
+
+class UserReport(Report):
+    name = "users"
+    model = User
+    columns = {
+        "id": "pk",
+        "username": "username",
+        "email": "email",
+        "role": "role",
+        "is_verified": "is_verified",
+        "created_at": "created_at",
+    }
+    filters = {
+        "date_from": "created_at__date__gte",
+        "date_to": "created_at__date__lte",
+        "role": "role",
+        "is_verified": "is_verified",
+    }
+    group_columns = ("role", "is_verified")
+    staff_only = True
+
+
+class TicketReport(Report):
+    name = "tickets"
+    model = SupportTicket
+    columns = {
+        "id": "pk",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+        "user_id": "user_id",
+        "status": "status",
+        "title": "title",
+    }
+    filters = {
+        "date_from": "created_at__date__gte",
+        "date_to": "created_at__date__lte",
+        "status": "status",
+    }
+    group_columns = ("status",)
+    owner_lookups = ("user_id",)
+
+
+REPORTS = {
+    report.name: report
+    for report in (DonationReport, RatingReport, UserReport, TicketReport)
+}
+
+
+def report_storage():
+    """Storage of the report files, outside of the served media."""
+    return FileSystemStorage(location=settings.REPORTS_DIR)
+
+
+def download_url(name):
+    """URL of the view serving a stored report to its owner."""
+    user_id, file_name = name.split("/")
+    return reverse(
+        "accounts:report_download",
+        kwargs={"user_id": user_id, "file_name": file_name},
+    )
+
+
+class Summary:
+    """Running aggregates of a report, updated one row at a time."""
+
+    def __init__(self, report):
+        self.rows = 0
+        self.sums = {column: decimal.Decimal(0) for column in report.sum_columns}
+        self.groups = {column: Counter() for column in report.group_columns}
+
+    def add(self, row):
+        self.rows += 1
+        for column in self.sums:
+            if row[column] is not None:
+                self.sums[column] += decimal.Decimal(row[column])
+        for column, counter in self.groups.items():
+            counter[str(row[column])] += 1
+
+    def result(self):
+        return {
+            "rows": self.rows,
+            "sums": {column: str(total) for column, total in self.sums.items()},
+            "means": {
+                column: str(round(total / self.rows, 4)) if self.rows else None
+                for column, total in self.sums.items()
+            },
+            "groups": {
+                column: dict(counter) for column, counter in self.groups.items()
+            },
+        }
+
+
+def _plain(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+class _Progress:
+    def __init__(self, user_id, report_id, total):
+        self.user_id = user_id
+        self.report_id = report_id
+        self.total = total
+        self.sent = -1
+
+    def update(self, done):
+        percent = 100 if not self.total else done * 100 // self.total
+        if percent - self.sent >= settings.REPORT_PROGRESS_STEP or percent == 100:
+            if percent != self.sent:
+                self.sent = percent
+                publish(
+                    self.user_id,
+                    "report.progress",
+                    {"report_id": self.report_id, "percent": percent},
+                )
+
+
+def _write(report, queryset, output, file_format, progress):
+    """Stream rows into `output` (a text stream), returning the summary."""
+    columns = list(report.columns)
+    summary = Summary(report)
+    writer = None
+    if file_format == "csv":
+        writer = csv.writer(output)
+        writer.writerow(columns)
+
+    rows = queryset.values_list(*report.columns.values()).iterator(
+        chunk_size=settings.REPORT_CHUNK_SIZE
+    )
+    for done, values in enumerate(rows, start=1):
+        row = dict(zip(columns, map(_plain, values)))
+        summary.add(row)
+        if writer is not None:
+            writer.writerow(row.values())
+        else:
+            output.write(json.dumps(row, ensure_ascii=False) + "\n")
+        if done % settings.REPORT_CHUNK_SIZE == 0:
+            progress.update(done)
+    progress.update(summary.rows)
+    return summary.result()
+
+
+def generate_report(
+    report_type, user_id, filters=None, file_format="csv", report_id=None
+):
+    """
+    Build a report file and notify the user who requested it. Users who are
+    not staff only get the rows they are involved in.
+
+    Args:
+        report_type (str): One of `REPORTS`
+        user_id: The requester, who gets progress events and a notification
+        filters (dict, optional): Report filters, see each `Report.filters`
+        file_format (str): "csv" or "jsonl", gzip-compressed either way
+        report_id (str, optional): Identifies the report in progress events
+
+    Returns:
+        dict: Storage `name` of the file and the report `summary`
+
+    Raises:
+        ReportError: If the report type, filters or format are invalid, or
+            the report is for staff and the user is not
+    """
+    if report_type not in REPORTS:
+        raise ReportError(
+            f"Unknown report {report_type!r}, choose from {', '.join(REPORTS)}"
+        )
+    if file_format not in FORMATS:
+        raise ReportError(f"Unknown format {file_format!r}, choose from {FORMATS}")
+    report = REPORTS[report_type]()
+    is_staff = User.objects.filter(pk=user_id, is_staff=True, is_active=True).exists()
+    if report.staff_only and not is_staff:
+        raise ReportError(f"The {report_type} report is only available to staff")
+    report_id = report_id or uuid.uuid4().hex
+
+    try:
+        queryset = report.queryset(filters or {}, None if is_staff else user_id)
+        progress = _Progress(user_id, report_id, queryset.count())
+        with tempfile.TemporaryFile() as temp:
+            with gzip.open(temp, "wt", encoding="utf-8", newline="") as output:
+                summary = _write(report, queryset, output, file_format, progress)
+            temp.seek(0)
+            stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+            name = report_storage().save(
+                f"{user_id}/{report_type}-{stamp}.{file_format}.gz", File(temp)
+            )
+    except Exception:
+        notifications.notify(
+            [user_id],
+            f"Your {report_type} report could not be generated.",
+            notification_type=Notification.NotificationType.ERROR,
+            data={"report_id": report_id, "report_type": report_type},
+        )
+        raise
+
+    notifications.notify(
+        [user_id],
+        f"Your {report_type} report is ready ({summary['rows']} rows).",
+        notification_type=Notification.NotificationType.SUCCESS,
+        data={
+            "report_id": report_id,
+            "report_type": report_type,
+            "file": name,
+            "url": download_url(name),
+        },
+    )
+    logger.info(f"Report {report_type} for user {user_id}: {summary['rows']} rows")
+    return {"name": name, "summary": summary}
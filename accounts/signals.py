@@ -1,6 +1,11 @@
-from django.core.cache import cache
-from django.db.models.signals import post_save
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
+
+from core.utils.events import publish
 from .models import (
     User,
     JobSeekerProfile,
@@ -9,7 +14,14 @@ from .models import (
     SupporterProfile,
     Rating,
     Donation,
+    WorkSpace,
+    MobileNumber,
+    SupportTicket,
 )
+from .models.location import Location
+from .models.support import TicketComment
+
+logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=User)
@@ -50,19 +62,370 @@ def update_supporter_badge_on_donation(sender, instance, created, **kwargs):
     """
     Update supporter badge level when a new donation is made or an existing one is updated.
     """
-    if (
-        created
-        or kwargs.get("update_fields") is not None
-        and "amount" in kwargs.get("update_fields")
-    ):
+    # `Donation.save` resets the original state only after this signal has run
+    supporter_changed = instance.supporter_id != instance._original_supporter_id
+    if supporter_changed and not created:
+        SupporterProfile.objects.update_badge_level(
+            SupporterProfile.objects.get(pk=instance._original_supporter_id)
+        )
+    if created or supporter_changed or instance.amount != instance._original_amount:
         SupporterProfile.objects.update_badge_level(instance.supporter)
 
 
+def _supporter_deleted_with(instance, origin):
+    """Whether a deleted donation goes away with its supporter, in a cascade."""
+    return instance.supporter_id in getattr(origin, "_deleted_supporter_ids", ())
+
+
+@receiver(pre_delete, sender=SupporterProfile)
+def remember_deleted_supporter(sender, instance, origin=None, **kwargs):
+    """
+    Flag the supporter on the object the delete started from, so the donation
+    receivers skip the per-row work for the donations cascading with it, and
+    keep the days of those donations for `forget_deleted_supporter`.
+    """
+    if origin is not None:
+        if not hasattr(origin, "_deleted_supporter_ids"):
+            origin._deleted_supporter_ids = set()
+        origin._deleted_supporter_ids.add(instance.pk)
+    instance._donation_days = list(
+        Donation.objects.filter(supporter_id=instance.pk).datetimes("timestamp", "day")
+    )
+
+
+@receiver(post_delete, sender=SupporterProfile)
+def forget_deleted_supporter(sender, instance, **kwargs):
+    """
+    Rebuild the rollups of the days the supporter donated on and take them off
+    the donor leaderboards, once for all their donations.
+    """
+    days = getattr(instance, "_donation_days", [])
+    if not days:
+        return
+
+    from .services.donation_rollups import mark_days_dirty
+    from .services.leaderboards import remove_donor
+
+    def forget():
+        mark_days_dirty(timezone.localdate(moment) for moment in days)
+        _update_leaderboards(remove_donor, instance.pk, instance.country, days)
+
+    transaction.on_commit(forget)
+
+
+@receiver(post_delete, sender=Donation)
+def remove_donation_from_totals(sender, instance, origin=None, **kwargs):
+    """
+    Subtract a deleted donation from the supporter's aggregates and re-evaluate
+    the badge. Runs inside the delete transaction.
+    """
+    if _supporter_deleted_with(instance, origin):
+        return
+    SupporterProfile.objects.apply_donation_delta(
+        instance.supporter_id, -instance._original_amount, -1
+    )
+    SupporterProfile.objects.update_badge_level(instance.supporter)
+
+
+@receiver(post_save, sender=Donation)
+@receiver(post_delete, sender=Donation)
+def mark_donation_rollup_dirty(sender, instance, created=False, origin=None, **kwargs):
+    """
+    Rebuild the rollups of the donation's day when an already processed
+    donation is edited or deleted, and of the day it moved away from when its
+    timestamp changed. New donations are picked up by the rollup watermark
+    instead.
+    """
+    if created or _supporter_deleted_with(instance, origin):
+        return
+
+    from .services.donation_rollups import mark_days_dirty
+
+    days = {
+        timezone.localdate(instance.timestamp),
+        timezone.localdate(instance._original_timestamp),
+    }
+    transaction.on_commit(lambda: mark_days_dirty(days))
+
+
+def _job_seeker_deleted_with(instance, origin):
+    """Whether a deleted rating goes away with its job seeker, in a cascade."""
+    return instance.job_seeker_id in getattr(origin, "_deleted_job_seeker_ids", ())
+
+
+@receiver(pre_delete, sender=JobSeekerProfile)
+def remember_deleted_job_seeker(sender, instance, origin=None, **kwargs):
+    """
+    Flag the job seeker on the object the delete started from, so the rating
+    receivers skip the per-row work for the ratings cascading with it.
+    """
+    if origin is not None:
+        if not hasattr(origin, "_deleted_job_seeker_ids"):
+            origin._deleted_job_seeker_ids = set()
+        origin._deleted_job_seeker_ids.add(instance.pk)
+
+
+@receiver(post_delete, sender=Rating)
+def remove_rating_from_aggregates(sender, instance, origin=None, **kwargs):
+    """
+    Subtract a deleted rating from the job seeker's aggregates. Runs inside the
+    delete transaction, including cascades and queryset deletes, unless the
+    job seeker is deleted too.
+    """
+    if _job_seeker_deleted_with(instance, origin):
+        return
+    JobSeekerProfile.objects.apply_rating_delta(
+        instance.job_seeker_id, -instance._original_rating, -1
+    )
+
+
+@receiver(post_delete, sender=JobSeekerProfile)
+def discard_job_seeker_from_matching_index(sender, instance, **kwargs):
+    from .services.matching import discard_from_matching_index
+
+    discard_from_matching_index(instance.pk)
+
+
+@receiver(post_delete, sender=JobSeekerProfile)
+def remove_job_seeker_from_leaderboard(sender, instance, **kwargs):
+    """Take the job seeker off the freelancer board, once for all their ratings."""
+    from .services.leaderboards import record_rating
+
+    transaction.on_commit(lambda: _update_leaderboards(record_rating, instance.pk))
+
+
+@receiver(post_delete, sender=JobSeekerProfile)
+@receiver(post_delete, sender=CompanyProfile)
+@receiver(post_delete, sender=IndividualClientProfile)
+@receiver(post_delete, sender=SupporterProfile)
+def release_profile_media_blobs(sender, instance, **kwargs):
+    from .services.media_blobs import release
+
+    for field in instance.RENDITION_FIELDS:
+        if field not in instance.get_deferred_fields():
+            release(getattr(instance, field).name)
+
+
+def _update_leaderboards(update, *args):
+    """Run a leaderboard update; Redis trouble must never fail the write itself."""
+    try:
+        update(*args)
+    except Exception:
+        logger.exception("Failed to update leaderboards")
+
+
+@receiver(post_save, sender=Donation)
+def update_donor_leaderboards(sender, instance, created, **kwargs):
+    """
+    Apply the donation's change to the donor leaderboards after commit: an
+    edited donation leaves the boards of its previous supporter and time, and
+    is added to those of its current ones.
+    """
+    from .services.leaderboards import record_donations
+
+    if created:
+        entries = [(instance.supporter, instance.amount, instance.timestamp)]
+    elif (
+        instance.supporter_id != instance._original_supporter_id
+        or instance.amount != instance._original_amount
+        or instance.timestamp != instance._original_timestamp
+    ):
+        previous = (
+            instance.supporter
+            if instance.supporter_id == instance._original_supporter_id
+            else SupporterProfile.objects.get(pk=instance._original_supporter_id)
+        )
+        entries = [
+            (previous, -instance._original_amount, instance._original_timestamp),
+            (instance.supporter, instance.amount, instance.timestamp),
+        ]
+    else:
+        return
+
+    transaction.on_commit(lambda: _update_leaderboards(record_donations, entries))
+
+
+@receiver(post_delete, sender=Donation)
+def remove_donation_from_leaderboards(sender, instance, origin=None, **kwargs):
+    from .services.leaderboards import record_donations
+
+    if _supporter_deleted_with(instance, origin):
+        return
+
+    entries = [
+        (instance.supporter, -instance._original_amount, instance._original_timestamp)
+    ]
+    transaction.on_commit(lambda: _update_leaderboards(record_donations, entries))
+
+
+@receiver(pre_save, sender=SupporterProfile)
+def remember_supporter_country(sender, instance, **kwargs):
+    """Keep the country and total a supporter had before this save."""
+    instance._previous_country_total = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("country", "total_donations")
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=SupporterProfile)
+def move_donor_country(sender, instance, **kwargs):
+    """Carry the supporter's total to their new country board after commit."""
+    from .services.leaderboards import move_donor
+
+    previous = getattr(instance, "_previous_country_total", None)
+    if previous is None:
+        return
+    old_country, total = previous
+    if old_country == instance.country or not total:
+        return
+    transaction.on_commit(
+        lambda: _update_leaderboards(
+            move_donor, instance.pk, old_country, instance.country, total
+        )
+    )
+
+
+@receiver(post_save, sender=User)
+def refresh_leaderboard_names(sender, instance, created, update_fields=None, **kwargs):
+    """Show a renamed user's new name on the leaderboards after commit."""
+    from .services.leaderboards import refresh_names
+
+    name_fields = {"first_name", "last_name", "username"}
+    if created or (update_fields is not None and not name_fields & set(update_fields)):
+        return
+    transaction.on_commit(lambda: _update_leaderboards(refresh_names, instance))
+
+
 @receiver(post_save, sender=Rating)
-def invalidate_rating_cache(sender, instance, **kwargs):
-    from accounts.constants import CacheKeys
+@receiver(post_delete, sender=Rating)
+def update_freelancer_leaderboard(sender, instance, origin=None, **kwargs):
+    """Re-sync the rated job seeker(s) on the freelancer leaderboard after commit."""
+    from .services.leaderboards import record_rating
+
+    if _job_seeker_deleted_with(instance, origin):
+        return
+    job_seeker_ids = {instance.job_seeker_id, instance._original_job_seeker_id}
+    for job_seeker_id in job_seeker_ids - {None}:
+        transaction.on_commit(
+            lambda job_seeker_id=job_seeker_id: _update_leaderboards(
+                record_rating, job_seeker_id
+            )
+        )
+
+
+def _invalidate_map_tiles(points, layers=None):
+    """Drop cached map tiles after commit; cache trouble must never fail the write."""
+    from .services.map_clusters import invalidate_points
+
+    def invalidate():
+        try:
+            invalidate_points(points, layers)
+        except Exception:
+            logger.exception("Failed to invalidate map tiles")
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location_map_tiles(sender, instance, **kwargs):
+    """A moved, re-geocoded or deleted location changes the tiles around it."""
+    points = [(instance.latitude, instance.longitude)]
+    previous = getattr(instance, "_previous_coordinates", None)
+    if previous and previous != points[0]:
+        points.append(previous)
+    _invalidate_map_tiles(points)
+
+
+def _map_point(location_id):
+    return (
+        Location.objects.filter(pk=location_id)
+        .values_list("latitude", "longitude")
+        .first()
+    )
+
+
+@receiver(pre_save, sender=WorkSpace)
+@receiver(pre_save, sender=CompanyProfile)
+def remember_map_location(sender, instance, **kwargs):
+    """Keep the location a workspace or company is moving away from."""
+    from .services.map_clusters import layer_for_model
+
+    _, location_field = layer_for_model(sender)
+    instance._previous_map_location_id = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list(f"{location_field}_id", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=WorkSpace)
+@receiver(post_delete, sender=WorkSpace)
+@receiver(post_save, sender=CompanyProfile)
+@receiver(post_delete, sender=CompanyProfile)
+def invalidate_map_layer_tiles(sender, instance, **kwargs):
+    """Refresh the tiles of the layer the saved or deleted point belongs to."""
+    from .services.map_clusters import layer_for_model
+
+    layer, location_field = layer_for_model(sender)
+    location_ids = {
+        getattr(instance, f"{location_field}_id"),
+        getattr(instance, "_previous_map_location_id", None),
+    } - {None}
+    points = [_map_point(location_id) for location_id in location_ids]
+    _invalidate_map_tiles(points, [layer])
+
+
+@receiver(post_save, sender=SupportTicket)
+def publish_ticket_update(sender, instance, created, **kwargs):
+    if created:
+        return
+    transaction.on_commit(
+        lambda: publish(
+            instance.user_id,
+            "ticket.updated",
+            {"ticket_id": instance.pk, "status": instance.status},
+        )
+    )
+
+
+@receiver(post_save, sender=TicketComment)
+def publish_ticket_reply(sender, instance, created, **kwargs):
+    """Tell the ticket owner about replies, by staff or anyone else."""
+    if not created:
+        return
+    owner_id = (
+        SupportTicket.objects.filter(pk=instance.ticket_id)
+        .values_list("user_id", flat=True)
+        .first()
+    )
+    if owner_id is None or owner_id == instance.user_id:
+        return
+    transaction.on_commit(
+        lambda: publish(
+            owner_id,
+            "ticket.reply",
+            {"ticket_id": instance.ticket_id, "comment_id": instance.pk},
+        )
+    )
+
 
-    cache_key = CacheKeys.JOB_SEEKER_RATING.build_key(
-        job_seeker_id=instance.job_seeker_id
+@receiver(post_save, sender=MobileNumber)
+def publish_verification_status(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "verification_status" not in update_fields:
+        return
+    transaction.on_commit(
+        lambda: publish(
+            instance.user_id,
+            "mobile_number.verification",
+            {
+                "status": instance.verification_status,
+                "is_verified": instance.is_verified,
+            },
+        )
     )
-    cache.delete(cache_key)
@@ -1,8 +1,12 @@
+import io
 import logging
 
 from celery import shared_task
-from geopy.geocoders import Nominatim
+from celery.exceptions import Retry
+from django.conf import settings
+from django.core.files.storage import default_storage
 
+from .models import SupporterProfile
 from .models.location import Location
 
 logger = logging.getLogger(__name__)
@@ -15,24 +19,32 @@ def geocode_location(self, location_id):
     """
     Celery background task to geocode a Location object using its latitude and longitude.
     It populates address_line1, city, state_province, postal_code, and country.
+
+    Coordinates are resolved by the backends configured in `GEOCODING_BACKENDS`
+    (the offline gazetteer and/or Nominatim). Nominatim results are looked up
+    in the geocode cache first, and the service is only called for cells never
+    resolved before, when the shared rate limit has a token for it. Bulk work
+    should go through `enqueue_geocoding` instead.
     """
+    from .services.geocoding import (
+        LOCATION_ADDRESS_FIELDS,
+        GeocodingRateLimited,
+        apply_address,
+        resolve_address,
+    )
+
     try:
         location_obj = Location.objects.get(id=location_id)
 
         # Only attempt geocoding if latitude and longitude are available
         if location_obj.latitude is not None and location_obj.longitude is not None:
-            geolocator = Nominatim(
-                user_agent="coworking_locator_app"
-            )  # Use a unique user_agent
-
             try:
-                # Set a timeout for the geocoding request to prevent hanging
-                location_data = geolocator.reverse(
-                    (location_obj.latitude, location_obj.longitude),
-                    language="en",
-                    exactly_one=True,  # Get the most relevant single result
-                    timeout=10,  # Increased timeout to 10 seconds for reliability
+                address = resolve_address(
+                    location_obj.latitude, location_obj.longitude, max_wait=5
                 )
+            except GeocodingRateLimited as e:
+                # Wait for our turn instead of hitting the provider anyway
+                raise self.retry(exc=e, countdown=e.wait)
             except Exception as e:
                 # Catch specific geocoding service errors (e.g., network issues, API limits)
                 logger.error(
@@ -42,33 +54,12 @@ def geocode_location(self, location_id):
                 # Retry the task if a transient error occurred
                 raise self.retry(exc=e)
 
-            if location_data and "address" in location_data.raw:
-                address = location_data.raw["address"]
-
-                # Populate the fields from the geocoding result.
-                # Use .get() with a default of None to prevent KeyError if a key is missing.
-                location_obj.address_line1 = address.get("road", "") + (
-                    f" {address.get('house_number')}"
-                    if address.get("house_number")
-                    else ""
-                )
-                location_obj.city = (
-                    address.get("city") or address.get("town") or address.get("village")
-                )
-                location_obj.state_province = address.get("state")
-                location_obj.postal_code = address.get("postcode")
-                location_obj.country = address.get("country")
+            if address:
+                apply_address(location_obj, address)
 
                 # Save only the updated fields to minimize database writes
                 location_obj.save(
-                    update_fields=[
-                        "address_line1",
-                        "city",
-                        "state_province",
-                        "postal_code",
-                        "country",
-                        "updated_at",
-                    ]
+                    update_fields=LOCATION_ADDRESS_FIELDS + ["updated_at"]
                 )
                 logger.info(
                     f"Geocoding successful for Location {location_id}: {location_obj.city}, {location_obj.country}"
@@ -83,9 +74,120 @@ def geocode_location(self, location_id):
             )
     except Location.DoesNotExist:
         logger.error(f"Location with ID {location_id} does not exist. Task aborted.")
+    except Retry:
+        raise
     except Exception:
         # Catch any other unexpected errors during task execution
         logger.exception(
             f"An unexpected error occurred during geocoding for Location {location_id}."
         )
         # For simplicity, we just log here, but in production, you'd log and potentially retry.
+
+
+@shared_task
+def process_geocoding_queue(batch_size=None):
+    """
+    Geocode the next batch of locations waiting in the Redis pending set.
+    The batch reschedules itself while work remains.
+
+    Args:
+        batch_size (int, optional): Locations per run; defaults to
+            `GEOCODING_BATCH_SIZE`
+    """
+    from .services.geocoding import process_geocoding_batch
+
+    return process_geocoding_batch(batch_size=batch_size)
+
+
+@shared_task
+def recalculate_badge_levels(chunk_size=10000):
+    """
+    Re-tier every supporter from their stored donation totals using chunked
+    set-based UPDATEs.
+
+    Args:
+        chunk_size (int): Primary key window handled by each UPDATE
+    """
+    updated = SupporterProfile.objects.recalculate_badge_levels(chunk_size=chunk_size)
+    logger.info(f"Badge levels recalculated: {updated} supporters changed level")
+    return updated
+
+
+@shared_task
+def rebuild_leaderboards():
+    """
+    Recreate the leaderboards from the database, correcting any drift of the
+    incremental updates.
+    """
+    from .services.leaderboards import rebuild_leaderboards as rebuild
+
+    return rebuild()
+
+
+@shared_task
+def import_donations_file(file_name, file_format=None, chunk_size=5000):
+    """
+    Import a partner donation file stored in the default storage.
+
+    Args:
+        file_name (str): Name of the file in the default storage
+        file_format (str, optional): "csv" or "jsonl"; guessed from the extension
+        chunk_size (int): Rows written per transaction
+    """
+    from .services.donation_import import detect_format, import_donations
+
+    with default_storage.open(file_name, "rb") as raw:
+        stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        report = import_donations(
+            stream,
+            file_format=file_format or detect_format(file_name),
+            chunk_size=chunk_size,
+        )
+    return report.as_dict()
+
+
+@shared_task
+def refresh_donation_rollups():
+    """
+    Fold donations newer than the rollup watermark, and any dirty days, into
+    the daily and monthly donation rollups.
+    """
+    from .services.donation_rollups import refresh_donation_rollups as refresh
+
+    return refresh()
+
+
+@shared_task
+def store_media_blob_renditions(metadata):
+    """
+    Keep rendition metadata on its media blob, so later uploads of the same
+    content reuse it. Linked after `core.tasks.render_image_renditions`.
+    """
+    from .services.media_blobs import store_renditions
+
+    if metadata:
+        store_renditions(metadata)
+
+
+@shared_task
+def collect_unused_media_blobs():
+    """Delete media blobs no image field referenced during the retention period."""
+    from .services.media_blobs import collect_unused
+
+    return collect_unused()
+
+
+@shared_task
+def notify_supporters_task(badge_level, message, notification_type="info", data=None):
+    """
+    Notify every supporter of a badge level, in chunked inserts and Redis
+    calls rather than one task per user.
+    """
+    from .services.notifications import notify
+
+    user_ids = (
+        SupporterProfile.objects.filter(badge_level=badge_level)
+        .values_list("user_id", flat=True)
+        .iterator(chunk_size=settings.NOTIFICATION_FANOUT_CHUNK_SIZE)
+    )
+    return notify(user_ids, message, notification_type=notification_type, data=data)
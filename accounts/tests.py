@@ -1,3 +1,1350 @@
-from django.test import TestCase
+import datetime
+import gzip
+import io
+import pathlib
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from core.utils.geo import geohash_encode, haversine_km, tile_for_point
+from core.utils.rate_limit import TokenBucket
+
+from .constants import BadgeLevel, CacheKeys
+from .models import (
+    Donation,
+    DonationRollup,
+    GeocodeCacheEntry,
+    JobSeekerProfile,
+    MediaBlob,
+    MobileNumber,
+    Rating,
+    RollupWatermark,
+    SupporterProfile,
+    SupportTicket,
+    User,
+    WorkSpace,
+)
+from .models.location import Location
+from .services import (
+    geocoding,
+    image_rerender,
+    leaderboards,
+    map_clusters,
+    matching,
+    media_blobs,
+    notifications,
+    otp,
+)
+from .services.donation_import import import_donations
+from .services.gazetteer import Gazetteer, build_gazetteer
+from .services.donation_rollups import mark_days_dirty, refresh_donation_rollups
+from .services.reports import ReportError, generate_report, report_storage
+from .services.matching import JobSeekerMatchingIndex
+
+
+def make_user(username, role=User.UserRole.JOB_SEEKER, **kwargs):
+    return User.objects.create_user(username=username, role=role, **kwargs)
+
+
+def make_job_seeker(username, **kwargs):
+    fields = {
+        "specialization": "Python",
+        "field_of_work": "Software",
+        "date_of_birth": datetime.date(1995, 1, 1),
+        **kwargs,
+    }
+    return JobSeekerProfile.objects.create(user=make_user(username), **fields)
+
+
+class JobSeekerMatchingTests(TestCase):
+    def setUp(self):
+        matching._index = None
+        self.senior = make_job_seeker(
+            "senior",
+            experience_level=JobSeekerProfile.ExperienceLevel.SENIOR,
+            expected_hourly_rate=Decimal("40"),
+        )
+        self.junior = make_job_seeker(
+            "junior",
+            experience_level=JobSeekerProfile.ExperienceLevel.JUNIOR,
+            expected_hourly_rate=Decimal("20"),
+        )
+        self.designer = make_job_seeker(
+            "designer",
+            specialization="Design",
+            field_of_work="Media",
+            experience_level=JobSeekerProfile.ExperienceLevel.SENIOR,
+        )
+
+    def _index(self):
+        index = JobSeekerMatchingIndex()
+        index.build()
+        return index
+
+    def test_ranks_by_weighted_criteria(self):
+        ranked = self._index().top_k(
+            k=3,
+            specialization=" python ",
+            field_of_work="software",
+            experience_level=JobSeekerProfile.ExperienceLevel.SENIOR,
+        )
+
+        self.assertEqual(
+            [profile_id for profile_id, _ in ranked],
+            [self.senior.pk, self.junior.pk, self.designer.pk],
+        )
+        scores = [score for _, score in ranked]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_returns_at_most_k_results(self):
+        ranked = self._index().top_k(k=1, specialization="Python")
+
+        self.assertEqual(len(ranked), 1)
+        self.assertIn(ranked[0][0], {self.senior.pk, self.junior.pk})
+        self.assertEqual(self._index().top_k(k=0), [])
+
+    def test_budget_favours_seekers_within_it(self):
+        ranked = self._index().top_k(
+            k=2, specialization="Python", max_hourly_rate=Decimal("20")
+        )
+
+        self.assertEqual(ranked[0][0], self.junior.pk)
+
+    def test_hard_filters(self):
+        JobSeekerProfile.objects.filter(pk=self.junior.pk).update(is_available=False)
+        JobSeekerProfile.objects.filter(pk=self.designer.pk).update(is_employed=True)
+        JobSeekerProfile.objects.filter(pk=self.senior.pk).update(rating=4.5)
+        index = self._index()
+
+        self.assertNotIn(
+            self.junior.pk, [profile_id for profile_id, _ in index.top_k(k=3)]
+        )
+        self.assertEqual(
+            [profile_id for profile_id, _ in index.top_k(k=3, include_employed=False)],
+            [self.senior.pk],
+        )
+        self.assertEqual(
+            [profile_id for profile_id, _ in index.top_k(k=3, min_rating=4)],
+            [self.senior.pk],
+        )
+
+    def test_refresh_applies_changed_and_new_profiles(self):
+        index = self._index()
+        self.junior.specialization = "Design"
+        self.junior.save()
+        newcomer = make_job_seeker("newcomer")
+        designer_id = self.designer.pk
+        self.designer.delete()
+        index.discard(designer_id)
+
+        self.assertEqual(index.refresh(), 2)
+        ranked = [
+            profile_id for profile_id, _ in index.top_k(k=3, specialization="Python")
+        ]
+        self.assertEqual(set(ranked[:2]), {self.senior.pk, newcomer.pk})
+        self.assertEqual(ranked[2:], [self.junior.pk])
+
+    def test_top_matches_resolves_profiles(self):
+        matches = JobSeekerProfile.objects.top_matches(
+            k=2,
+            specialization="Python",
+            experience_level=JobSeekerProfile.ExperienceLevel.SENIOR,
+        )
+
+        self.assertEqual(
+            [profile for profile, _ in matches], [self.senior, self.junior]
+        )
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        self.seeker = make_job_seeker("seeker")
+        self.other = make_job_seeker("other")
+        self.raters = [make_user(f"rater{i}") for i in range(3)]
+
+    def aggregates(self, profile):
+        return JobSeekerProfile.objects.values_list(
+            "rating_sum", "rating_count", "rating"
+        ).get(pk=profile.pk)
+
+    def test_create(self):
+        Rating.objects.create(rater=self.raters[0], job_seeker=self.seeker, rating=5)
+        Rating.objects.create(rater=self.raters[1], job_seeker=self.seeker, rating=2)
+
+        self.assertEqual(self.aggregates(self.seeker), (7, 2, 3.5))
+
+    def test_edit(self):
+        rating = Rating.objects.create(
+            rater=self.raters[0], job_seeker=self.seeker, rating=5
+        )
+        Rating.objects.create(rater=self.raters[1], job_seeker=self.seeker, rating=3)
+
+        rating.rating = 1
+        rating.save()
+
+        self.assertEqual(self.aggregates(self.seeker), (4, 2, 2.0))
+
+    def test_retarget(self):
+        rating = Rating.objects.create(
+            rater=self.raters[0], job_seeker=self.seeker, rating=4
+        )
+        Rating.objects.create(rater=self.raters[1], job_seeker=self.seeker, rating=2)
+
+        rating.job_seeker = self.other
+        rating.rating = 5
+        rating.save()
+
+        self.assertEqual(self.aggregates(self.seeker), (2, 1, 2.0))
+        self.assertEqual(self.aggregates(self.other), (5, 1, 5.0))
+
+    def test_delete(self):
+        first = Rating.objects.create(
+            rater=self.raters[0], job_seeker=self.seeker, rating=4
+        )
+        second = Rating.objects.create(
+            rater=self.raters[1], job_seeker=self.seeker, rating=2
+        )
+
+        first.delete()
+        self.assertEqual(self.aggregates(self.seeker), (2, 1, 2.0))
+        second.delete()
+        self.assertEqual(self.aggregates(self.seeker), (0, 0, 0.0))
+
+    def test_queryset_delete(self):
+        for rater, value in zip(self.raters, (5, 4, 3)):
+            Rating.objects.create(rater=rater, job_seeker=self.seeker, rating=value)
+
+        Rating.objects.filter(rating__gte=4).delete()
+
+        self.assertEqual(self.aggregates(self.seeker), (3, 1, 3.0))
+
+    def test_saving_a_stale_profile_keeps_the_aggregates(self):
+        profile = JobSeekerProfile.objects.get(pk=self.seeker.pk)
+        Rating.objects.create(rater=self.raters[0], job_seeker=self.seeker, rating=4)
+
+        profile.bio = "Updated"
+        profile.save()
+        profile.save(update_fields=["bio", "rating", "rating_count"])
+
+        self.assertEqual(self.aggregates(self.seeker), (4, 1, 4.0))
+        self.assertEqual(JobSeekerProfile.objects.get(pk=self.seeker.pk).bio, "Updated")
+
+    def test_deleting_a_job_seeker_skips_the_per_rating_work(self):
+        for rater, value in zip(self.raters, (5, 4, 3)):
+            Rating.objects.create(rater=rater, job_seeker=self.seeker, rating=value)
+
+        with (
+            mock.patch.object(
+                JobSeekerProfile.objects, "apply_rating_delta"
+            ) as apply_rating_delta,
+            self.captureOnCommitCallbacks(execute=False) as callbacks,
+        ):
+            self.seeker.user.delete()
+
+        apply_rating_delta.assert_not_called()
+        self.assertFalse(Rating.objects.exists())
+        self.assertEqual(len(callbacks), 1)  # Leaderboard removal
+
+
+class DonationAggregateTests(TestCase):
+    def setUp(self):
+        self.supporter = make_user(
+            "supporter", role=User.UserRole.SUPPORTER
+        ).supporter_profile
+
+    def aggregates(self, supporter):
+        return SupporterProfile.objects.values_list(
+            "total_donations", "donation_count"
+        ).get(pk=supporter.pk)
+
+    def test_saving_a_stale_profile_keeps_the_aggregates(self):
+        profile = SupporterProfile.objects.get(pk=self.supporter.pk)
+        Donation.objects.create(supporter=self.supporter, amount=Decimal("600"))
+
+        profile.country = "Syria"
+        profile.save()
+
+        self.assertEqual(self.aggregates(self.supporter), (Decimal("600"), 1))
+        profile = SupporterProfile.objects.get(pk=self.supporter.pk)
+        self.assertEqual(profile.country, "Syria")
+        self.assertEqual(profile.badge_level, "silver")
+
+    def test_deleting_a_donation_updates_the_aggregates(self):
+        first = Donation.objects.create(supporter=self.supporter, amount=Decimal("600"))
+        Donation.objects.create(supporter=self.supporter, amount=Decimal("50"))
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            first.delete()
+
+        self.assertEqual(self.aggregates(self.supporter), (Decimal("50"), 1))
+        self.assertEqual(
+            SupporterProfile.objects.get(pk=self.supporter.pk).badge_level, "bronze"
+        )
+        self.assertEqual(len(callbacks), 2)  # Rollup day, leaderboards
+
+    def test_deleting_a_supporter_skips_the_per_donation_work(self):
+        for amount in ("10", "20", "30"):
+            Donation.objects.create(supporter=self.supporter, amount=Decimal(amount))
+
+        with (
+            mock.patch.object(
+                SupporterProfile.objects, "apply_donation_delta"
+            ) as apply_donation_delta,
+            self.captureOnCommitCallbacks(execute=False) as callbacks,
+        ):
+            self.supporter.user.delete()
+
+        apply_donation_delta.assert_not_called()
+        self.assertFalse(Donation.objects.exists())
+        self.assertEqual(len(callbacks), 1)
+
+
+class BadgeLevelRecalculationTests(TestCase):
+    TOTALS = {
+        "0": BadgeLevel.BRONZE,
+        "499.99": BadgeLevel.BRONZE,
+        "500": BadgeLevel.SILVER,
+        "2000": BadgeLevel.GOLD,
+        "9999.99": BadgeLevel.PLATINUM,
+        "10000": BadgeLevel.DIAMOND,
+    }
+
+    def setUp(self):
+        self.supporters = {}
+        for i, total in enumerate(self.TOTALS):
+            supporter = make_user(
+                f"supporter{i}", role=User.UserRole.SUPPORTER
+            ).supporter_profile
+            SupporterProfile.objects.filter(pk=supporter.pk).update(
+                total_donations=Decimal(total), badge_level=BadgeLevel.GOLD
+            )
+            self.supporters[total] = supporter.pk
+
+    def badge_levels(self):
+        levels = dict(SupporterProfile.objects.values_list("pk", "badge_level"))
+        return {total: levels[pk] for total, pk in self.supporters.items()}
+
+    def test_case_matches_the_thresholds(self):
+        for total, badge in self.TOTALS.items():
+            self.assertEqual(BadgeLevel.for_amount(Decimal(total)), badge)
+
+        self.assertEqual(SupporterProfile.objects.recalculate_badge_levels(), 5)
+        self.assertEqual(self.badge_levels(), self.TOTALS)
+        self.assertEqual(SupporterProfile.objects.recalculate_badge_levels(), 0)
+
+    def test_chunked(self):
+        updated = SupporterProfile.objects.recalculate_badge_levels(chunk_size=2)
+
+        self.assertEqual(updated, 5)
+        self.assertEqual(self.badge_levels(), self.TOTALS)
+
+    def test_queryset(self):
+        queryset = SupporterProfile.objects.filter(pk=self.supporters["10000"])
+
+        self.assertEqual(SupporterProfile.objects.recalculate_badge_levels(queryset), 1)
+        self.assertEqual(self.badge_levels()["10000"], BadgeLevel.DIAMOND)
+        self.assertEqual(self.badge_levels()["0"], BadgeLevel.GOLD)
+
+
+class DonationImportTests(TestCase):
+    def setUp(self):
+        self.supporter = make_user(
+            "supporter", role=User.UserRole.SUPPORTER
+        ).supporter_profile
+
+    def test_csv_rejects_invalid_rows(self):
+        rows = [
+            "supporter_id,amount,timestamp",
+            f"{self.supporter.pk},25.00,2024-05-01T10:00:00+00:00",
+            f"{self.supporter.pk},600,",
+            f"x{self.supporter.pk},10,",
+            f"{self.supporter.pk},abc,",
+            f"{self.supporter.pk},0,",
+            f"{self.supporter.pk},1.001,",
+            f"{self.supporter.pk},10,yesterday",
+            f"{self.supporter.pk + 1000},10,",
+        ]
+
+        report = import_donations(io.StringIO("\n".join(rows)), chunk_size=3)
+
+        self.assertEqual((report.rows_read, report.created, report.rejected), (8, 2, 6))
+        self.assertEqual([line for line, _ in report.errors], [4, 5, 6, 7, 8, 9])
+        self.assertIn("does not exist", report.errors[-1][1])
+        self.assertEqual(
+            sorted(Donation.objects.values_list("amount", flat=True)),
+            [Decimal("25.00"), Decimal("600.00")],
+        )
+        self.assertEqual(
+            Donation.objects.get(amount=25).timestamp,
+            datetime.datetime(2024, 5, 1, 10, tzinfo=datetime.timezone.utc),
+        )
+        supporter = SupporterProfile.objects.get(pk=self.supporter.pk)
+        self.assertEqual(
+            (
+                supporter.total_donations,
+                supporter.donation_count,
+                supporter.badge_level,
+            ),
+            (Decimal("625.00"), 2, BadgeLevel.SILVER),
+        )
+        self.assertEqual(report.badges_changed, 1)
+
+    def test_jsonl_rejects_undecodable_lines(self):
+        lines = [
+            f'{{"supporter_id": {self.supporter.pk}, "amount": "5"}}',
+            "",
+            "{not json",
+            "[1, 2]",
+            f'{{"supporter_id": {self.supporter.pk}, "amount": 1e400}}',
+        ]
+
+        report = import_donations(io.StringIO("\n".join(lines)), "jsonl")
+
+        self.assertEqual((report.created, report.rejected), (1, 3))
+        self.assertEqual([line for line, _ in report.errors], [3, 4, 5])
+
+    def test_dry_run_writes_nothing(self):
+        data = f"supporter_id,amount\n{self.supporter.pk},25\n"
+
+        report = import_donations(io.StringIO(data), dry_run=True)
+
+        self.assertEqual(report.created, 1)
+        self.assertFalse(Donation.objects.exists())
+        self.assertEqual(
+            SupporterProfile.objects.get(pk=self.supporter.pk).donation_count, 0
+        )
+
+
+class DonationRollupTests(TestCase):
+    def setUp(self):
+        self.supporter = make_user(
+            "supporter", role=User.UserRole.SUPPORTER
+        ).supporter_profile
+
+    def donate(self, amount, day):
+        return Donation.objects.create(
+            supporter=self.supporter,
+            amount=Decimal(amount),
+            timestamp=datetime.datetime(2024, 5, day, 12, tzinfo=datetime.timezone.utc),
+        )
+
+    def day_totals(self):
+        return dict(
+            DonationRollup.objects.filter(period=DonationRollup.Period.DAY).values_list(
+                "period_start__day", "total_amount"
+            )
+        )
+
+    def test_picks_up_donations_committed_behind_the_watermark(self):
+        self.donate("10", 1)
+        late = self.donate("20", 1)
+        # A previous run read past the ids of rows that were not committed yet
+        RollupWatermark.objects.create(name="donations", last_id=late.pk)
+
+        refresh_donation_rollups()
+
+        self.assertEqual(self.day_totals(), {1: Decimal("30")})
+
+    def test_moving_a_donation_rebuilds_both_days(self):
+        donation = self.donate("10", 1)
+        self.donate("5", 2)
+        refresh_donation_rollups()
+
+        donation.timestamp = donation.timestamp + datetime.timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            donation.save()
+        refresh_donation_rollups()
+
+        self.assertEqual(self.day_totals(), {2: Decimal("15")})
+
+    def test_groups_keep_the_country_donations_were_made_from(self):
+        self.supporter.country = "Syria"
+        self.supporter.save()
+        self.donate("10", 1)
+        refresh_donation_rollups()
+        self.supporter.country = "Jordan"
+        self.supporter.save()
+        self.donate("5", 2)
+        # A rebuilt month must not move the earlier donation to the new country
+        mark_days_dirty([datetime.date(2024, 5, 1)])
+        refresh_donation_rollups()
+
+        months = DonationRollup.objects.filter(period=DonationRollup.Period.MONTH)
+        self.assertEqual(
+            sorted(months.values_list("country", "total_amount", "donor_count")),
+            [("Jordan", Decimal("5"), 1), ("Syria", Decimal("10"), 1)],
+        )
+
+
+def make_workspace(name, latitude, longitude, **kwargs):
+    location = Location.objects.create(latitude=latitude, longitude=longitude)
+    return WorkSpace.objects.create(
+        name=name,
+        owner_name="Owner",
+        contact_number=f"+96395{WorkSpace.objects.count():07d}",
+        location=location,
+        **kwargs,
+    )
+
+
+class LeaderboardTests(TestCase):
+    MAY = datetime.datetime(2024, 5, 10, 12, tzinfo=datetime.timezone.utc)
+    JUNE = datetime.datetime(2024, 6, 10, 12, tzinfo=datetime.timezone.utc)
+
+    def setUp(self):
+        self.clear()
+        self.addCleanup(self.clear)
+        self.first = self.make_supporter("first", "Syria")
+        self.second = self.make_supporter("second", "Syria")
+
+    def clear(self):
+        connection = leaderboards._redis()
+        keys = list(connection.scan_iter(match="leaderboard:*"))
+        if keys:
+            connection.delete(*keys)
+
+    def make_supporter(self, username, country):
+        profile = make_user(username, role=User.UserRole.SUPPORTER).supporter_profile
+        profile.country = country
+        profile.save()
+        return profile
+
+    def donate(self, supporter, amount, timestamp=MAY):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Donation.objects.create(
+                supporter=supporter, amount=Decimal(amount), timestamp=timestamp
+            )
+
+    def scores(self, **board):
+        return {
+            entry["id"]: entry["score"]
+            for entry in leaderboards.top_donors(at=self.MAY, **board)
+        }
+
+    def test_incremental_updates(self):
+        donation = self.donate(self.first, "10")
+        self.donate(self.second, "30")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            donation.amount = Decimal("50")
+            donation.save()
+        self.assertEqual(
+            leaderboards.top_donors(),
+            [
+                {"rank": 1, "id": self.first.pk, "name": "first", "score": 50.0},
+                {"rank": 2, "id": self.second.pk, "name": "second", "score": 30.0},
+            ],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            donation.delete()
+        self.assertEqual(self.scores(), {self.second.pk: 30.0})
+        self.assertEqual(self.scores(window="day"), self.scores())
+
+    def test_country_move(self):
+        self.donate(self.first, "10")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.country = "Jordan"
+            self.first.save()
+
+        self.assertEqual(self.scores(country="Jordan"), {self.first.pk: 10.0})
+        self.assertNotIn(self.first.pk, self.scores(country="Syria"))
+        self.assertEqual(leaderboards.donor_rank(self.first.pk, "Jordan"), 1)
+
+    def test_window_move(self):
+        donation = self.donate(self.first, "10")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            donation.timestamp = self.JUNE
+            donation.save()
+
+        self.assertEqual(self.scores(window="month"), {})
+        self.assertEqual(
+            leaderboards.top_donors(window="month", at=self.JUNE)[0]["score"], 10.0
+        )
+        self.assertEqual(self.scores(), {self.first.pk: 10.0})
+
+    def test_rename(self):
+        self.donate(self.first, "10")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.user.first_name = "Lina"
+            self.first.user.save()
+
+        self.assertEqual(leaderboards.top_donors()[0]["name"], "Lina")
+
+    def test_rebuild(self):
+        self.donate(self.first, "10")
+        self.donate(self.second, "20", timestamp=timezone.now())
+        self.clear()
+        leaderboards._redis().zadd(
+            leaderboards._key(leaderboards.DONORS, "country:Gone"), {"1": 5}
+        )
+
+        leaderboards.rebuild_leaderboards()
+
+        self.assertEqual(self.scores(), {self.first.pk: 10.0, self.second.pk: 20.0})
+        self.assertEqual(self.scores(country="Gone"), {})
+        self.assertEqual(
+            [
+                (entry["id"], entry["name"])
+                for entry in leaderboards.top_donors(window="day", at=timezone.now())
+            ],
+            [(self.second.pk, "second")],
+        )
+
+
+class GeocodeCacheTests(TestCase):
+    ADDRESS = {
+        "road": "Baghdad Street",
+        "house_number": "12",
+        "postcode": "0100",
+        "city": "Damascus",
+        "state": "Damascus Governorate",
+        "country": "Syria",
+    }
+    AREA = {"city": "Damascus", "state": "Damascus Governorate", "country": "Syria"}
+
+    def setUp(self):
+        self.cache = geocoding.GeocodeCache(precision=7, timeout=60)
+        self.cell = self.cache.cell(33.5138, 36.2765)
+        self.clear()
+        self.addCleanup(self.clear)
+
+    def clear(self):
+        cache.delete_many(
+            [self.cache._redis_key(self.cell)]
+            + [
+                CacheKeys.GEOCODE_METRIC.build_key(outcome=outcome)
+                for outcome in self.cache.OUTCOMES
+            ]
+        )
+
+    def test_tiers_and_metrics(self):
+        self.assertIsNone(self.cache.get(33.5138, 36.2765))
+
+        self.cache.set(33.5138, 36.2765, self.ADDRESS)
+        self.assertEqual(self.cache.get(33.5138, 36.2765), self.AREA)
+        cache.delete(self.cache._redis_key(self.cell))
+        self.assertEqual(self.cache.get(33.5138, 36.2765), self.AREA)
+        self.assertEqual(self.cache.get(33.5138, 36.2765), self.AREA)
+
+        self.assertEqual(
+            self.cache.stats(),
+            {"redis_hit": 2, "database_hit": 1, "miss": 1, "hit_rate": 0.75},
+        )
+
+    def test_only_area_components_are_shared_by_the_cell(self):
+        self.cache.set(33.5138, 36.2765, self.ADDRESS)
+
+        self.assertEqual(
+            GeocodeCacheEntry.objects.get(geohash=self.cell).address, self.AREA
+        )
+        self.assertEqual(self.cache.cell(33.5139, 36.2766), self.cell)
+        self.assertEqual(self.cache.get(33.5139, 36.2766), self.AREA)
+
+    def test_empty_results_are_cached(self):
+        self.cache.set(33.5138, 36.2765, {})
+
+        self.assertEqual(self.cache.get(33.5138, 36.2765), {})
+
+
+class GeocodingQueueTests(TestCase):
+    ADDRESS = GeocodeCacheTests.ADDRESS
+
+    def setUp(self):
+        connection = get_redis_connection("default")
+        self.keys = [
+            CacheKeys.GEOCODING_PENDING.value,
+            CacheKeys.GEOCODING_SCHEDULED.value,
+            "test:token_bucket",
+        ]
+        connection.delete(*self.keys)
+        self.addCleanup(connection.delete, *self.keys)
+        self.connection = connection
+        schedule = mock.patch("accounts.tasks.process_geocoding_queue.apply_async")
+        self.apply_async = schedule.start()
+        self.addCleanup(schedule.stop)
+
+    def enqueue(self, *coordinates):
+        locations = [
+            Location.objects.create(latitude=latitude, longitude=longitude)
+            for latitude, longitude in coordinates
+        ]
+        geocoding.enqueue_geocoding(location.pk for location in locations)
+        return locations
+
+    def test_token_bucket(self):
+        bucket = TokenBucket("test:token_bucket", rate=1, capacity=2)
+
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertTrue(0 < bucket.acquire() <= 1)
+
+    def test_token_bucket_refills(self):
+        bucket = TokenBucket("test:token_bucket", rate=50, capacity=1)
+
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertTrue(0 < bucket.acquire() <= 0.02)
+        time.sleep(0.05)
+        self.assertEqual(bucket.acquire(), 0)
+
+    def test_provider_waits_for_a_token_or_gives_up(self):
+        bucket = mock.Mock(acquire=mock.Mock(return_value=3.0))
+
+        with mock.patch.object(geocoding, "get_rate_limit", return_value=bucket):
+            with self.assertRaises(geocoding.GeocodingRateLimited) as raised:
+                geocoding.NominatimBackend().reverse(33.5, 36.3, max_wait=1)
+        self.assertEqual(raised.exception.wait, 3.0)
+
+    def test_batch_resolves_each_cell_once(self):
+        exact, nearby, other = self.enqueue(
+            (33.5138, 36.2765), (33.5139, 36.2766), (36.2021, 37.1343)
+        )
+        self.apply_async.assert_called_once()
+
+        with mock.patch.object(
+            geocoding, "resolve_address", return_value=self.ADDRESS
+        ) as resolve_address:
+            result = geocoding.process_geocoding_batch()
+
+        self.assertEqual(result, {"updated": 3, "requeued": 0})
+        self.assertEqual(resolve_address.call_count, 2)
+        exact.refresh_from_db()
+        nearby.refresh_from_db()
+        if resolve_address.call_args_list[0].args[:2] != (33.5138, 36.2765):
+            exact, nearby = nearby, exact
+        self.assertEqual(exact.address_line1, "Baghdad Street 12")
+        self.assertEqual(nearby.address_line1, "")
+        self.assertEqual(nearby.city, "Damascus")
+
+    def test_rate_limit_requeues_the_rest(self):
+        self.enqueue((33.5138, 36.2765), (36.2021, 37.1343))
+        self.apply_async.reset_mock()
+
+        with mock.patch.object(
+            geocoding,
+            "resolve_address",
+            side_effect=[self.ADDRESS, geocoding.GeocodingRateLimited(7)],
+        ):
+            result = geocoding.process_geocoding_batch()
+
+        self.assertEqual(result, {"updated": 1, "requeued": 1})
+        self.assertEqual(self.connection.scard(CacheKeys.GEOCODING_PENDING.value), 1)
+        self.apply_async.assert_called_once_with(countdown=7)
+
+
+class GazetteerTests(TestCase):
+    CITIES = [
+        # name, latitude, longitude, feature class, country, admin1, population
+        ("Damascus", 33.5102, 36.2913, "P", "SY", "13", 2_000_000),
+        ("Aleppo", 36.2021, 37.1343, "P", "SY", "09", 1_800_000),
+        ("Mount Hermon", 33.4167, 35.8572, "T", "SY", "13", 0),
+        ("Vunisea", -16.95, -179.95, "P", "FJ", "", 1000),
+        ("Far Island", -16.95, 170.0, "P", "VU", "", 1000),
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        root = pathlib.Path(directory.name)
+        (root / "cities.txt").write_text(
+            "".join(
+                "\t".join(
+                    [
+                        str(i),
+                        name,
+                        name,
+                        "",
+                        str(lat),
+                        str(lng),
+                        feature,
+                        "PPL",
+                        country,
+                    ]
+                    + ["", admin1, "", "", "", str(population), "", "", "", ""]
+                )
+                + "\n"
+                for i, (name, lat, lng, feature, country, admin1, population) in (
+                    enumerate(cls.CITIES)
+                )
+            )
+        )
+        (root / "countries.txt").write_text(
+            "# ISO\tISO3\tISO-Numeric\tfips\tCountry\n"
+            "SY\tSYR\t760\tSY\tSyria\nFJ\tFJI\t242\tFJ\tFiji\n"
+        )
+        (root / "admin1.txt").write_text("SY.13\tDamascus\tDamascus\t170654\n")
+        cls.count = build_gazetteer(
+            root / "cities.txt",
+            root / "gazetteer",
+            countries_path=root / "countries.txt",
+            admin1_path=root / "admin1.txt",
+        )
+        cls.gazetteer = Gazetteer(root / "gazetteer")
+
+    def test_build_keeps_populated_places(self):
+        self.assertEqual(self.count, 4)
+        self.assertEqual(len(self.gazetteer), 4)
+
+    def test_reverse(self):
+        self.assertEqual(
+            self.gazetteer.reverse(33.52, 36.30),
+            {
+                "city": "Damascus",
+                "state": "Damascus",
+                "country": "Syria",
+                "country_code": "sy",
+            },
+        )
+        self.assertEqual(
+            self.gazetteer.reverse(36.2, 37.1),
+            {"city": "Aleppo", "country": "Syria", "country_code": "sy"},
+        )
+
+    def test_max_distance(self):
+        place = self.gazetteer.nearest(33.6, 36.3)
+        self.assertAlmostEqual(
+            place["distance_km"], haversine_km(33.6, 36.3, 33.5102, 36.2913), 3
+        )
+        self.assertEqual(self.gazetteer.reverse(33.6, 36.3, max_distance_km=5), {})
+
+    def test_nearest_across_the_antimeridian(self):
+        place = self.gazetteer.nearest(-16.95, 179.95)
+
+        self.assertEqual(place["name"], "Vunisea")
+        self.assertLess(place["distance_km"], 15)
+
+
+class WorkSpaceRadiusTests(TestCase):
+    CENTER = (33.5138, 36.2765)  # Damascus
+    POINTS = {
+        "same-street": (33.5140, 36.2770),
+        "across-town": (33.4900, 36.3100),
+        "next-city": (33.7000, 36.2000),
+        "far-away": (36.2021, 37.1343),
+        # Either side of a precision-3 cell edge, 33.75 degrees of latitude
+        "edge-south": (33.7499, 36.2765),
+        "edge-north": (33.7501, 36.2765),
+    }
+
+    def setUp(self):
+        self.workspaces = {
+            name: make_workspace(name, *point) for name, point in self.POINTS.items()
+        }
+
+    def expected(self, radius_km, center=CENTER):
+        distances = {
+            name: haversine_km(*center, *point) for name, point in self.POINTS.items()
+        }
+        return sorted(
+            (name for name, distance in distances.items() if distance <= radius_km),
+            key=distances.get,
+        )
+
+    def test_geohash_encode(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(
+            Location.objects.get(pk=self.workspaces["far-away"].location_id).geohash,
+            geohash_encode(*self.POINTS["far-away"]),
+        )
+
+    def test_matches_brute_force_distances(self):
+        for radius_km in (0.1, 5, 25, 26.26, 27, 500):
+            with self.subTest(radius_km=radius_km):
+                found = WorkSpace.objects.within_radius(*self.CENTER, radius_km)
+                self.assertEqual(
+                    [workspace.name for workspace in found], self.expected(radius_km)
+                )
+
+    def test_annotates_distance(self):
+        nearest = WorkSpace.objects.within_radius(*self.CENTER, 1).get()
+
+        self.assertAlmostEqual(
+            nearest.distance_km,
+            haversine_km(*self.CENTER, *self.POINTS["same-street"]),
+            places=3,
+        )
+
+    def test_chains_with_filters(self):
+        WorkSpace.objects.filter(name="across-town").update(has_fast_internet=False)
+
+        found = WorkSpace.objects.filter(has_fast_internet=True).within_radius(
+            *self.CENTER, 25
+        )
+
+        self.assertNotIn("across-town", [workspace.name for workspace in found])
+
+    def test_across_the_antimeridian(self):
+        east = make_workspace("east", 10.0, 179.99)
+        west = make_workspace("west", 10.0, -179.99)
+
+        found = WorkSpace.objects.within_radius(10.0, 179.999, 5)
+
+        self.assertEqual({workspace.pk for workspace in found}, {east.pk, west.pk})
+
+    @override_settings(
+        WORKSPACE_SEARCH_INITIAL_RADIUS_KM=1, WORKSPACE_SEARCH_MAX_RADIUS_KM=1000
+    )
+    def test_nearest_grows_the_radius(self):
+        nearest = WorkSpace.objects.nearest(*self.CENTER, k=3)
+
+        self.assertEqual(
+            [workspace.name for workspace in nearest], self.expected(1000)[:3]
+        )
+        self.assertEqual(
+            len(WorkSpace.objects.nearest(*self.CENTER, k=3, max_radius_km=1)), 1
+        )
+
+
+class WorkSpaceAvailabilityTests(TestCase):
+    def setUp(self):
+        self.day = make_workspace(
+            "day",
+            33.5,
+            36.3,
+            opening_time=datetime.time(9),
+            closing_time=datetime.time(17),
+            power_start_time=datetime.time(8),
+            power_end_time=datetime.time(12),
+        )
+        self.night = make_workspace(
+            "night",
+            33.5,
+            36.4,
+            opening_time=datetime.time(22),
+            closing_time=datetime.time(2),
+            power_start_time=datetime.time(0),
+            power_end_time=datetime.time(0),
+        )
+        self.unset = make_workspace("unset", 33.5, 36.5)
+
+    def names(self, queryset):
+        return sorted(workspace.name for workspace in queryset)
+
+    def test_minute_intervals(self):
+        self.assertEqual(
+            (self.day.open_start_minute, self.day.open_end_minute), (540, 1020)
+        )
+        self.assertEqual(
+            (self.night.open_start_minute, self.night.open_end_minute), (1320, 1560)
+        )
+        # Same start and end: available all day
+        self.assertEqual(
+            (self.night.power_start_minute, self.night.power_end_minute), (0, 2880)
+        )
+        self.assertIsNone(self.unset.open_start_minute)
+
+    def test_open_at(self):
+        cases = {
+            datetime.time(8, 59): [],
+            datetime.time(9): ["day"],
+            datetime.time(16, 59): ["day"],
+            datetime.time(17): [],
+            datetime.time(23): ["night"],
+            datetime.time(1, 30): ["night"],
+            datetime.time(2): [],
+        }
+        for moment, expected in cases.items():
+            with self.subTest(moment=moment):
+                self.assertEqual(
+                    self.names(WorkSpace.objects.open_at(moment)), expected
+                )
+
+    def test_for_minutes(self):
+        self.assertEqual(
+            self.names(WorkSpace.objects.open_at(datetime.time(16), 60)), ["day"]
+        )
+        self.assertEqual(
+            self.names(WorkSpace.objects.open_at(datetime.time(16), 61)), []
+        )
+        self.assertEqual(
+            self.names(WorkSpace.objects.open_at(datetime.time(23, 30), 150)), ["night"]
+        )
+        self.assertEqual(
+            self.names(WorkSpace.objects.powered_at(datetime.time(23), 24 * 60)),
+            ["night"],
+        )
+
+    def test_available_at(self):
+        self.assertEqual(
+            self.names(WorkSpace.objects.available_at(datetime.time(10), 120)), ["day"]
+        )
+        self.assertEqual(
+            self.names(WorkSpace.objects.available_at(datetime.time(11), 120)), []
+        )
+
+    def test_update_fields_keeps_minutes_in_sync(self):
+        self.day.closing_time = datetime.time(18)
+        self.day.save(update_fields=["closing_time"])
+
+        self.day.refresh_from_db()
+        self.assertEqual(self.day.open_end_minute, 1080)
+
+    def test_instants_use_each_workspace_time_zone(self):
+        self.day.time_zone = "UTC"
+        self.day.save()
+        riyadh = make_workspace(
+            "riyadh",
+            24.7,
+            46.7,
+            time_zone="Asia/Riyadh",  # UTC+3
+            opening_time=datetime.time(9),
+            closing_time=datetime.time(17),
+        )
+        # 15:00 in UTC, 18:00 in Riyadh
+        moment = datetime.datetime(2024, 6, 1, 15, tzinfo=datetime.timezone.utc)
+
+        self.assertEqual(self.names(WorkSpace.objects.open_at(moment)), ["day"])
+        self.assertEqual(
+            self.names(WorkSpace.objects.open_at(moment - datetime.timedelta(hours=8))),
+            ["riyadh"],
+        )
+        # Wall-clock times apply in every zone alike
+        self.assertEqual(
+            self.names(WorkSpace.objects.open_at(datetime.time(16))), ["day", "riyadh"]
+        )
+        self.assertEqual(riyadh.time_zone, "Asia/Riyadh")
+        self.assertEqual(self.unset.time_zone, "Asia/Damascus")
+
+
+class MapTileTests(TestCase):
+    TILE = ("workspaces", 10, *tile_for_point(33.5138, 36.2765, 10))
+
+    def setUp(self):
+        cache.clear()
+        self.workspace = make_workspace("hub", 33.5138, 36.2765)
+
+    def test_invalidation_during_a_build_is_not_lost(self):
+        build_tile = map_clusters.build_tile
+
+        def build_then_move(*args):
+            clusters = build_tile(*args)
+            # The workspace moves while the stale tile is being built
+            map_clusters.invalidate_points([(33.5138, 36.2765)])
+            return clusters
+
+        with mock.patch.object(map_clusters, "build_tile", build_then_move):
+            self.assertEqual(map_clusters.get_tile(*self.TILE)[0]["name"], "hub")
+        WorkSpace.objects.filter(pk=self.workspace.pk).update(name="renamed")
+
+        self.assertEqual(map_clusters.get_tile(*self.TILE)[0]["name"], "renamed")
+        self.assertEqual(map_clusters.get_tile(*self.TILE)[0]["name"], "renamed")
+
+    def test_point_deleted_while_building(self):
+        details = WorkSpace.objects.filter
+
+        def delete_then_filter(*args, **kwargs):
+            if "pk__in" in kwargs:  # The details of single points
+                details(pk=self.workspace.pk).delete()
+            return details(*args, **kwargs)
+
+        with mock.patch.object(WorkSpace.objects, "filter", delete_then_filter):
+            clusters = map_clusters.build_tile(*self.TILE)
+
+        self.assertEqual(clusters, [])
+
+
+@override_settings(MOBILE_NUMBER_VERIFICATION_MAX_ATTEMPTS=3)
+class OTPTests(TestCase):
+    def setUp(self):
+        self.mobile_number = MobileNumber.objects.create(
+            user=make_user("mobile"), number="+963944123456"
+        )
+        self.store = otp.otp_store
+        self.clear()
+        self.addCleanup(self.clear)
+
+    def clear(self):
+        keys = self.store._keys(self.mobile_number.pk)
+        self.store._redis().delete(*keys.values())
+
+    def test_code_is_consumed(self):
+        code = self.store.issue(self.mobile_number.pk)
+
+        self.assertRegex(code, r"^\d{6}$")
+        self.assertLessEqual(self.store.remaining_seconds(self.mobile_number.pk), 600)
+        self.assertEqual(self.store.verify(self.mobile_number.pk, code), otp.VERIFIED)
+        self.assertEqual(self.store.verify(self.mobile_number.pk, code), otp.MISSING)
+        self.assertIsNone(self.store.remaining_seconds(self.mobile_number.pk))
+
+    def test_cooldown(self):
+        self.store.issue(self.mobile_number.pk)
+
+        with self.assertRaises(otp.CooldownActive) as raised:
+            self.store.issue(self.mobile_number.pk)
+        self.assertTrue(1 <= raised.exception.retry_after <= 60)
+
+    def test_attempt_limit(self):
+        code = self.store.issue(self.mobile_number.pk)
+        wrong = "000000" if code != "000000" else "111111"
+
+        for _ in range(3):
+            self.assertEqual(
+                self.store.verify(self.mobile_number.pk, wrong), otp.INVALID
+            )
+        self.assertEqual(self.store.verify(self.mobile_number.pk, code), otp.LOCKED)
+        self.assertEqual(self.store.verify(self.mobile_number.pk, code), otp.MISSING)
+
+    def test_new_code_resets_attempts(self):
+        self.store.issue(self.mobile_number.pk)
+        for _ in range(3):
+            self.store.verify(self.mobile_number.pk, "wrong")
+        self.store._redis().delete(self.store._keys(self.mobile_number.pk)["cooldown"])
+
+        code = self.store.issue(self.mobile_number.pk)
+
+        self.assertEqual(self.store.verify(self.mobile_number.pk, code), otp.VERIFIED)
+
+    def test_codes_are_per_number(self):
+        code = self.store.issue(self.mobile_number.pk)
+
+        self.assertEqual(
+            self.store.verify(self.mobile_number.pk + 1, code), otp.MISSING
+        )
+
+    def test_model_verification(self):
+        code = self.mobile_number.generate_verification_code()
+        with self.assertRaises(ValidationError):
+            self.mobile_number.generate_verification_code()
+
+        self.assertEqual(
+            self.mobile_number.verify_code("wrong"),
+            (False, "Invalid verification code"),
+        )
+        self.assertTrue(self.mobile_number.verify_code(code)[0])
+        self.mobile_number.refresh_from_db()
+        self.assertTrue(self.mobile_number.is_verified)
+
+
+class NotificationCacheTests(TestCase):
+    def setUp(self):
+        self.user = make_user("notified")
+        self.clear()
+        self.addCleanup(self.clear)
+
+    def clear(self):
+        notifications._redis().delete(
+            notifications._inbox_key(self.user.pk),
+            notifications._unread_key(self.user.pk),
+            notifications._version_key(self.user.pk),
+        )
+
+    def notify(self, message):
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications.notify([self.user.pk], message)
+
+    def test_cached_reads_follow_writes(self):
+        self.notify("first")
+        self.assertEqual(notifications.unread_count(self.user.pk), 1)
+        self.assertEqual(len(notifications.recent(self.user.pk)), 1)
+
+        self.notify("second")
+
+        self.assertEqual(notifications.unread_count(self.user.pk), 2)
+        self.assertEqual(
+            [item["message"] for item in notifications.recent(self.user.pk)],
+            ["second", "first"],
+        )
+        notifications.mark_read(self.user.pk)
+        self.assertEqual(notifications.unread_count(self.user.pk), 0)
+
+    def test_rebuild_racing_a_write_is_not_stored(self):
+        self.notify("first")
+        original = notifications.Notification.objects.filter
+
+        def count_then_notify(*args, **kwargs):
+            # The count is taken, then a notification commits before it is cached
+            stale = original(*args, **kwargs).count()
+            self.notify("second")
+            return mock.Mock(count=mock.Mock(return_value=stale))
+
+        with mock.patch.object(
+            notifications.Notification.objects, "filter", count_then_notify
+        ):
+            self.assertEqual(notifications.unread_count(self.user.pk), 1)
+
+        self.assertEqual(notifications.unread_count(self.user.pk), 2)
+
+
+class MediaBlobCollectionTests(TestCase):
+    def make_blob(self, sha256):
+        blob = MediaBlob.objects.create(
+            sha256=sha256,
+            name=f"blobs/{sha256}.jpg",
+            size=1,
+            renditions={
+                "sha256": sha256,
+                "renditions": {"card": {"webp": {"name": f"renditions/{sha256}.webp"}}},
+            },
+        )
+        MediaBlob.objects.filter(pk=blob.pk).update(
+            updated_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+        )
+        return blob
+
+    def test_keeps_renditions_other_uploads_use(self):
+        shared, unused = "a" * 64, "b" * 64
+        self.make_blob(shared)
+        self.make_blob(unused)
+        # A legacy upload, not stored as a blob, rendered from the same content
+        seeker = make_job_seeker("legacy")
+        JobSeekerProfile.objects.filter(pk=seeker.pk).update(
+            photo_renditions={"sha256": shared, "renditions": {}}
+        )
+
+        with (
+            mock.patch.object(media_blobs, "media_blob_storage") as blob_storage,
+            mock.patch.object(media_blobs, "default_storage") as default_storage,
+        ):
+            self.assertEqual(media_blobs.collect_unused(), 2)
+
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertEqual(blob_storage.return_value.delete.call_count, 2)
+        default_storage.delete.assert_called_once_with(f"renditions/{unused}.webp")
+
+
+class ImageRerenderTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = str(pathlib.Path(directory.name) / "checkpoint.json")
+        self.seekers = [make_job_seeker(f"seeker{i}") for i in range(3)]
+        for seeker in self.seekers:
+            JobSeekerProfile.objects.filter(pk=seeker.pk).update(
+                photo=f"photos/{seeker.pk}.jpg"
+            )
+        self.broken = {f"photos/{self.seekers[1].pk}.jpg"}
+        # Threads instead of worker processes, which cannot see the test data
+        for name, value in [
+            ("ProcessPoolExecutor", ThreadPoolExecutor),
+            ("_init_worker", lambda: None),
+            ("_render", self.render),
+        ]:
+            self.enterContext(mock.patch.object(image_rerender, name, value))
+
+    def render(self, model_label, field, name, previous):
+        if name in self.broken:
+            return image_rerender.FAILED, "OSError: truncated"
+        return image_rerender.RENDERED, {"sha256": name}
+
+    def rerender(self):
+        return [
+            (pk, status)
+            for label, field, pk, status, error in image_rerender.rerender_images(
+                self.checkpoint, workers=2, chunk_size=2
+            )
+            if label == "accounts.JobSeekerProfile"
+        ]
+
+    def test_resumes_and_retries_failures(self):
+        first, broken, last = (seeker.pk for seeker in self.seekers)
+        self.assertEqual(
+            self.rerender(),
+            [
+                (first, image_rerender.RENDERED),
+                (broken, image_rerender.FAILED),
+                (last, image_rerender.RENDERED),
+            ],
+        )
+        checkpoint = image_rerender.Checkpoint(self.checkpoint)
+        self.assertEqual(
+            checkpoint.position("accounts.JobSeekerProfile", "photo"), last
+        )
+        self.assertEqual(
+            checkpoint.failed("accounts.JobSeekerProfile", "photo"), [broken]
+        )
+
+        self.assertEqual(self.rerender(), [(broken, image_rerender.FAILED)])
+        self.broken.clear()
+        self.assertEqual(self.rerender(), [(broken, image_rerender.RENDERED)])
+        self.assertEqual(self.rerender(), [])
+        self.assertEqual(
+            JobSeekerProfile.objects.get(pk=broken).photo_renditions,
+            {"sha256": f"photos/{broken}.jpg"},
+        )
+
+    def test_new_renditions_version_starts_over(self):
+        self.broken.clear()
+        self.assertEqual(len(self.rerender()), 3)
+        self.assertEqual(self.rerender(), [])
+
+        with mock.patch.object(image_rerender, "RENDITIONS_VERSION", "resized"):
+            self.assertEqual(len(self.rerender()), 3)
+
+
+class ReportTests(TestCase):
+    def setUp(self):
+        reports_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(reports_dir.cleanup)
+        self.enterContext(override_settings(REPORTS_DIR=reports_dir.name))
+        self.user = make_user("reporter")
+        SupportTicket.objects.create(
+            user=self.user, title="Help", description="-", message="-"
+        )
+
+    def test_staff_only_reports(self):
+        with self.assertRaises(ReportError):
+            generate_report("donations", self.user.pk)
+        with self.assertRaises(ReportError):
+            generate_report("users", self.user.pk)
+
+        self.user.is_staff = True
+        self.user.save(update_fields=["is_staff"])
+        self.assertEqual(generate_report("users", self.user.pk)["summary"]["rows"], 1)
+
+    def test_download_by_owner_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_report("tickets", self.user.pk)
+        url = self.user.notifications.get().data["url"]
+
+        self.client.force_login(make_user("other"))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        lines = gzip.decompress(b"".join(response.streaming_content)).splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn(b"Help", lines[1])
+
+    def read(self, result):
+        with report_storage().open(result["name"]) as f:
+            return gzip.decompress(f.read()).decode()
+
+    def test_users_only_get_their_own_tickets_and_ratings(self):
+        other = make_user("other")
+        SupportTicket.objects.create(
+            user=other, title="Secret", description="-", message="-"
+        )
+        seeker = make_job_seeker("seeker")
+        Rating.objects.create(rater=self.user, job_seeker=seeker, rating=5)
+        Rating.objects.create(rater=other, job_seeker=seeker, rating=3)
+        Rating.objects.create(
+            rater=other, job_seeker=make_job_seeker("third"), rating=1
+        )
+
+        tickets = generate_report("tickets", self.user.pk)
+        self.assertEqual(tickets["summary"]["rows"], 1)
+        self.assertNotIn("Secret", self.read(tickets))
+        self.assertEqual(generate_report("ratings", self.user.pk)["summary"]["rows"], 1)
+        # Ratings given and received
+        self.assertEqual(
+            generate_report("ratings", seeker.user_id)["summary"]["rows"], 2
+        )
+
+        self.user.is_staff = True
+        self.user.save(update_fields=["is_staff"])
+        self.assertEqual(generate_report("tickets", self.user.pk)["summary"]["rows"], 2)
+        self.assertEqual(generate_report("ratings", self.user.pk)["summary"]["rows"], 3)
@@ -0,0 +1,43 @@
+from django.urls import path
+
+from . import views
+
+app_name = "accounts"
+
+urlpatterns = [
+    path(
+        "donations/stats/",
+        views.DonationStatsView.as_view(),
+        name="donation_stats",
+    ),
+    path(
+        "workspaces/nearby/",
+        views.NearbyWorkSpaceView.as_view(),
+        name="nearby_workspaces",
+    ),
+    path(
+        "map/<str:layer>/<int:zoom>/<int:x>/<int:y>/",
+        views.MapTileView.as_view(),
+        name="map_tile",
+    ),
+    path(
+        "notifications/",
+        views.NotificationListView.as_view(),
+        name="notifications",
+    ),
+    path(
+        "notifications/unread-count/",
+        views.NotificationUnreadCountView.as_view(),
+        name="notification_unread_count",
+    ),
+    path(
+        "notifications/read/",
+        views.NotificationMarkReadView.as_view(),
+        name="notification_mark_read",
+    ),
+    path(
+        "reports/<uuid:user_id>/<str:file_name>/",
+        views.ReportDownloadView.as_view(),
+        name="report_download",
+    ),
+]
@@ -1,127 +1,173 @@
+import zoneinfo
+from functools import lru_cache
+
 import phonenumbers
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
+# Distinct raw strings kept parsed; a few hundred KB at most
+PHONE_NUMBER_CACHE_SIZE = 4096
 
-def validate_mobile_number(value):
-    """
-    Validate international mobile phone numbers using phonenumbers library.
 
-    The user should provide the phone number with country code (e.g., +1234567890).
-    If the number is invalid, provides helpful error messages with examples.
+@lru_cache(maxsize=PHONE_NUMBER_CACHE_SIZE)
+def parse_phone_number(value):
+    """
+    Parse a phone number given in international format, memoized per raw string.
 
-    Args:
-        value (str): The phone number to validate
+    Validation, normalization and the `MobileNumber` info/format helpers all
+    parse the same string during one save; they share this cache so it is
+    only parsed once. The returned object is shared: treat it as read-only.
 
     Raises:
-        ValidationError: If the phone number is invalid with helpful message
+        phonenumbers.NumberParseException: If the value cannot be parsed
+            (failures are not cached)
     """
-    if not value:
-        return  # Allow empty values, use blank=False in model if required
+    # None means no default region
+    return phonenumbers.parse(value, None)
 
+
+@lru_cache(maxsize=PHONE_NUMBER_CACHE_SIZE)
+def format_phone_number(value, number_format):
+    """
+    Format a phone number, memoized per raw string and format.
+
+    Returns:
+        str: The formatted number, or `value` unchanged if it cannot be parsed
+    """
     try:
-        # Parse the phone number (None means no default region)
-        parsed_number = phonenumbers.parse(value, None)
-
-        # Check if the number is valid
-        if not phonenumbers.is_valid_number(parsed_number):
-            # Get the country code to provide better error message
-            try:
-                country_code = parsed_number.country_code
-                region_code = phonenumbers.region_code_for_country_code(country_code)
-
-                # Get example number for the detected country
-                example_number = phonenumbers.example_number(region_code)
-                if example_number:
-                    example_formatted = phonenumbers.format_number(
-                        example_number, phonenumbers.PhoneNumberFormat.INTERNATIONAL
-                    )
-                    raise ValidationError(
-                        _(
-                            "Invalid phone number. Please use international format with country code. "
-                            f"Example for your country: {example_formatted}"
-                        )
-                    )
-            except:
-                pass
-
-            raise ValidationError(
-                _(
-                    "Invalid phone number. Please include the country code. "
-                    "Examples: +1 555 123 4567 (US), +44 20 7946 0958 (UK), "
-                    "+966 50 123 4567 (Saudi Arabia)"
-                )
-            )
+        return phonenumbers.format_number(parse_phone_number(value), number_format)
+    except phonenumbers.NumberParseException:
+        return value
+
 
-        # Check if it's a mobile number type
-        number_type = phonenumbers.number_type(parsed_number)
-
-        # Allow mobile and fixed line or mobile (some countries don't distinguish)
-        allowed_types = [
-            phonenumbers.PhoneNumberType.MOBILE,
-            phonenumbers.PhoneNumberType.FIXED_LINE_OR_MOBILE,
-        ]
-
-        if number_type not in allowed_types:
-            country_code = parsed_number.country_code
-            region_code = phonenumbers.region_code_for_country_code(country_code)
-
-            # Try to get mobile example for the country
-            try:
-                mobile_example = phonenumbers.example_number_for_type(
-                    region_code, phonenumbers.PhoneNumberType.MOBILE
-                )
-                if mobile_example:
-                    example_formatted = phonenumbers.format_number(
-                        mobile_example, phonenumbers.PhoneNumberFormat.INTERNATIONAL
-                    )
-                    raise ValidationError(
-                        _(
-                            "Please provide a mobile phone number. "
-                            f"Example mobile number for your country: {example_formatted}"
-                        )
-                    )
-            except:
-                pass
-
-            raise ValidationError(
-                _("Please provide a mobile phone number, not a landline or other type.")
+@lru_cache(maxsize=512)
+def example_mobile_number(region_code, mobile_only=False):
+    """
+    Return an example number of a region in international format, or None.
+    Memoized, since every rejected number of a region needs the same one.
+    """
+    try:
+        if mobile_only:
+            example = phonenumbers.example_number_for_type(
+                region_code, phonenumbers.PhoneNumberType.MOBILE
             )
+        else:
+            example = phonenumbers.example_number(region_code)
+    except Exception:
+        return None
+    if example is None:
+        return None
+    return phonenumbers.format_number(
+        example, phonenumbers.PhoneNumberFormat.INTERNATIONAL
+    )
+
+
+# Allow mobile and fixed line or mobile (some countries don't distinguish)
+ALLOWED_NUMBER_TYPES = (
+    phonenumbers.PhoneNumberType.MOBILE,
+    phonenumbers.PhoneNumberType.FIXED_LINE_OR_MOBILE,
+)
 
+
+def mobile_number_error(value):
+    """
+    Check an international mobile phone number without raising.
+
+    Returns:
+        str | None: A helpful error message with examples, or None if valid
+    """
+    try:
+        # Parse the phone number (shared with normalization and info extraction)
+        parsed_number = parse_phone_number(value)
     except phonenumbers.NumberParseException as e:
         # Handle different parsing errors with specific messages
         if e.error_type == phonenumbers.NumberParseException.INVALID_COUNTRY_CODE:
-            raise ValidationError(
-                _(
-                    "Invalid country code. Please start with + followed by your country code. "
-                    "Examples: +1 (US/Canada), +44 (UK), +966 (Saudi Arabia), +971 (UAE)"
-                )
+            return _(
+                "Invalid country code. Please start with + followed by your country code. "
+                "Examples: +1 (US/Canada), +44 (UK), +966 (Saudi Arabia), +971 (UAE)"
             )
         elif e.error_type == phonenumbers.NumberParseException.NOT_A_NUMBER:
-            raise ValidationError(
-                _(
-                    "Phone number contains invalid characters. Use only numbers, spaces, "
-                    "hyphens, and parentheses. Example: +1 555 123 4567"
-                )
+            return _(
+                "Phone number contains invalid characters. Use only numbers, spaces, "
+                "hyphens, and parentheses. Example: +1 555 123 4567"
             )
         elif e.error_type == phonenumbers.NumberParseException.TOO_SHORT_NSN:
-            raise ValidationError(
-                _(
-                    "Phone number is too short. Please include the full number with country code. "
-                    "Example: +1 555 123 4567"
-                )
+            return _(
+                "Phone number is too short. Please include the full number with country code. "
+                "Example: +1 555 123 4567"
             )
         elif e.error_type == phonenumbers.NumberParseException.TOO_LONG:
-            raise ValidationError(
-                _("Phone number is too long. Please check your number and try again.")
+            return _(
+                "Phone number is too long. Please check your number and try again."
             )
         else:
-            raise ValidationError(
-                _(
-                    "Invalid phone number format. Please use international format with country code. "
-                    "Examples: +1 555 123 4567, +44 20 7946 0958, +966 50 123 4567"
-                )
+            return _(
+                "Invalid phone number format. Please use international format with country code. "
+                "Examples: +1 555 123 4567, +44 20 7946 0958, +966 50 123 4567"
+            )
+
+    # Used to provide better error messages
+    region_code = phonenumbers.region_code_for_country_code(parsed_number.country_code)
+
+    # Check if the number is valid
+    if not phonenumbers.is_valid_number(parsed_number):
+        example_formatted = example_mobile_number(region_code)
+        if example_formatted:
+            return _(
+                "Invalid phone number. Please use international format with country code. "
+                f"Example for your country: {example_formatted}"
             )
+        return _(
+            "Invalid phone number. Please include the country code. "
+            "Examples: +1 555 123 4567 (US), +44 20 7946 0958 (UK), "
+            "+966 50 123 4567 (Saudi Arabia)"
+        )
+
+    # Check if it's a mobile number type
+    if phonenumbers.number_type(parsed_number) not in ALLOWED_NUMBER_TYPES:
+        example_formatted = example_mobile_number(region_code, mobile_only=True)
+        if example_formatted:
+            return _(
+                "Please provide a mobile phone number. "
+                f"Example mobile number for your country: {example_formatted}"
+            )
+        return _("Please provide a mobile phone number, not a landline or other type.")
+
+    return None
+
+
+def validate_mobile_number(value):
+    """
+    Validate international mobile phone numbers using phonenumbers library.
+
+    The user should provide the phone number with country code (e.g., +1234567890).
+    If the number is invalid, provides helpful error messages with examples.
+
+    Args:
+        value (str): The phone number to validate
+
+    Raises:
+        ValidationError: If the phone number is invalid with helpful message
+    """
+    if not value:
+        return  # Allow empty values, use blank=False in model if required
+
+    error = mobile_number_error(value)
+    if error is not None:
+        raise ValidationError(error)
+
+
+def validate_time_zone(value):
+    """
+    Validate an IANA time zone name, e.g. "Asia/Damascus".
+
+    Raises:
+        ValidationError: If the zone is unknown
+    """
+    if value not in zoneinfo.available_timezones():
+        raise ValidationError(
+            _("Unknown time zone '%(value)s'."), params={"value": value}
+        )
 
 
 def normalize_mobile_number(value):
@@ -140,13 +186,6 @@ def normalize_mobile_number(value):
     if not value:
         return value
 
-    try:
-        parsed_number = phonenumbers.parse(value, None)
-
-        # Return in E.164 format (international format without formatting)
-        return phonenumbers.format_number(
-            parsed_number, phonenumbers.PhoneNumberFormat.E164
-        )
-    except phonenumbers.NumberParseException:
-        # If we can't parse it, validation will catch it
-        return value
+    # Return in E.164 format (international format without formatting).
+    # If we can't parse it, the value is returned as is and validation will catch it
+    return format_phone_number(value, phonenumbers.PhoneNumberFormat.E164)
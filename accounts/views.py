@@ -1,3 +1,238 @@
-from django.shortcuts import render
+import datetime
 
-# Create your views here.
+from django.conf import settings
+from django.http import FileResponse, Http404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import DonationRollup, WorkSpace
+from .services import notifications
+from .services.map_clusters import InvalidTile, get_tile
+from .services.reports import report_storage
+
+
+def _date_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Use the YYYY-MM-DD format."})
+    return parsed
+
+
+def _float_param(request, name, required=False, minimum=None, maximum=None):
+    value = request.query_params.get(name)
+    if value in (None, ""):
+        if required:
+            raise ValidationError({name: "This parameter is required."})
+        return None
+    try:
+        parsed = float(value)
+    except ValueError:
+        raise ValidationError({name: "A number is required."})
+    if (minimum is not None and parsed < minimum) or (
+        maximum is not None and parsed > maximum
+    ):
+        raise ValidationError({name: f"Must be between {minimum} and {maximum}."})
+    return parsed
+
+
+def _bool_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return value.lower() in ("1", "true", "yes")
+
+
+class DonationStatsView(APIView):
+    """
+    Donation time series for dashboard charts, served from the pre-aggregated
+    rollups. Defaults to the last 30 days, or the last 12 months for monthly
+    buckets.
+
+    Query parameters: period (day|month), start, end, country, badge_level.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    DEFAULT_RANGE = {
+        DonationRollup.Period.DAY: datetime.timedelta(days=30),
+        DonationRollup.Period.MONTH: datetime.timedelta(days=366),
+    }
+
+    def get(self, request):
+        period = request.query_params.get("period", DonationRollup.Period.DAY)
+        if period not in DonationRollup.Period.values:
+            raise ValidationError(
+                {"period": f"Expected one of {DonationRollup.Period.values}."}
+            )
+
+        end = _date_param(request, "end") or timezone.localdate()
+        start = _date_param(request, "start") or end - self.DEFAULT_RANGE[period]
+
+        series = DonationRollup.objects.series(
+            period,
+            start=start,
+            end=end,
+            country=request.query_params.get("country"),
+            badge_level=request.query_params.get("badge_level"),
+        )
+        return Response(series)
+
+
+class NearbyWorkSpaceView(APIView):
+    """
+    Coworking spaces around a point, closest first.
+
+    Query parameters: lat, lng (required); radius (km) to return every space
+    within it, otherwise the k (default 10, max 50) nearest ones;
+    has_fast_internet (true|false); open_now and power_now (true), optionally
+    with for_hours to require availability for that long from now, both in
+    each space's own time zone.
+    """
+
+    MAX_RESULTS = 50
+
+    def get(self, request):
+        latitude = _float_param(request, "lat", required=True, minimum=-90, maximum=90)
+        longitude = _float_param(
+            request, "lng", required=True, minimum=-180, maximum=180
+        )
+        radius = _float_param(
+            request,
+            "radius",
+            minimum=0,
+            maximum=settings.WORKSPACE_SEARCH_MAX_RADIUS_KM,
+        )
+        k = int(_float_param(request, "k", minimum=1, maximum=self.MAX_RESULTS) or 10)
+
+        workspaces = WorkSpace.objects.select_related("location")
+        has_fast_internet = _bool_param(request, "has_fast_internet")
+        if has_fast_internet is not None:
+            workspaces = workspaces.filter(has_fast_internet=has_fast_internet)
+
+        for_minutes = round(
+            (_float_param(request, "for_hours", minimum=0, maximum=24) or 0) * 60
+        )
+        if _bool_param(request, "open_now"):
+            workspaces = workspaces.open_at(for_minutes=for_minutes)
+        if _bool_param(request, "power_now"):
+            workspaces = workspaces.powered_at(for_minutes=for_minutes)
+
+        if radius is not None:
+            results = workspaces.within_radius(latitude, longitude, radius)[
+                : self.MAX_RESULTS
+            ]
+        else:
+            results = workspaces.nearest(latitude, longitude, k=k)
+
+        return Response(
+            [
+                {
+                    "id": workspace.id,
+                    "name": workspace.name,
+                    "contact_number": workspace.contact_number,
+                    "has_fast_internet": workspace.has_fast_internet,
+                    "opening_time": workspace.opening_time,
+                    "closing_time": workspace.closing_time,
+                    "power_start_time": workspace.power_start_time,
+                    "power_end_time": workspace.power_end_time,
+                    "time_zone": workspace.time_zone,
+                    "latitude": workspace.location.latitude,
+                    "longitude": workspace.location.longitude,
+                    "city": workspace.location.city,
+                    "country": workspace.location.country,
+                    "distance_km": round(workspace.distance_km, 3),
+                }
+                for workspace in results
+            ]
+        )
+
+
+class MapTileView(APIView):
+    """
+    Clustered map points of a layer ("workspaces" or "companies") inside a
+    Web Mercator tile, as requested by map clients for each visible tile.
+    """
+
+    def get(self, request, layer, zoom, x, y):
+        try:
+            clusters = get_tile(layer, zoom, x, y)
+        except InvalidTile as e:
+            raise ValidationError({"tile": str(e)})
+        return Response({"zoom": zoom, "x": x, "y": y, "clusters": clusters})
+
+
+class NotificationListView(APIView):
+    """
+    The latest notifications of the current user, newest first, served from
+    their Redis inbox.
+
+    Query parameters: limit (default and max NOTIFICATION_INBOX_SIZE).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        limit = _float_param(
+            request, "limit", minimum=1, maximum=settings.NOTIFICATION_INBOX_SIZE
+        )
+        return Response(
+            notifications.recent(request.user.pk, limit=int(limit) if limit else None)
+        )
+
+
+class NotificationUnreadCountView(APIView):
+    """Unread notification count of the current user, a single Redis GET."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({"unread": notifications.unread_count(request.user.pk)})
+
+
+class NotificationMarkReadView(APIView):
+    """
+    Mark the current user's notifications as read.
+
+    Body: ids, the notifications to mark; all unread ones when omitted.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        ids = request.data.get("ids")
+        if ids is not None and (
+            not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)
+        ):
+            raise ValidationError({"ids": "A list of notification ids is required."})
+        marked = notifications.mark_read(request.user.pk, notification_ids=ids)
+        return Response({"marked": marked})
+
+
+class ReportDownloadView(APIView):
+    """
+    Download a generated report file. Reports are stored outside of the
+    served media, and only the user who requested one can fetch it.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, user_id, file_name):
+        storage = report_storage()
+        name = f"{user_id}/{file_name}"
+        if (
+            user_id != request.user.pk
+            or file_name.startswith(".")
+            or not storage.exists(name)
+        ):
+            raise Http404
+        return FileResponse(storage.open(name), as_attachment=True, filename=file_name)
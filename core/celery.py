@@ -8,6 +8,7 @@ in the job matching, freelance, and donation system.
 import os
 
 from celery import Celery
+from celery.schedules import crontab
 from django.conf import settings
 
 # Set the default Django settings module for the 'celery' program.
@@ -26,8 +27,34 @@ app.autodiscover_tasks()
 # Task routing configuration
 app.conf.task_routes = {
     "core.tasks.send_email": {"queue": "emails"},
+    "core.tasks.send_bulk_email_task": {"queue": "emails"},
     "core.tasks.process_image": {"queue": "media"},
+    "core.tasks.render_image_renditions": {"queue": "media"},
+    "accounts.tasks.store_media_blob_renditions": {"queue": "media"},
     "core.tasks.generate_report": {"queue": "reports"},
+    "core.tasks.generate_report_task": {"queue": "reports"},
+    "accounts.tasks.geocode_location": {"queue": "geocoding"},
+    "accounts.tasks.process_geocoding_queue": {"queue": "geocoding"},
+}
+
+# Periodic tasks (run by celery beat)
+app.conf.beat_schedule = {
+    "refresh-donation-rollups": {
+        "task": "accounts.tasks.refresh_donation_rollups",
+        "schedule": crontab(minute="*/5"),
+    },
+    "rebuild-leaderboards": {
+        "task": "accounts.tasks.rebuild_leaderboards",
+        "schedule": crontab(minute=15, hour=4),
+    },
+    "collect-unused-media-blobs": {
+        "task": "accounts.tasks.collect_unused_media_blobs",
+        "schedule": crontab(minute=30, hour=3),
+    },
+    "backup-database": {
+        "task": "core.tasks.backup_database",
+        "schedule": crontab(minute=0, hour=2),
+    },
 }
 
 # Task configuration
@@ -189,6 +189,7 @@ MEDIA_ROOT = BASE_DIR / "media"
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5 * 1024 * 1024  # 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = settings.MAX_UPLOAD_SIZE
+MEDIA_BLOB_RETENTION_HOURS = settings.MEDIA_BLOB_RETENTION_HOURS
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -263,6 +264,8 @@ EMAIL_USE_TLS = settings.EMAIL_USE_TLS
 EMAIL_HOST_USER = settings.EMAIL_HOST_USER
 EMAIL_HOST_PASSWORD = settings.EMAIL_HOST_PASSWORD
 DEFAULT_FROM_EMAIL = settings.DEFAULT_FROM_EMAIL
+EMAIL_BATCH_SIZE = settings.EMAIL_BATCH_SIZE
+EMAIL_RETRY_DELAY_SECONDS = settings.EMAIL_RETRY_DELAY_SECONDS
 
 # Logging Configuration
 LOGGING = {
@@ -305,3 +308,70 @@ LOGGING = {
 MOBILE_NUMBER_VERIFICATION_CODE_COOLDOWN_SECONDS = (
     settings.MOBILE_NUMBER_VERIFICATION_CODE_COOLDOWN_SECONDS
 )
+MOBILE_NUMBER_VERIFICATION_CODE_TTL_SECONDS = (
+    settings.MOBILE_NUMBER_VERIFICATION_CODE_TTL_SECONDS
+)
+MOBILE_NUMBER_VERIFICATION_MAX_ATTEMPTS = (
+    settings.MOBILE_NUMBER_VERIFICATION_MAX_ATTEMPTS
+)
+PHONE_METADATA_PROVIDER = settings.PHONE_METADATA_PROVIDER
+PHONE_METADATA_REGIONS = settings.PHONE_METADATA_REGIONS
+PHONE_METADATA_TABLE_PATH = settings.PHONE_METADATA_TABLE_PATH or (
+    BASE_DIR / "data" / "phone_metadata.json"
+)
+
+# Job Seeker Matching
+MATCHING_SNAPSHOT_MAX_AGE_SECONDS = settings.MATCHING_SNAPSHOT_MAX_AGE_SECONDS
+MATCHING_REFRESH_INTERVAL_SECONDS = settings.MATCHING_REFRESH_INTERVAL_SECONDS
+
+# Leaderboards
+LEADERBOARD_MIN_RATINGS = settings.LEADERBOARD_MIN_RATINGS
+
+# Geocoding
+GEOCODE_CACHE_PRECISION = settings.GEOCODE_CACHE_PRECISION
+GEOCODE_CACHE_TTL_SECONDS = settings.GEOCODE_CACHE_TTL_SECONDS
+GEOCODING_USER_AGENT = settings.GEOCODING_USER_AGENT
+GEOCODING_RATE_PER_SECOND = settings.GEOCODING_RATE_PER_SECOND
+GEOCODING_BURST = settings.GEOCODING_BURST
+GEOCODING_BATCH_SIZE = settings.GEOCODING_BATCH_SIZE
+GEOCODING_BATCH_DELAY_SECONDS = settings.GEOCODING_BATCH_DELAY_SECONDS
+GEOCODING_BACKENDS = settings.GEOCODING_BACKENDS
+GEOCODING_GAZETTEER_PATH = settings.GEOCODING_GAZETTEER_PATH or (
+    BASE_DIR / "data" / "gazetteer"
+)
+GEOCODING_GAZETTEER_MAX_DISTANCE_KM = settings.GEOCODING_GAZETTEER_MAX_DISTANCE_KM
+
+# Workspace proximity search
+WORKSPACE_SEARCH_INITIAL_RADIUS_KM = settings.WORKSPACE_SEARCH_INITIAL_RADIUS_KM
+WORKSPACE_SEARCH_MAX_RADIUS_KM = settings.WORKSPACE_SEARCH_MAX_RADIUS_KM
+WORKSPACE_DEFAULT_TIME_ZONE = settings.WORKSPACE_DEFAULT_TIME_ZONE
+
+# Map clustering
+MAP_CLUSTER_GRID = settings.MAP_CLUSTER_GRID
+MAP_TILE_MAX_ZOOM = settings.MAP_TILE_MAX_ZOOM
+MAP_TILE_WARM_ZOOM = settings.MAP_TILE_WARM_ZOOM
+MAP_TILE_CACHE_TTL_SECONDS = settings.MAP_TILE_CACHE_TTL_SECONDS
+
+# Notifications
+NOTIFICATION_INBOX_SIZE = settings.NOTIFICATION_INBOX_SIZE
+NOTIFICATION_CACHE_TTL_SECONDS = settings.NOTIFICATION_CACHE_TTL_SECONDS
+NOTIFICATION_FANOUT_CHUNK_SIZE = settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+
+# Event streams (ASGI)
+EVENTS_MAX_CONNECTIONS = settings.EVENTS_MAX_CONNECTIONS
+EVENTS_QUEUE_SIZE = settings.EVENTS_QUEUE_SIZE
+EVENTS_HEARTBEAT_SECONDS = settings.EVENTS_HEARTBEAT_SECONDS
+
+# Reports
+REPORT_CHUNK_SIZE = settings.REPORT_CHUNK_SIZE
+REPORT_PROGRESS_STEP = settings.REPORT_PROGRESS_STEP
+REPORTS_DIR = settings.REPORTS_DIR or (BASE_DIR / "reports")
+
+# Database backups
+BACKUP_DIR = settings.BACKUP_DIR or (BASE_DIR / "backups")
+BACKUP_COMPRESSION = settings.BACKUP_COMPRESSION
+BACKUP_CHUNK_SIZE = settings.BACKUP_CHUNK_SIZE
+BACKUP_FULL_EVERY = settings.BACKUP_FULL_EVERY
+BACKUP_RETENTION_GENERATIONS = settings.BACKUP_RETENTION_GENERATIONS
+BACKUP_WATERMARK_OVERLAP_SECONDS = settings.BACKUP_WATERMARK_OVERLAP_SECONDS
+BACKUP_EXCLUDE_MODELS = settings.BACKUP_EXCLUDE_MODELS
@@ -65,6 +65,7 @@ class Settings(BaseSettings):
 
     # File Upload Settings
     MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024  # 100MB
+    MEDIA_BLOB_RETENTION_HOURS: int = 24  # Unreferenced blobs kept this long
 
     # Security Settings
     SECURE_BROWSER_XSS_FILTER: bool = True
@@ -79,8 +80,69 @@ class Settings(BaseSettings):
     EMAIL_HOST_USER: str = ""
     EMAIL_HOST_PASSWORD: str = ""
     DEFAULT_FROM_EMAIL: str = "noreply@rawad.com"
+    EMAIL_BATCH_SIZE: int = 100  # Messages sent per SMTP connection
+    EMAIL_RETRY_DELAY_SECONDS: int = 60
 
     MOBILE_NUMBER_VERIFICATION_CODE_COOLDOWN_SECONDS: int = 60
+    MOBILE_NUMBER_VERIFICATION_CODE_TTL_SECONDS: int = 10 * 60
+    MOBILE_NUMBER_VERIFICATION_MAX_ATTEMPTS: int = 5  # Per code
+    PHONE_METADATA_PROVIDER: str = "phonenumbers"  # Or "compact"
+    PHONE_METADATA_REGIONS: list[str] = []  # Served regions, e.g. ["SA", "AE"]
+    PHONE_METADATA_TABLE_PATH: str = ""  # Defaults to BASE_DIR / "data" / ...
+
+    # Job Seeker Matching
+    MATCHING_SNAPSHOT_MAX_AGE_SECONDS: int = 60 * 60  # Full rebuild every hour
+    MATCHING_REFRESH_INTERVAL_SECONDS: int = 5
+
+    # Leaderboards
+    LEADERBOARD_MIN_RATINGS: int = 3  # Ratings needed to appear among top freelancers
+
+    # Geocoding
+    GEOCODE_CACHE_PRECISION: int = 7  # Geohash length, ~150m x 150m cells
+    GEOCODE_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60  # Redis tier, 7 days
+    GEOCODING_USER_AGENT: str = "coworking_locator_app"
+    GEOCODING_RATE_PER_SECOND: float = 1.0  # Nominatim usage policy: 1 req/s
+    GEOCODING_BURST: int = 1
+    GEOCODING_BATCH_SIZE: int = 100
+    GEOCODING_BATCH_DELAY_SECONDS: int = 5  # Time to coalesce new locations
+    GEOCODING_BACKENDS: list[str] = ["nominatim"]  # In order, e.g. gazetteer first
+    GEOCODING_GAZETTEER_PATH: str = ""  # Defaults to BASE_DIR / "data" / "gazetteer"
+    GEOCODING_GAZETTEER_MAX_DISTANCE_KM: float = 50.0
+
+    # Workspace proximity search
+    WORKSPACE_SEARCH_INITIAL_RADIUS_KM: float = 2.0
+    WORKSPACE_SEARCH_MAX_RADIUS_KM: float = 100.0
+    WORKSPACE_DEFAULT_TIME_ZONE: str = "Asia/Damascus"  # Of new workspaces' hours
+
+    # Map clustering
+    MAP_CLUSTER_GRID: int = 8  # Clusters per tile side
+    MAP_TILE_MAX_ZOOM: int = 18
+    MAP_TILE_WARM_ZOOM: int = 10  # Tiles precomputed by warm_map_tiles
+    MAP_TILE_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+
+    # Notifications
+    NOTIFICATION_INBOX_SIZE: int = 50  # Latest notifications kept in Redis
+    NOTIFICATION_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    NOTIFICATION_FANOUT_CHUNK_SIZE: int = 2000  # Users per insert and Redis call
+
+    # Event streams (ASGI)
+    EVENTS_MAX_CONNECTIONS: int = 10000  # Open streams per process
+    EVENTS_QUEUE_SIZE: int = 100  # Events buffered per stream before a resync
+    EVENTS_HEARTBEAT_SECONDS: int = 15
+
+    # Reports
+    REPORT_CHUNK_SIZE: int = 5000  # Rows fetched per server-side cursor read
+    REPORT_PROGRESS_STEP: int = 5  # Percent between progress events
+    REPORTS_DIR: str = ""  # Defaults to BASE_DIR / "reports", never served as media
+
+    # Database backups
+    BACKUP_DIR: str = ""  # Defaults to BASE_DIR / "backups"
+    BACKUP_COMPRESSION: str = "gzip"  # Read by loaddata as is; "zstd" is smaller
+    BACKUP_CHUNK_SIZE: int = 2000  # Rows per server-side cursor read
+    BACKUP_FULL_EVERY: int = 7  # Generations per full backup, others incremental
+    BACKUP_RETENTION_GENERATIONS: int = 4  # Full backups kept, with incrementals
+    BACKUP_WATERMARK_OVERLAP_SECONDS: int = 10 * 60
+    BACKUP_EXCLUDE_MODELS: list[str] = ["sessions.Session"]
 
 
 settings = Settings()
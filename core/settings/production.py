@@ -36,6 +36,8 @@ CSRF_COOKIE_HTTPONLY = True
 
 # Database Optimization for Production
 DATABASES["default"]["CONN_MAX_AGE"] = 600
+# Check a persistent connection before reusing it: a dropped one would fail
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
 DATABASES["default"]["OPTIONS"].update(
     {
         "connect_timeout": 10,
@@ -0,0 +1,284 @@
+"""
+Server-sent event streams, served by the ASGI application.
+
+`GET /api/events/` authenticates with a JWT access token (an
+`Authorization: Bearer` header, or `?token=` as EventSource cannot set
+headers) and then streams the events published to the user's channel by
+`core.utils.events`, instead of clients polling the WSGI workers. Tokens
+of inactive users are refused, and a stream ends with an `expired` event
+when its token expires: the client reconnects with a refreshed token.
+
+Each process holds a single Redis pub/sub connection, shared by all its
+streams: a user's channel is subscribed while they have a stream open. Idle
+streams cost a queue and two small tasks, so a process holds thousands.
+
+Backpressure: every stream has a queue of `EVENTS_QUEUE_SIZE` events and the
+Redis reader never waits for a client. When a client reads slower than its
+events arrive, its backlog is dropped and replaced by a `resync` event, on
+which the client fetches current state through the API. The same event is
+sent after the Redis connection was lost, since events may have been missed.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, close_old_connections
+from redis import asyncio as aioredis
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.utils.events import user_channel
+
+logger = logging.getLogger(__name__)
+
+EVENTS_PATH = "/api/events/"
+
+RESYNC = b"event: resync\ndata: {}\n\n"
+HEARTBEAT = b": ping\n\n"
+EXPIRED = b"event: expired\ndata: {}\n\n"
+
+
+def _encode(message):
+    """Format a published `{"event", "data"}` message as an SSE frame."""
+    payload = json.loads(message)
+    return (
+        f"event: {payload['event']}\ndata: {json.dumps(payload['data'])}\n\n"
+    ).encode()
+
+
+class Subscriber:
+    """The bounded event queue of one stream."""
+
+    def __init__(self, maxsize):
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, frame):
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Too slow a reader: drop the backlog, the client refetches state
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class EventBroker:
+    """Fans one pub/sub connection out to the streams of this process."""
+
+    def __init__(self, redis_url):
+        self.redis_url = redis_url
+        self.connections = 0
+        self._subscribers = {}  # Channel -> set of Subscriber
+        self._lock = asyncio.Lock()
+        self._pubsub = None
+        self._reader = None
+
+    async def subscribe(self, channel, subscriber):
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = aioredis.from_url(self.redis_url).pubsub(
+                    ignore_subscribe_messages=True
+                )
+            subscribers = self._subscribers.setdefault(channel, set())
+            if not subscribers:
+                await self._pubsub.subscribe(channel)
+            subscribers.add(subscriber)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+
+    async def unsubscribe(self, channel, subscriber):
+        async with self._lock:
+            subscribers = self._subscribers.get(channel, set())
+            subscribers.discard(subscriber)
+            if not subscribers and channel in self._subscribers:
+                del self._subscribers[channel]
+                try:
+                    await self._pubsub.unsubscribe(channel)
+                except Exception as e:
+                    logger.warning(f"Event channel unsubscribe failed: {e}")
+
+    async def _read(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The client resubscribes on reconnect; events may be lost
+                logger.warning(f"Event pub/sub connection lost: {e}")
+                for subscribers in list(self._subscribers.values()):
+                    for subscriber in subscribers:
+                        subscriber.put(RESYNC)
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+
+            subscribers = self._subscribers.get(message["channel"].decode())
+            if not subscribers:
+                continue
+            try:
+                frame = _encode(message["data"])
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"Malformed event on {message['channel']!r}")
+                continue
+            for subscriber in subscribers:
+                subscriber.put(frame)
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+
+
+broker = EventBroker(settings.CACHES["default"]["LOCATION"])
+
+
+def _access_token(scope):
+    """The stream's access token, or None if it is not valid."""
+    headers = dict(scope["headers"])
+    authorization = headers.get(b"authorization", b"").decode()
+    if authorization.startswith("Bearer "):
+        token = authorization[len("Bearer ") :]
+    else:
+        token = parse_qs(scope["query_string"].decode()).get("token", [None])[0]
+    if not token:
+        return None
+    try:
+        return AccessToken(token)
+    except TokenError:
+        return None
+
+
+def _is_active_user(user_id):
+    # Streams bypass Django's request signals, which normally drop broken and
+    # expired persistent connections before and after a request
+    close_old_connections()
+    try:
+        return (
+            get_user_model()
+            .objects.filter(**{jwt_settings.USER_ID_FIELD: user_id, "is_active": True})
+            .exists()
+        )
+    finally:
+        close_old_connections()
+
+
+async def _active_user_id(token):
+    """Id of the token's user if that user is still active, else None."""
+    user_id = token.get(jwt_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return None
+    is_active = await sync_to_async(_is_active_user)(user_id)
+    return user_id if is_active else None
+
+
+async def _respond(send, status, body, headers=()):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), *headers],
+        }
+    )
+    await send({"type": "http.response.body", "body": json.dumps(body).encode()})
+
+
+async def _stream(send, subscriber):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),  # No nginx buffering
+            ],
+        }
+    )
+    await send(
+        {"type": "http.response.body", "body": b"retry: 5000\n\n", "more_body": True}
+    )
+    while True:
+        try:
+            frame = await asyncio.wait_for(
+                subscriber.queue.get(), settings.EVENTS_HEARTBEAT_SECONDS
+            )
+        except TimeoutError:
+            frame = HEARTBEAT  # Keeps proxies from closing an idle stream
+        # Waits while the client's socket buffer is full
+        await send({"type": "http.response.body", "body": frame, "more_body": True})
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def events_application(scope, receive, send):
+    """ASGI application serving the event stream of the authenticated user."""
+    if scope["method"] != "GET":
+        return await _respond(send, 405, {"detail": "Method not allowed."})
+    token = _access_token(scope)
+    try:
+        user_id = await _active_user_id(token) if token is not None else None
+    except DatabaseError as e:
+        logger.warning(f"Cannot authenticate an event stream: {e}")
+        return await _respond(
+            send,
+            503,
+            {"detail": "Service temporarily unavailable."},
+            [(b"retry-after", b"5")],
+        )
+    if user_id is None:
+        return await _respond(
+            send, 401, {"detail": "A valid access token is required."}
+        )
+    if broker.connections >= settings.EVENTS_MAX_CONNECTIONS:
+        return await _respond(
+            send, 503, {"detail": "Too many streams."}, [(b"retry-after", b"5")]
+        )
+
+    channel = user_channel(user_id)
+    subscriber = Subscriber(settings.EVENTS_QUEUE_SIZE)
+    broker.connections += 1
+    tasks = []
+    try:
+        await broker.subscribe(channel, subscriber)
+        stream = asyncio.create_task(_stream(send, subscriber))
+        expiry = asyncio.create_task(asyncio.sleep(token["exp"] - time.time()))
+        tasks = [
+            stream,
+            expiry,
+            asyncio.create_task(_wait_for_disconnect(receive)),
+        ]
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and isinstance(task.exception(), Exception):
+                # Typically a write to a client that went away
+                logger.debug(
+                    f"Event stream of user {user_id} ended: {task.exception()}"
+                )
+        if expiry in done:
+            # The token is no longer valid: end the stream
+            stream.cancel()
+            await asyncio.gather(stream, return_exceptions=True)
+            try:
+                await send({"type": "http.response.body", "body": EXPIRED})
+            except Exception as e:
+                logger.debug(f"Event stream of user {user_id} ended: {e}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        broker.connections -= 1
+        await broker.unsubscribe(channel, subscriber)
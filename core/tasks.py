@@ -7,13 +7,18 @@ freelance, and donation system.
 
 import logging
 
-from celery import shared_task
+from celery import chord, shared_task
+from django.apps import apps
+from django.conf import settings
 from django.contrib.sessions.models import Session
+from django.core.files.storage import default_storage
 from django.core.mail import send_mail
-from django.core.management import call_command
 from django.utils import timezone
+from PIL import Image
 
-from core.utils.file_handling import resize_image
+from core.utils.backups import dump_model, finish_backup, plan_backup
+from core.utils.email import send_in_batches
+from core.utils.images import render_renditions
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +57,40 @@ def send_email_task(
         raise self.retry(exc=exc)
 
 
+@shared_task(bind=True, max_retries=3)
+def send_bulk_email_task(self, messages, batch_size=None):
+    """
+    Send many emails over reused connections, one message per recipient.
+
+    Only the recipients that failed are retried, with a growing delay.
+
+    Args:
+        messages (list): Dicts with `subject`, `message`, `recipient_list`
+            and optionally `from_email` and `html_message`
+        batch_size (int, optional): Messages per connection; defaults to
+            `EMAIL_BATCH_SIZE`
+
+    Returns:
+        dict: `sent` and `failed` counts, per-batch throughput, and the
+        `undelivered` addresses once retries are exhausted
+    """
+    result = send_in_batches(messages, batch_size=batch_size)
+    failed = result.pop("failed")
+    result["failed"] = len(failed)
+    if failed:
+        addresses = [message["recipient_list"][0] for message in failed]
+        if self.request.retries < self.max_retries:
+            logger.warning(f"Retrying email to {len(addresses)} recipients")
+            raise self.retry(
+                args=(failed,),
+                kwargs={"batch_size": batch_size},
+                countdown=settings.EMAIL_RETRY_DELAY_SECONDS * 2**self.request.retries,
+            )
+        logger.error(f"Giving up on email to {addresses}")
+        result["undelivered"] = addresses
+    return result
+
+
 @shared_task
 def cleanup_expired_sessions():
     """
@@ -82,60 +121,158 @@ def send_daily_summary():
         raise
 
 
-@shared_task(bind=True)
-def process_image_task(self, image_path, size):
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def render_image_renditions(self, model_label, pk, field_name):
     """
-    Process uploaded images (resize, optimize, etc.).
+    Render the WebP/JPEG renditions of an image field and record them on
+    `<field_name>_renditions`. The original file is left untouched.
 
     Args:
-        image_path (str): Path to the image file
-        size (tuple): The size to resize the image to
+        model_label (str): Model of the instance, e.g. "accounts.CompanyProfile"
+        pk: Primary key of the instance
+        field_name (str): Name of the ImageField
+
+    Returns:
+        dict: The rendition metadata, None if there was nothing to render
     """
+    model = apps.get_model(model_label)
+    renditions_field = f"{field_name}_renditions"
+    instance = model.objects.filter(pk=pk).only(field_name, renditions_field).first()
+    field_file = getattr(instance, field_name, None) if instance else None
+    if not field_file:
+        logger.info(f"No {field_name} to render for {model_label} {pk}")
+        return None
+
     try:
-        resize_image(image_path, size)
-        logger.info(f"Image processed successfully: {image_path}")
-        return f"Image processed: {image_path}"
+        metadata = render_renditions(
+            field_file.storage,
+            field_file.name,
+            previous=getattr(instance, renditions_field),
+            target=default_storage,
+        )
+    except (
+        FileNotFoundError,
+        Image.UnidentifiedImageError,
+        Image.DecompressionBombError,
+    ) as exc:
+        # Retrying cannot fix a missing or unreadable upload
+        logger.warning(f"Cannot render {field_name} of {model_label} {pk}: {exc}")
+        return None
     except Exception as exc:
-        logger.error(f"Failed to process image: {exc}")
+        logger.error(f"Failed to render {field_name} of {model_label} {pk}: {exc}")
         raise self.retry(exc=exc)
 
+    # Only record the renditions if the image was not replaced meanwhile
+    updated = model.objects.filter(pk=pk, **{field_name: field_file.name}).update(
+        **{renditions_field: metadata}
+    )
+    if updated:
+        logger.info(f"Renditions of {model_label} {pk} {field_name} stored")
+    return metadata
 
-@shared_task
-def generate_report_task(report_type, user_id, filters=None):
+
+@shared_task(bind=True)
+def generate_report_task(self, report_type, user_id, filters=None, file_format="csv"):
     """
     Generate reports asynchronously.
 
+    Progress is published to the requester's event stream and they are
+    notified when the report is ready, see `accounts.services.reports`.
+
     Args:
         report_type (str): Type of report to generate
         user_id (int): ID of the user requesting the report
         filters (dict, optional): Filters to apply to the report
+        file_format (str): "csv" or "jsonl", gzip-compressed
+
+    Returns:
+        dict: Storage name of the report file and its summary
     """
+    from accounts.services.reports import generate_report
+
     try:
-        # Implement report generation logic here
+        result = generate_report(
+            report_type, user_id, filters, file_format, report_id=self.request.id
+        )
         logger.info(f"Report generated successfully: {report_type}")
-        return f"Report generated: {report_type}"
+        return result
     except Exception as exc:
         logger.error(f"Failed to generate report: {exc}")
         raise
 
 
 @shared_task
-def backup_database():
+def backup_database(full=False):
     """
     Create database backup.
+
+    Each model is dumped by its own `backup_model_task`, in parallel, and
+    `finish_backup_task` then writes the manifest. See `core.utils.backups`.
+
+    Args:
+        full (bool): Take a full backup even if an incremental one is due
+
+    Returns:
+        str: Name of the backup generation started
     """
     try:
-        # Use Django's dumpdata command or custom backup logic
-        call_command("dumpdata", "--output=/app/backups/backup.json")
+        plan = plan_backup(full=full)
+        chord(backup_model_task.s(plan, label) for label in plan["models"])(
+            finish_backup_task.s(plan)
+        )
+        logger.info(
+            f"Database backup {plan['name']} started: {len(plan['models'])} models"
+        )
+        return plan["name"]
+    except Exception as exc:
+        logger.error(f"Failed to backup database: {exc}")
+        raise
+
+
+@shared_task
+def backup_model_task(plan, label):
+    """
+    Dump one model into a backup generation.
+
+    Args:
+        plan (dict): The backup plan, see `core.utils.backups.plan_backup`
+        label (str): Label of the model to dump
+
+    Returns:
+        dict: The model's manifest entry
+    """
+    try:
+        return dump_model(plan, label)
+    except Exception as exc:
+        logger.error(f"Failed to backup {label} in {plan['name']}: {exc}")
+        raise
+
+
+@shared_task
+def finish_backup_task(entries, plan):
+    """
+    Complete a backup generation once every model is dumped.
+
+    Args:
+        entries (list): Manifest entries returned by `backup_model_task`
+        plan (dict): The backup plan
+
+    Returns:
+        str: Summary of the backup
+    """
+    try:
+        manifest = finish_backup(plan, entries)
+        rows = sum(entry["rows"] for entry in manifest["files"])
+        size = sum(entry["bytes"] for entry in manifest["files"])
         logger.info("Database backup completed successfully")
-        return "Database backup completed"
+        return f"Database backup {plan['name']} completed: {rows} rows, {size} bytes"
     except Exception as exc:
         logger.error(f"Failed to backup database: {exc}")
         raise
 
 
 @shared_task
-def send_notification_task(user_id, message, notification_type="info"):
+def send_notification_task(user_id, message, notification_type="info", data=None):
     """
     Send notifications to users.
 
@@ -143,9 +280,12 @@ def send_notification_task(user_id, message, notification_type="info"):
         user_id (int): ID of the user to notify
         message (str): Notification message
         notification_type (str): Type of notification
+        data (dict, optional): Extra data for the client, e.g. a link target
     """
+    from accounts.services.notifications import notify
+
     try:
-        # Implement notification logic here
+        notify([user_id], message, notification_type=notification_type, data=data)
         logger.info(f"Notification sent to user {user_id}: {message}")
         return f"Notification sent to user {user_id}"
     except Exception as exc:
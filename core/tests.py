@@ -0,0 +1,207 @@
+import asyncio
+import datetime
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import Donation
+from core import streaming
+from core.tasks import send_bulk_email_task
+from core.utils import backups
+from core.utils.email import send_in_batches
+from core.utils.storage import ContentAddressedStorage
+
+User = get_user_model()
+
+
+class RefusingBackend(BaseEmailBackend):
+    """Records every delivery attempt and refuses addresses at refused.test."""
+
+    attempts = []
+    unreachable = False
+
+    def open(self):
+        if RefusingBackend.unreachable:
+            raise ConnectionError("SMTP server unreachable")
+        return True
+
+    def close(self):
+        pass
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            (recipient,) = message.to
+            RefusingBackend.attempts.append(recipient)
+            if recipient.endswith("@refused.test"):
+                raise ValueError(f"Recipient {recipient} refused")
+        return len(email_messages)
+
+
+@override_settings(
+    EMAIL_BACKEND="core.tests.RefusingBackend",
+    EMAIL_BATCH_SIZE=2,
+    EMAIL_RETRY_DELAY_SECONDS=0,
+)
+class BulkEmailTests(SimpleTestCase):
+    def setUp(self):
+        RefusingBackend.attempts = []
+        RefusingBackend.unreachable = False
+        self.messages = [
+            {
+                "subject": "Hello",
+                "message": "Body",
+                "recipient_list": ["a@ok.test", "b@refused.test", "c@ok.test"],
+            }
+        ]
+
+    def test_one_message_per_recipient_in_batches(self):
+        result = send_in_batches(self.messages)
+
+        self.assertEqual(result["sent"], 2)
+        self.assertEqual(
+            [message["recipient_list"] for message in result["failed"]],
+            [["b@refused.test"]],
+        )
+        self.assertEqual(
+            RefusingBackend.attempts, ["a@ok.test", "b@refused.test", "c@ok.test"]
+        )
+        self.assertEqual([batch["messages"] for batch in result["batches"]], [2, 1])
+
+    def test_unreachable_server_fails_the_batch(self):
+        RefusingBackend.unreachable = True
+
+        result = send_in_batches(self.messages)
+
+        self.assertEqual(result["sent"], 0)
+        self.assertEqual(len(result["failed"]), 3)
+
+    def test_task_retries_only_the_failed_recipients(self):
+        result = send_bulk_email_task.apply(args=(self.messages,)).get()
+
+        self.assertEqual(RefusingBackend.attempts.count("a@ok.test"), 1)
+        self.assertEqual(RefusingBackend.attempts.count("c@ok.test"), 1)
+        # The first attempt and max_retries retries
+        self.assertEqual(RefusingBackend.attempts.count("b@refused.test"), 4)
+        self.assertEqual(result["undelivered"], ["b@refused.test"])
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="streamer")
+        # Would close the test case's connection, as with the test client
+        self.enterContext(mock.patch.object(streaming, "close_old_connections"))
+
+    def scope(self, token):
+        return {
+            "type": "http",
+            "method": "GET",
+            "path": streaming.EVENTS_PATH,
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+            "query_string": b"",
+        }
+
+    async def run_stream(self, token):
+        sent = []
+
+        async def receive():
+            await asyncio.Event().wait()  # The client stays connected
+
+        async def send(message):
+            sent.append(message)
+
+        await asyncio.wait_for(
+            streaming.events_application(self.scope(token), receive, send), 5
+        )
+        return sent
+
+    async def test_inactive_user_is_refused(self):
+        self.user.is_active = False
+        await self.user.asave()
+
+        sent = await self.run_stream(AccessToken.for_user(self.user))
+
+        self.assertEqual(sent[0]["status"], 401)
+
+    async def test_database_errors_are_unavailable(self):
+        with mock.patch.object(
+            streaming, "_is_active_user", side_effect=OperationalError("gone")
+        ):
+            sent = await self.run_stream(AccessToken.for_user(self.user))
+
+        self.assertEqual(sent[0]["status"], 503)
+        self.assertIn((b"retry-after", b"5"), sent[0]["headers"])
+
+    async def test_stream_ends_when_the_token_expires(self):
+        token = AccessToken.for_user(self.user)
+        token.set_exp(lifetime=datetime.timedelta(seconds=1))
+
+        sent = await self.run_stream(token)
+
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertEqual(sent[-1]["body"], streaming.EXPIRED)
+        self.assertFalse(sent[-1].get("more_body", False))
+
+
+class BackupTests(TestCase):
+    def setUp(self):
+        backup_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(backup_dir.cleanup)
+        self.enterContext(
+            override_settings(
+                BACKUP_DIR=backup_dir.name, BACKUP_WATERMARK_OVERLAP_SECONDS=0
+            )
+        )
+        self.supporter = User.objects.create_user(
+            username="backer", role=User.UserRole.SUPPORTER
+        ).supporter_profile
+
+    def test_rows_created_after_the_plan_wait_for_the_next_generation(self):
+        plan = backups.plan_backup(full=True)
+        Donation.objects.create(supporter=self.supporter, amount=Decimal("10"))
+
+        self.assertEqual(backups.dump_model(plan, "accounts.Donation")["rows"], 0)
+
+    def test_incremental_includes_changed_donations_and_totals(self):
+        changed = Donation.objects.create(
+            supporter=self.supporter, amount=Decimal("10")
+        )
+        Donation.objects.create(supporter=self.supporter, amount=Decimal("20"))
+        backups.finish_backup(backups.plan_backup(), [])
+
+        changed.amount = Decimal("15")
+        changed.save()
+        plan = backups.plan_backup()
+
+        self.assertEqual(plan["kind"], backups.INCREMENTAL)
+        donations = backups.dump_model(plan, "accounts.Donation")
+        self.assertTrue(donations["incremental"])
+        self.assertEqual(donations["rows"], 1)
+        self.assertEqual(
+            backups.dump_model(plan, "accounts.SupporterProfile")["rows"], 1
+        )
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        self.storage = ContentAddressedStorage(location=location.name)
+
+    def test_identical_content_is_stored_once_whatever_the_extension(self):
+        first = self.storage.save("photos/a.jpg", ContentFile(b"pixels"))
+        second = self.storage.save("logos/b.png", ContentFile(b"pixels"))
+        other = self.storage.save("logos/c.png", ContentFile(b"other pixels"))
+
+        self.assertEqual(second, first)
+        self.assertTrue(first.endswith(".jpg"))
+        self.assertTrue(other.endswith(".png"))
+        sha256 = first.rsplit("/", 1)[1].split(".")[0]
+        self.assertEqual(self.storage.blob_names(sha256), [first])
+        self.assertEqual(self.storage.blob_names("0" * 64), [])
@@ -40,6 +40,7 @@ def api_root(request):
             "version": "1.0.0",
             "endpoints": {
                 "auth": "/api/auth/",
+                "accounts": "/api/accounts/",
                 "docs": "/api/docs/",
                 "health": "/health/",
                 "admin": "/admin/",
@@ -78,6 +79,8 @@ urlpatterns = [
         name="swagger-ui",
     ),
     path("api/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
+    # Accounts
+    path("api/accounts/", include("accounts.urls")),
     # Your app URLs will go here
     # path("api/jobs/", include("jobs.urls")),
     # path("api/freelance/", include("freelance.urls")),
@@ -0,0 +1,44 @@
+"""
+Publishing of real-time events to users, over Redis pub/sub.
+
+Each user has a channel; `core.streaming` delivers its events to the user's
+open event streams. Publishing is fire-and-forget: nobody listening costs
+nothing, and an event missed while disconnected is not replayed, so clients
+must treat events as hints and fetch state through the API on (re)connect.
+"""
+
+import json
+import logging
+
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+USER_CHANNEL = "events:user:{user_id}"
+
+
+def user_channel(user_id):
+    return USER_CHANNEL.format(user_id=user_id)
+
+
+def publish_many(events, alias="default"):
+    """
+    Publish events in one round trip. Redis trouble is logged, never raised.
+
+    Args:
+        events: Iterable of `(user_id, event, data)`, `data` being
+            JSON-serializable
+    """
+    try:
+        pipeline = get_redis_connection(alias).pipeline(transaction=False)
+        for user_id, event, data in events:
+            pipeline.publish(
+                user_channel(user_id), json.dumps({"event": event, "data": data})
+            )
+        pipeline.execute()
+    except Exception as e:
+        logger.error(f"Event publishing failed: {e}", exc_info=True)
+
+
+def publish(user_id, event, data=None):
+    publish_many([(user_id, event, data or {})])
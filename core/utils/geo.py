@@ -0,0 +1,160 @@
+"""
+Small geographic helpers: geohash encoding, great-circle distances and
+map tiles.
+"""
+
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_INDEX = {char: index for index, char in enumerate(_BASE32)}
+
+
+def geohash_encode(latitude, longitude, precision=12):
+    """Encode a coordinate as a geohash string of `precision` characters."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Geohash interleaves bits starting with longitude
+
+    while len(chars) < precision:
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            bits = (bits << 1) | 1
+            bounds[0] = middle
+        else:
+            bits <<= 1
+            bounds[1] = middle
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_bounds(geohash):
+    """Return `(min_lat, min_lng, max_lat, max_lng)` of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        index = _BASE32_INDEX[char]
+        for shift in range(4, -1, -1):
+            bounds = lng_range if even else lat_range
+            middle = (bounds[0] + bounds[1]) / 2
+            if (index >> shift) & 1:
+                bounds[0] = middle
+            else:
+                bounds[1] = middle
+            even = not even
+
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def geohash_cell_size(precision):
+    """Return the `(height, width)` of a geohash cell in degrees."""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lng_bits
+
+
+def geohash_precision_for_radius(radius_km):
+    """
+    Longest geohash precision whose cells are still at least `radius_km` tall
+    and wide, so a circle of that radius is covered by a cell and its eight
+    neighbours.
+    """
+    for precision in range(12, 0, -1):
+        height, width = geohash_cell_size(precision)
+        # Width shrinks with latitude; use the equator as the conservative case
+        if min(height, width) * 111.32 >= radius_km:
+            return precision
+    return 1
+
+
+def geohash_cells_covering(min_lat, min_lng, max_lat, max_lng, precision):
+    """Return the set of geohash cells of `precision` that intersect a box."""
+    height, width = geohash_cell_size(precision)
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+
+    cells = set()
+    latitude = min_lat
+    while True:
+        longitude = min_lng
+        while True:
+            wrapped = (longitude + 180.0) % 360.0 - 180.0
+            cells.add(geohash_encode(latitude, wrapped, precision))
+            if longitude >= max_lng:
+                break
+            longitude = min(longitude + width, max_lng)
+        if latitude >= max_lat:
+            break
+        latitude = min(latitude + height, max_lat)
+    return cells
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two coordinates, in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Return `(min_lat, min_lng, max_lat, max_lng)` enclosing a circle.
+    Longitudes may fall outside [-180, 180] near the antimeridian.
+    """
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat < 1e-6 or latitude + d_lat >= 90 or latitude - d_lat <= -90:
+        # Circle reaches a pole: every longitude qualifies
+        return latitude - d_lat, -180.0, latitude + d_lat, 180.0
+    d_lng = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    return latitude - d_lat, longitude - d_lng, latitude + d_lat, longitude + d_lng
+
+
+# Web Mercator ("slippy map") tiles, as used by map clients
+MAX_MERCATOR_LATITUDE = 85.05112878
+
+
+def mercator_y(latitude):
+    """Web Mercator y of a latitude, in radians-based units (0 at the equator)."""
+    latitude = max(min(latitude, MAX_MERCATOR_LATITUDE), -MAX_MERCATOR_LATITUDE)
+    return math.log(math.tan(math.pi / 4 + math.radians(latitude) / 2))
+
+
+def tile_for_point(latitude, longitude, zoom):
+    """Return the `(x, y)` of the zoom-level tile containing a coordinate."""
+    tiles = 2**zoom
+    x = int((longitude + 180.0) / 360.0 * tiles)
+    y = int((1 - mercator_y(latitude) / math.pi) / 2 * tiles)
+    return min(max(x, 0), tiles - 1), min(max(y, 0), tiles - 1)
+
+
+def tile_bounds(zoom, x, y):
+    """Return `(min_lat, min_lng, max_lat, max_lng)` of a tile."""
+    tiles = 2**zoom
+
+    def latitude(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / tiles))))
+
+    return (
+        latitude(y + 1),
+        x / tiles * 360.0 - 180.0,
+        latitude(y),
+        (x + 1) / tiles * 360.0 - 180.0,
+    )
@@ -0,0 +1,154 @@
+"""
+Image renditions: several sizes of an uploaded image, in WebP and JPEG.
+
+The original upload is never modified. Renditions are stored under the
+SHA-256 of the original's content, so re-uploading the same picture, or
+re-running the pipeline, finds them already there and decodes nothing.
+JPEG sources are decoded with `Image.draft`, which lets libjpeg scale down
+while decoding, so a large photo never expands to full resolution in memory.
+
+Rendition names also carry `RENDITIONS_VERSION`, a digest of the sizes and
+encoder options below: changing them makes every image render again.
+"""
+
+import hashlib
+import io
+import json
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Rendition name -> bounding box, largest first
+RENDITIONS = {
+    "full": (1600, 1600),
+    "card": (400, 400),
+    "thumbnail": (150, 150),
+}
+
+# Format -> (file extension, Pillow save options)
+FORMATS = {
+    "webp": ("webp", {"quality": 80, "method": 4}),
+    "jpeg": ("jpg", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+RENDITIONS_DIR = "renditions"
+
+RENDITIONS_VERSION = hashlib.sha256(
+    json.dumps([RENDITIONS, FORMATS], sort_keys=True).encode()
+).hexdigest()[:8]
+
+
+def file_sha256(file, chunk_size=1024 * 1024):
+    """Hex SHA-256 of a file-like object's content, read in chunks."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(chunk_size), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def rendition_name(sha256, rendition, image_format):
+    extension, _ = FORMATS[image_format]
+    return (
+        f"{RENDITIONS_DIR}/{RENDITIONS_VERSION}/{sha256[:2]}/{sha256}/"
+        f"{rendition}.{extension}"
+    )
+
+
+def _decode(file):
+    """Open an image, scaled down by the JPEG decoder when possible."""
+    image = Image.open(file)
+    if image.format == "JPEG":
+        image.draft("RGB", RENDITIONS["full"])
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    return image
+
+
+def _encode(image, image_format):
+    _, options = FORMATS[image_format]
+    if image_format == "jpeg" and image.mode == "RGBA":
+        # JPEG has no alpha channel: flatten on white
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format.upper(), **options)
+    return buffer.getvalue()
+
+
+def _existing_metadata(storage, sha256):
+    """Metadata of renditions already stored for this content, or None."""
+    renditions = {}
+    for rendition in RENDITIONS:
+        renditions[rendition] = {}
+        for image_format in FORMATS:
+            name = rendition_name(sha256, rendition, image_format)
+            if not storage.exists(name):
+                return None
+            with storage.open(name, "rb") as f:
+                width, height = Image.open(f).size  # Reads the header only
+            renditions[rendition][image_format] = {
+                "name": name,
+                "width": width,
+                "height": height,
+                "bytes": storage.size(name),
+            }
+    return renditions
+
+
+def render_renditions(storage, source_name, previous=None, target=None):
+    """
+    Make sure every rendition of a stored image exists.
+
+    Args:
+        storage: The Django storage holding the original
+        source_name (str): Name of the original in `storage`
+        previous (dict, optional): Metadata returned by an earlier run, used
+            to skip all work when the content did not change
+        target: The storage renditions are written to, `storage` by default
+
+    Returns:
+        dict: `sha256` and `source` of the original, the `version` of the
+        rendition sizes, and `renditions`:
+        rendition -> format -> `name`, `width`, `height`, `bytes`
+    """
+    target = target or storage
+    with storage.open(source_name, "rb") as source:
+        sha256 = file_sha256(source)
+        if (
+            previous
+            and previous.get("sha256") == sha256
+            and previous.get("version") == RENDITIONS_VERSION
+        ):
+            return {**previous, "source": source_name}
+
+        renditions = _existing_metadata(target, sha256)
+        if renditions is None:
+            renditions = {}
+            image = _decode(source)
+            # Largest first, each one scaled from the previous
+            for rendition, size in RENDITIONS.items():
+                image = image.copy()
+                image.thumbnail(size, Image.Resampling.LANCZOS)
+                renditions[rendition] = {}
+                for image_format in FORMATS:
+                    name = rendition_name(sha256, rendition, image_format)
+                    content = _encode(image, image_format)
+                    if not target.exists(name):
+                        name = target.save(name, ContentFile(content))
+                    renditions[rendition][image_format] = {
+                        "name": name,
+                        "width": image.width,
+                        "height": image.height,
+                        "bytes": len(content),
+                    }
+
+    return {
+        "sha256": sha256,
+        "version": RENDITIONS_VERSION,
+        "source": source_name,
+        "renditions": renditions,
+    }
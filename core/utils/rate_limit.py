@@ -0,0 +1,58 @@
+"""
+Token-bucket rate limiting shared across processes through Redis.
+"""
+
+from django_redis import get_redis_connection
+
+# Refill the bucket from Redis' own clock (so worker clock skew does not
+# matter), then take one token if available. Returns the seconds to wait
+# before a token will be available, as a string to keep the fraction.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "updated", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    """
+    A rate limit of `rate` operations per second with bursts up to `capacity`,
+    enforced atomically for every process sharing the same Redis key.
+    """
+
+    def __init__(self, key, rate, capacity=1, alias="default"):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self.alias = alias
+        self._script = None
+
+    def acquire(self):
+        """
+        Try to take one token.
+
+        Returns:
+            float: 0 if the token was taken, otherwise the number of seconds
+            until one becomes available (nothing is taken in that case)
+        """
+        if self._script is None:
+            connection = get_redis_connection(self.alias)
+            self._script = connection.register_script(_TOKEN_BUCKET_SCRIPT)
+        return float(self._script(keys=[self.key], args=[self.rate, self.capacity]))
@@ -0,0 +1,95 @@
+"""
+Content-addressed media storage.
+
+Uploads are named after the SHA-256 of their content, computed while the
+upload is streamed to a temporary file next to its destination. Identical
+uploads therefore resolve to the same blob and are written once: the second
+one only costs the hashing pass. The name proposed by the field's `upload_to`
+is ignored apart from its extension, which only the first upload of some
+content decides; later ones reuse the stored file whatever their extension.
+
+Blobs are shared between fields, so they must not be deleted with the row
+that referenced them; `accounts.services.media_blobs` counts references and
+collects unused blobs.
+"""
+
+import functools
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+BLOBS_DIR = "blobs"
+
+_BLOB_NAME = re.compile(rf"^{BLOBS_DIR}/[0-9a-f]{{2}}/([0-9a-f]{{64}})(\.\w+)?$")
+
+
+def blob_name(sha256, extension=""):
+    """Storage name of the blob with this content hash."""
+    return f"{BLOBS_DIR}/{sha256[:2]}/{sha256}{extension}"
+
+
+def blob_sha256(name):
+    """Content hash encoded in a blob name, or None for other names."""
+    match = _BLOB_NAME.match(name or "")
+    return match.group(1) if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that stores each distinct content once."""
+
+    def blob_names(self, sha256):
+        """Names of the files stored with this content hash, any extension."""
+        directory = os.path.dirname(blob_name(sha256))
+        try:
+            _, files = self.listdir(directory)
+        except FileNotFoundError:
+            return []
+        names = (f"{directory}/{file}" for file in files)
+        return sorted(name for name in names if blob_sha256(name) == sha256)
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()
+        directory = self.path(BLOBS_DIR)
+        os.makedirs(directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as temp:
+            try:
+                if hasattr(content, "seekable") and content.seekable():
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            except BaseException:
+                os.unlink(temp.name)
+                raise
+
+        existing = self.blob_names(digest.hexdigest())
+        if existing:
+            os.unlink(temp.name)
+            return existing[0]
+
+        name = blob_name(digest.hexdigest(), extension)
+        path = self.path(name)
+        if os.path.exists(path):
+            os.unlink(temp.name)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp.name, self.file_permissions_mode)
+            # Atomic: concurrent uploads of the same content both end up here
+            os.replace(temp.name, path)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is only known once the content is hashed, in _save
+        return name
+
+
+@functools.cache
+def media_blob_storage():
+    """Storage of content-addressed media, as a callable for `FileField`."""
+    return ContentAddressedStorage()